@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""パイプライン各ステージのベンチマーク（合成した長時間チュートリアルで計測）"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from markdown_generator import MarkdownGenerator
+from md_to_html_converter import MDtoHTMLConverter
+from srt_quality_fixer import SRTQualityFixer
+
+
+BENCHMARK_FORMAT_VERSION = 1
+
+# (字幕キュー数, ノード数)
+DEFAULT_CASES = [(1000, 10), (10000, 500), (100000, 5000)]
+
+WORDS = (
+    "the node geometry we attribute point primitive bridge network wrangle "
+    "copy transform scatter curve sweep polygon merge group select parameter "
+    "value switch loop block input output connect create simply just now here"
+).split()
+NODE_NAMES = (
+    "Box SOP", "Add SOP", "Merge SOP", "Transform SOP", "Copy to Points SOP",
+    "Attribute Wrangle SOP", "Group SOP", "Sweep SOP", "PolyExtrude SOP", "Scatter SOP",
+    "For-Each Loop", "Switch SOP", "Resample SOP", "Curve SOP", "Blast SOP",
+)
+
+
+def _format_srt_timestamp(seconds: float) -> str:
+    """秒を HH:MM:SS,mmm に変換（合成データ用）"""
+    total_ms = int(round(seconds * 1000))
+    hours, rest = divmod(total_ms, 3600 * 1000)
+    minutes, rest = divmod(rest, 60 * 1000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def make_srt(cue_count: int, rng: random.Random) -> Tuple[str, float]:
+    """合成SRTテキストと総再生時間（秒）を返す（約3割のキューが文末で終わる）"""
+    blocks = []
+    current = 0.0
+    for i in range(1, cue_count + 1):
+        start = current
+        current += rng.uniform(1.5, 4.5)
+        words = rng.choices(WORDS, k=rng.randint(4, 12))
+        text = " ".join(words)
+        if rng.random() < 0.3:
+            text += rng.choice(".!?")
+        blocks.append(f"{i}\n{_format_srt_timestamp(start)} --> {_format_srt_timestamp(current)}\n{text}\n")
+        current += rng.uniform(0.0, 0.3)
+    return "\n".join(blocks) + "\n", current
+
+
+def make_nodes(node_count: int, duration: float, rng: random.Random) -> List[Dict]:
+    """合成ノード挿入データ（再生時間全体に散らばる）を返す"""
+    nodes = []
+    for i in range(node_count):
+        seconds = int(rng.uniform(0, duration))
+        name = f"{rng.choice(NODE_NAMES)} {i}"
+        nodes.append({
+            "node_name": name,
+            "insert_after_timestamp": f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}",
+            "doc_link_ja": f"https://www.sidefx.com/ja/docs/houdini/nodes/sop/node_{i}.html",
+        })
+    return nodes
+
+
+def _measure(func: Callable[[], object], repeat: int) -> Dict:
+    """関数を repeat 回実行して所要時間を計測し、別途1回だけ tracemalloc でピークメモリを計測"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # tracemalloc は実行を遅くするため時間計測とは分けて実行する
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": min(timings),
+        "mean_seconds": statistics.mean(timings),
+        "runs": repeat,
+        "peak_memory_bytes": peak,
+    }
+
+
+class _NullWriter:
+    """出力を捨てる書き込み先（HTML生成の計測用）"""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def run_case(cue_count: int, node_count: int, repeat: int, seed: int, workdir: Path) -> Dict:
+    """1ケース分（キュー数・ノード数）の全ステージを計測"""
+    rng = random.Random(seed)
+    srt_text, duration = make_srt(cue_count, rng)
+    nodes = make_nodes(node_count, duration, rng)
+
+    srt_path = workdir / f"bench_{cue_count}.srt"
+    srt_path.write_text(srt_text, encoding="utf-8")
+
+    fixer = SRTQualityFixer()
+    cues = fixer.parse_srt_file(srt_path)
+
+    def make_generator() -> MarkdownGenerator:
+        generator = MarkdownGenerator()
+        generator.series_name = "Benchmark Series"
+        generator.chapter_number = "1"
+        generator.chapter_title = "Synthetic"
+        generator.subtitle_segments = list(cues)
+        generator.load_node_insertions([dict(node) for node in nodes])
+        return generator
+
+    generator = make_generator()
+    markdown = generator.generate_markdown_content()
+
+    def place_nodes():
+        # インデックス構築を含めて計測するため毎回新しいインスタンスで実行
+        placer = make_generator()
+        for node in placer.node_insertions:
+            placer.find_best_segment_for_node(node.get("insert_seconds", 0))
+
+    def write_html():
+        make_generator().write_html(_NullWriter())
+
+    # (ステージ名, 処理, 件数, 単位)
+    stages = [
+        ("parse_srt_file", lambda: fixer.parse_srt_file(srt_path), cue_count, "cues"),
+        ("fix_segments", lambda: fixer.fix_segments(cues), cue_count, "cues"),
+        ("find_best_segment_for_node", place_nodes, node_count, "nodes"),
+        ("generate_markdown_content", lambda: make_generator().generate_markdown_content(),
+         cue_count, "cues"),
+        ("convert", lambda: MDtoHTMLConverter().convert(markdown), len(markdown.encode("utf-8")),
+         "bytes"),
+        ("write_html", write_html, cue_count, "cues"),
+    ]
+
+    results = {}
+    for name, func, items, unit in stages:
+        print(f"[INFO] {cue_count}キュー/{node_count}ノード: {name}", file=sys.stderr)
+        measured = _measure(func, repeat)
+        measured["items"] = items
+        measured["unit"] = unit
+        measured["throughput"] = items / measured["seconds"] if measured["seconds"] > 0 else None
+        results[name] = measured
+
+    return {
+        "cues": cue_count,
+        "nodes": node_count,
+        "srt_bytes": len(srt_text.encode("utf-8")),
+        "markdown_bytes": len(markdown.encode("utf-8")),
+        "stages": results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """基準結果と比較し、threshold（割合）を超えて遅くなったステージを返す"""
+    baseline_cases = {(c["cues"], c["nodes"]): c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in current["cases"]:
+        base_case = baseline_cases.get((case["cues"], case["nodes"]))
+        if not base_case:
+            continue
+        for stage, result in case["stages"].items():
+            base_result = base_case["stages"].get(stage)
+            if not base_result or not base_result["seconds"]:
+                continue
+            ratio = result["seconds"] / base_result["seconds"]
+            label = f"{case['cues']}キュー/{case['nodes']}ノード {stage}"
+            print(f"   {label}: {base_result['seconds']:.4f}秒 → {result['seconds']:.4f}秒 (x{ratio:.2f})",
+                  file=sys.stderr)
+            if ratio > 1.0 + threshold:
+                regressions.append(label)
+    return regressions
+
+
+def parse_case(value: str) -> Tuple[int, int]:
+    """'キュー数:ノード数' 形式の引数を解析"""
+    try:
+        cues, nodes = value.split(":")
+        return int(cues), int(nodes)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'キュー数:ノード数' の形式で指定してください: {value}")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="パイプライン各ステージのベンチマーク",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python benchmark.py --output bench.json
+  python benchmark.py --cases 1000:10 10000:500 --repeat 5
+  python benchmark.py --output new.json --compare bench.json --threshold 0.2
+        """
+    )
+    parser.add_argument('--cases', nargs='+', type=parse_case, metavar='CUES:NODES',
+                        help='計測ケース（デフォルト: 1000:10 10000:500 100000:5000）')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='各ステージの実行回数（最速値を採用）（デフォルト: 3）')
+    parser.add_argument('--seed', type=int, default=1234,
+                        help='合成データの乱数シード（デフォルト: 1234）')
+    parser.add_argument('--output', '-o',
+                        help='結果JSONの出力先（省略時は標準出力）')
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help='比較対象の結果JSON（遅くなったステージがあれば終了コード1）')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='回帰とみなす速度低下の割合（デフォルト: 0.2 = 20%%）')
+
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat は1以上で指定してください")
+
+    results = {
+        "version": BENCHMARK_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="srt_bench_") as workdir:
+        for cue_count, node_count in args.cases or DEFAULT_CASES:
+            results["cases"].append(run_case(cue_count, node_count, args.repeat, args.seed, Path(workdir)))
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"[SUCCESS] 結果を書き込みました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            for label in regressions:
+                print(f"[REGRESSION] {label}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""インクリメンタルビルド用キャッシュ（.build_cache.json）"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+CACHE_FILE_NAME = ".build_cache.json"
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path: Optional[Path]) -> Optional[str]:
+    """ファイル内容のSHA-256ダイジェストを返す（存在しない場合はNone）"""
+    if path is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def text_digest(text: str) -> str:
+    """文字列のSHA-256ダイジェストを返す"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def source_fingerprint(paths: Iterable[Path]) -> str:
+    """生成ツールのソースコードからバージョン指紋を作成（コード変更でキャッシュ無効化）"""
+    digest = hashlib.sha256()
+    for path in sorted(str(p) for p in paths):
+        digest.update(Path(path).name.encode('utf-8'))
+        digest.update((file_digest(Path(path)) or "").encode('ascii'))
+    return digest.hexdigest()
+
+
+def stage_key(*parts) -> str:
+    """ステージ入力（ハッシュ・設定値）から一意なキャッシュキーを作成"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return text_digest(payload)
+
+
+class BuildCache:
+    """シリーズ直下のビルドマニフェストを管理するクラス"""
+
+    def __init__(self, series_dir: Path):
+        self.path = series_dir / CACHE_FILE_NAME
+        self.chapters: Dict[str, Dict] = {}
+        self._dirty = False
+
+    def load(self) -> "BuildCache":
+        """マニフェストを読み込み（破損・旧形式の場合は空として扱う）"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_FORMAT_VERSION:
+                self.chapters = data.get("chapters", {})
+        except (FileNotFoundError, ValueError, AttributeError):
+            self.chapters = {}
+        return self
+
+    def save(self) -> None:
+        """変更がある場合のみマニフェストをアトミックに書き出し"""
+        if not self._dirty:
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_FORMAT_VERSION, "chapters": self.chapters},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def entry(self, chapter: str) -> Dict:
+        """チャプターのキャッシュエントリ（ステージ名 → 記録）を返す"""
+        return dict(self.chapters.get(chapter, {}))
+
+    def update(self, chapter: str, entry: Dict) -> None:
+        """チャプターのキャッシュエントリを置き換え"""
+        if self.chapters.get(chapter) != entry:
+            self.chapters[chapter] = entry
+            self._dirty = True
+
+    @staticmethod
+    def is_fresh(entry: Dict, stage: str, key: str, outputs: List[Path]) -> bool:
+        """ステージの入力キーが一致し、出力が記録時のまま残っているか判定"""
+        record = entry.get(stage)
+        if not record or record.get("key") != key:
+            return False
+        recorded_outputs = record.get("outputs", {})
+        for output in outputs:
+            if recorded_outputs.get(output.name) != file_digest(output):
+                return False
+        return True
+
+    @staticmethod
+    def record(entry: Dict, stage: str, key: str, outputs: List[Path]) -> None:
+        """ステージの実行結果をエントリに記録"""
+        entry[stage] = {
+            "key": key,
+            "outputs": {output.name: file_digest(output) for output in outputs},
+        }
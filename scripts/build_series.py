@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""シリーズ一括ビルドツール（字幕修正 → マークダウン生成 → HTML変換）"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import markdown_generator
+import md_to_html_converter
+import precompress
+import srt_quality_fixer
+import workflow_logging
+from build_cache import BuildCache, file_digest, source_fingerprint, stage_key, text_digest
+from file_watcher import create_watcher
+from srt_quality_fixer import SRTQualityFixer
+from markdown_generator import DOC_LINK_MODES, MarkdownGenerator
+from md_to_html_converter import MDtoHTMLConverter, stylesheet_href, write_stylesheet
+from node_catalog import BUNDLED_CATALOG_PATH
+from node_index import NODE_FILE_RE, PROGRESS_FILE_NAME, NodeIndex, chapter_key, update_series
+from precompress import COMPRESSORS, compressed_paths, remove_compressed, write_compressed
+
+
+logger = workflow_logging.get_logger("build_series")
+
+RAW_DATA_DIR = "01_raw_data"
+ANALYSIS_DATA_DIR = "02_analysis_data"
+GUIDE_CHAPTERS_DIR = Path("03_learning_guide") / "chapters"
+# --css external で全チャプター共通のスタイルシートを置くフォルダ
+GUIDE_ASSETS_DIR = Path("03_learning_guide") / "assets"
+CSS_MODES = ("inline", "external")
+
+# ソースが変わるとキャッシュを無効化する生成ツール群
+TOOL_MODULES = (srt_quality_fixer, markdown_generator, md_to_html_converter, precompress)
+
+# --watch で再ビルドのきっかけにする字幕ファイル（en_fixed.srt はビルドの出力のため含めない）
+WATCHED_SRT_PATTERNS = ("transcript_*_en.srt", "transcript_*_jp.srt")
+
+
+class ChapterTask:
+    """1チャプター分の入出力パスをまとめたビルド単位"""
+
+    def __init__(self, series_dir: Path, chapter_dir: Path):
+        self.series_dir = series_dir
+        self.chapter_dir = chapter_dir
+        self.name = chapter_dir.name
+        # chapter_02_basic_logic → 02
+        self.number = self.name.split("_")[1]
+
+        self.en_srt = self._find_single(chapter_dir, "transcript_*_en.srt")
+        self.en_fixed_srt = (
+            self.en_srt.with_name(self.en_srt.stem + "_fixed.srt") if self.en_srt else None
+        )
+        self.jp_srt = self._find_single(chapter_dir, "transcript_*_jp.srt")
+
+        node_file = series_dir / ANALYSIS_DATA_DIR / f"chapter_{self.number}_node_insertions.json"
+        self.node_data = node_file if node_file.exists() else None
+        # ノード初出区分（--node-debuts 指定時にシリーズのインデックスから設定）
+        self.node_debuts: Optional[Dict[str, str]] = None
+
+        guide_dir = series_dir / GUIDE_CHAPTERS_DIR
+        self.markdown = guide_dir / f"{self.name}_学習ガイド.md"
+        self.html = guide_dir / f"{self.name}_学習ガイド.html"
+
+    @staticmethod
+    def _find_single(directory: Path, pattern: str) -> Optional[Path]:
+        """パターンに一致するファイルを1つ返す（複数ある場合は名前順で先頭）"""
+        matches = sorted(directory.glob(pattern))
+        return matches[0] if matches else None
+
+    def planned_stages(self, options: Optional[Dict] = None) -> List[str]:
+        """入力ファイルの有無（と事前圧縮の指定）から実行するステージを決定"""
+        stages = []
+        if self.en_srt:
+            stages.append("fix")
+        if self.jp_srt:
+            stages.append("guide")
+            if options and options.get("compress"):
+                stages.append("compress")
+        return stages
+
+    def stage_outputs(self, stage: str, options: Optional[Dict] = None) -> List[Path]:
+        """ステージの出力ファイル"""
+        if stage == "compress":
+            return compressed_paths(self.html, options["compress"])
+        return {
+            "fix": [self.en_fixed_srt],
+            "guide": [self.markdown, self.html],
+        }[stage]
+
+    def stage_key(self, stage: str, options: Dict) -> str:
+        """ステージの全入力（内容ハッシュ・設定値・ツール版数）からキャッシュキーを計算"""
+        if stage == "fix":
+            inputs = [file_digest(self.en_srt),
+                      options["target_duration"], options["completion_threshold"]]
+        elif stage == "compress":
+            inputs = [file_digest(self.html), list(options["compress"])]
+        else:
+            inputs = [str(self.jp_srt), file_digest(self.jp_srt), file_digest(self.node_data),
+                      options["total_chapters"], options["video_url"], options["template_digest"],
+                      options["doc_links"], options["catalog_digest"], options["stylesheet_href"],
+                      options["minify"],
+                      sorted(self.node_debuts.items()) if self.node_debuts is not None else None]
+        return stage_key(stage, options["generator_version"], *inputs)
+
+
+def discover_chapters(series_dir: Path, only: Optional[List[str]] = None) -> List[ChapterTask]:
+    """01_raw_data 配下の chapter_* フォルダを列挙してビルド単位を返す"""
+    raw_dir = series_dir / RAW_DATA_DIR
+    if not raw_dir.is_dir():
+        raise FileNotFoundError(f"字幕フォルダが見つかりません: {raw_dir}")
+
+    tasks = []
+    for chapter_dir in sorted(raw_dir.glob("chapter_*")):
+        if not chapter_dir.is_dir():
+            continue
+        task = ChapterTask(series_dir, chapter_dir)
+        if only and task.number not in only:
+            continue
+        tasks.append(task)
+    return tasks
+
+
+def _run_fix_stage(task: ChapterTask, options: Dict) -> bool:
+    """en.srt → en_fixed.srt"""
+    fixer = SRTQualityFixer(
+        target_duration=options["target_duration"],
+        completion_threshold=options["completion_threshold"]
+    )
+    return fixer.fix_srt_quality(task.en_srt, task.en_fixed_srt)
+
+
+def _run_guide_stage(task: ChapterTask, options: Dict) -> bool:
+    """jp.srt + node_insertions.json → .md と .html（HTMLはマークダウンを再解析せず直接生成）"""
+    generator = MarkdownGenerator(doc_links=options["doc_links"])
+    if options.get("video_url"):
+        generator.video_url = options["video_url"]
+
+    generator.extract_series_info(task.jp_srt)
+    if not generator.parse_srt_file(task.jp_srt):
+        return False
+    if task.node_data and not generator.parse_node_data(task.node_data):
+        return False
+    generator.node_debuts = task.node_debuts
+    generator.stylesheet_href = options["stylesheet_href"]
+    generator.minify_html = options["minify"]
+    # 以前の事前圧縮ファイルは内容が古くなるため削除（--compress 指定時は次のステージで作り直す）
+    remove_compressed(task.html)
+    return generator.generate_markdown_file(task.markdown) and generator.generate_html_file(task.html)
+
+
+def _run_compress_stage(task: ChapterTask, options: Dict) -> bool:
+    """.html → .html.gz 等（チャプター単位でプロセスプール上で並列に圧縮）"""
+    sizes = write_compressed(task.html, options["compress"])
+    original = task.html.stat().st_size
+    logger.info("[SUCCESS] 事前圧縮完了: " + ", ".join(
+        f"{codec} {size:,}バイト（{size / original * 100 if original else 0:.1f}%）" for codec, size in sizes.items()))
+    return True
+
+
+STAGE_RUNNERS = {
+    "fix": _run_fix_stage,
+    "guide": _run_guide_stage,
+    "compress": _run_compress_stage,
+}
+
+
+def is_chapter_fresh(task: ChapterTask, options: Dict, entry: Dict) -> bool:
+    """全ステージがキャッシュ済みか判定（プールへ投入せずにスキップするため）"""
+    if not options["use_cache"]:
+        return False
+    return all(
+        BuildCache.is_fresh(entry, stage, task.stage_key(stage, options), task.stage_outputs(stage, options))
+        for stage in task.planned_stages(options)
+    )
+
+
+def build_chapter(task: ChapterTask, options: Dict, entry: Optional[Dict] = None) -> Dict:
+    """1チャプターの全ステージを依存順に実行（ワーカープロセスで呼ばれる）"""
+    entry = dict(entry or {})
+    result = {"chapter": task.name, "stages": {}, "success": True, "log": ""}
+    start_time = time.perf_counter()
+
+    # 各ツールのコンソール出力は並列実行で混ざるため、チャプター単位で回収する
+    # （ログの出力設定は呼び出し元のものを使い、ここでは変更しない）
+    captured = io.StringIO()
+    with contextlib.redirect_stdout(captured):
+        for stage in task.planned_stages(options):
+            key = task.stage_key(stage, options)
+            outputs = task.stage_outputs(stage, options)
+            if options["use_cache"] and BuildCache.is_fresh(entry, stage, key, outputs):
+                result["stages"][stage] = "cached"
+                continue
+
+            try:
+                ok = STAGE_RUNNERS[stage](task, options)
+            except Exception as e:
+                logger.error(f"[ERROR] {stage}: {e}")
+                ok = False
+            result["stages"][stage] = "completed" if ok else "failed"
+            if not ok:
+                entry.pop(stage, None)
+                result["success"] = False
+                break
+            BuildCache.record(entry, stage, key, outputs)
+
+    result["log"] = captured.getvalue()
+    result["cache_entry"] = entry
+    result["elapsed"] = time.perf_counter() - start_time
+    return result
+
+
+def _init_worker(log_level: str) -> None:
+    """ワーカープロセスの初期化（ツールのログを標準出力へ出し、build_chapter で回収できるようにする）"""
+    workflow_logging.configure(log_level)
+
+
+def _read_total_chapters(series_dir: Path):
+    """progress_tracker.json の総チャプター数（マークダウン出力に影響するためキーに含める）"""
+    try:
+        with open(series_dir / "progress_tracker.json", 'r', encoding='utf-8') as f:
+            return json.load(f).get('series_info', {}).get('total_chapters')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def build_series(series_dir: Path, jobs: int = 0, only: Optional[List[str]] = None,
+                 options: Optional[Dict] = None, verbose: bool = False) -> bool:
+    """シリーズ全チャプターをビルド（独立したチャプターはプロセスプールで並列実行）"""
+    start_time = time.perf_counter()
+    options = {
+        "target_duration": 40,
+        "completion_threshold": 0.8,
+        "video_url": None,
+        "doc_links": "keep",
+        "node_debuts": False,
+        "css": "inline",
+        "minify": False,
+        "compress": (),
+        "use_cache": True,
+        **(options or {}),
+    }
+    options.update({
+        "total_chapters": _read_total_chapters(series_dir),
+        "template_digest": text_digest(MDtoHTMLConverter()._get_html_template()),
+        "generator_version": source_fingerprint(Path(m.__file__) for m in TOOL_MODULES),
+        # カタログでリンクを照合・置き換える場合はカタログの変更でも再生成
+        "catalog_digest": file_digest(BUNDLED_CATALOG_PATH) if options["doc_links"] != "keep" else None,
+        "stylesheet_href": None,
+    })
+    if options["css"] not in CSS_MODES:
+        raise ValueError(f"css は {' / '.join(CSS_MODES)} のいずれかを指定してください: {options['css']!r}")
+    unknown = [codec for codec in options["compress"] if codec not in COMPRESSORS]
+    if unknown:
+        raise ValueError(f"未対応の圧縮形式です: {', '.join(unknown)}（対応: {', '.join(COMPRESSORS)}）")
+    # 指定順・重複によらず同じキャッシュキーにする
+    options["compress"] = tuple(sorted(set(options["compress"])))
+
+    tasks = discover_chapters(series_dir, only)
+    if not tasks:
+        logger.warning(f"[WARNING] ビルド対象のチャプターがありません: {series_dir}")
+        return True
+
+    (series_dir / GUIDE_CHAPTERS_DIR).mkdir(parents=True, exist_ok=True)
+
+    if options["css"] == "external":
+        # 全チャプターで1つのCSSを共有（ファイル名にハッシュを含むためCSSの変更でURLも変わり、再生成される）
+        css_path = write_stylesheet(series_dir / GUIDE_ASSETS_DIR)
+        options["stylesheet_href"] = stylesheet_href(css_path, series_dir / GUIDE_CHAPTERS_DIR)
+        if options["compress"]:
+            write_compressed(css_path, options["compress"])
+
+    if options["node_debuts"]:
+        # 初出区分は全チャプターに依存するため、--chapters 指定時もシリーズ全体のインデックスを更新
+        index = NodeIndex.for_series(series_dir)
+        updated = update_series(index, series_dir)
+        index.save()
+        if updated:
+            logger.info(f"[INFO] ノード初出インデックスを更新: {', '.join(updated)}（ノード数: {len(index.nodes)}）")
+        for task in tasks:
+            task.node_debuts = index.debut_classes(chapter_key(task.number))
+
+    # 入力が変わっていないチャプターはワーカーを起動せずにスキップ
+    cache = BuildCache(series_dir).load()
+    pending = [task for task in tasks if not is_chapter_fresh(task, options, cache.entry(task.name))]
+    if len(pending) < len(tasks):
+        logger.info(f"[INFO] {len(tasks) - len(pending)}チャプターは変更なし（キャッシュ済み）")
+
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(pending)))
+    if pending:
+        logger.info(f"[INFO] {len(pending)}チャプターをビルド（並列数: {jobs}）")
+
+    results = []
+    try:
+        if jobs == 1:
+            for task in pending:
+                results.append(build_chapter(task, options, cache.entry(task.name)))
+                _report_result(results[-1], verbose)
+                cache.update(task.name, results[-1]["cache_entry"])
+        else:
+            # ワーカーは呼び出し元と同じレベルでログを出す（ライブラリとして使う場合は既定で WARNING 以上）
+            log_level = logging.getLevelName(logger.getEffectiveLevel())
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(log_level,)) as executor:
+                futures = [executor.submit(build_chapter, task, options, cache.entry(task.name))
+                           for task in pending]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    _report_result(results[-1], verbose)
+                    cache.update(results[-1]["chapter"], results[-1]["cache_entry"])
+    finally:
+        cache.save()
+
+    failed = [r for r in results if not r["success"]]
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"[SUCCESS] ビルド完了: {len(tasks) - len(failed)}/{len(tasks)}チャプター（{elapsed:.2f}秒）")
+    for r in sorted(failed, key=lambda r: r["chapter"]):
+        logger.error(f"[FAILED] {r['chapter']}")
+    return not failed
+
+
+def _report_result(result: Dict, verbose: bool) -> None:
+    """チャプター単位の結果を表示"""
+    stages = ", ".join(f"{stage}={status}" for stage, status in result["stages"].items()) or "スキップ（入力なし）"
+    if result["success"]:
+        logger.info(f"[OK] {result['chapter']}: {stages} ({result['elapsed']:.2f}秒)")
+    else:
+        logger.error(f"[NG] {result['chapter']}: {stages} ({result['elapsed']:.2f}秒)")
+    if verbose or not result["success"]:
+        for line in result["log"].splitlines():
+            logger.log(logging.INFO if result["success"] else logging.ERROR, f"    {line}")
+
+
+def chapters_for_changes(series_dir: Path, changed: Iterable[Path],
+                         node_debuts: bool = False) -> Optional[Set[str]]:
+    """変更されたファイルが属するチャプター番号を返す
+
+    Returns:
+        チャプター番号の集合（ビルドの入力でないファイルのみの場合は空集合）。
+        progress_tracker.json の変更など、シリーズ全体に影響する場合はNone
+    """
+    numbers: Set[str] = set()
+    for path in changed:
+        try:
+            parts = Path(path).relative_to(series_dir).parts
+        except ValueError:
+            continue
+        if not parts or parts == (PROGRESS_FILE_NAME,):
+            return None
+        if parts[0] == RAW_DATA_DIR and len(parts) >= 2 and parts[1].startswith("chapter_"):
+            # チャプターフォルダ自体の追加・削除、または入力字幕の変更
+            if len(parts) == 2 or any(fnmatch.fnmatch(parts[-1], p) for p in WATCHED_SRT_PATTERNS):
+                numbers.add(parts[1].split("_")[1])
+        elif parts[0] == ANALYSIS_DATA_DIR and len(parts) == 2:
+            match = NODE_FILE_RE.match(parts[1])
+            if match:
+                if node_debuts:
+                    # 初出区分は他のチャプターのノード挿入データにも依存する
+                    return None
+                numbers.add(match.group(1))
+    return numbers
+
+
+def watch_series(series_dir: Path, jobs: int = 0, only: Optional[List[str]] = None,
+                 options: Optional[Dict] = None, verbose: bool = False,
+                 debounce: float = 0.2, polling: bool = False, poll_interval: float = 0.5) -> None:
+    """シリーズフォルダを監視し、変更のあったチャプターだけを再ビルド（Ctrl+C で終了）
+
+    連続した書き込みは debounce 秒間変更が途切れるまでまとめてから再ビルドする。
+    出力先（03_learning_guide）は監視しないため、ビルド自体の書き込みでは再ビルドしない。
+    """
+    options = dict(options or {})
+    # 監視開始後の再ビルドは常にキャッシュを使う（--force は最初のビルドのみ）
+    options["use_cache"] = True
+    with create_watcher(series_dir, exclude=(GUIDE_CHAPTERS_DIR.parts[0],),
+                        polling=polling, interval=poll_interval) as watcher:
+        logger.info(f"[INFO] 変更を監視中（{watcher.name}）: {series_dir}（Ctrl+C で終了）")
+        tracker = series_dir / PROGRESS_FILE_NAME
+        # --node-debuts ではビルド自体が progress_tracker.json を更新するため、その書き込みは無視する
+        tracker_digest = file_digest(tracker)
+        try:
+            while True:
+                changed = watcher.collect(debounce)
+                if tracker in changed and file_digest(tracker) == tracker_digest:
+                    changed.discard(tracker)
+                numbers = chapters_for_changes(series_dir, changed, options.get("node_debuts", False))
+                if only:
+                    numbers = set(only) if numbers is None else numbers & set(only)
+                if numbers is not None and not numbers:
+                    continue
+                target = "全チャプター" if numbers is None else ", ".join(sorted(numbers))
+                logger.info(f"[INFO] 変更を検出: {len(changed)}ファイル → {target}")
+                try:
+                    build_series(series_dir, jobs=jobs, only=sorted(numbers) if numbers else None,
+                                 options=options, verbose=verbose)
+                except (OSError, ValueError) as e:
+                    # 編集途中のファイルなどで失敗しても監視は続ける
+                    logger.error(f"[ERROR] {e}")
+                tracker_digest = file_digest(tracker)
+        except KeyboardInterrupt:
+            logger.info("[INFO] 監視を終了しました")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        prog="build-series",
+        description="シリーズ一括ビルドツール（en.srt → en_fixed.srt / jp.srt + ノードデータ → .md → .html）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python build_series.py tutorials/Project_Skylark_Bridges
+  python build_series.py tutorials/Project_Skylark_Bridges --jobs 4
+  python build_series.py tutorials/Project_Skylark_Bridges --chapters 01 03
+  python build_series.py tutorials/Project_Skylark_Bridges --force
+  python build_series.py tutorials/Project_Skylark_Bridges --css external
+  python build_series.py tutorials/Project_Skylark_Bridges --minify --compress gzip xz
+  python build_series.py tutorials/Project_Skylark_Bridges --watch
+        """
+    )
+
+    parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='並列プロセス数（デフォルト: CPU数）')
+    parser.add_argument('--chapters', nargs='+', metavar='NN',
+                        help='ビルドするチャプター番号（例: 01 02）')
+    parser.add_argument('--target-duration', type=int, default=40,
+                        help='目標セグメント時間（秒）（デフォルト: 40）')
+    parser.add_argument('--completion-threshold', type=float, default=0.8,
+                        help='文完結時の早期終了閾値（0.0-1.0）（デフォルト: 0.8）')
+    parser.add_argument('--video-url', help='動画URL（オプション）')
+    parser.add_argument('--node-debuts', action='store_true',
+                        help='progress_tracker.json のノード初出インデックスを更新し、初登場のノードにマークを付ける')
+    parser.add_argument('--doc-links', choices=DOC_LINK_MODES, default='keep',
+                        help='ノードのドキュメントURLの扱い（keep / validate / resolve）（デフォルト: keep）')
+    parser.add_argument('--css', choices=CSS_MODES, default='inline',
+                        help='HTMLのCSS（inline: 各HTMLに埋め込み / external: 03_learning_guide/assets/guide.<hash>.css を共有）（デフォルト: inline）')
+    parser.add_argument('--minify', action='store_true',
+                        help='HTMLのインデント・空行を取り除いて出力（表示は変わらない）')
+    parser.add_argument('--compress', nargs='+', choices=list(COMPRESSORS), default=[], metavar='CODEC',
+                        help=f'HTMLの隣に事前圧縮ファイルを書き出す（{" / ".join(COMPRESSORS)}。例: gzip → .html.gz）')
+    parser.add_argument('--force', action='store_true',
+                        help='キャッシュを無視して全ステージを再実行')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='各ツールの詳細な出力を表示')
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help='ビルド後もシリーズフォルダを監視し、変更のあったチャプターだけを再ビルド')
+    parser.add_argument('--debounce', type=float, default=0.2,
+                        help='--watch: 連続した変更をまとめる待ち時間（秒）（デフォルト: 0.2）')
+    parser.add_argument('--polling', action='store_true',
+                        help='--watch: inotify を使わず更新時刻のポーリングで監視')
+    parser.add_argument('--poll-interval', type=float, default=0.5,
+                        help='--watch: ポーリング間隔（秒）（デフォルト: 0.5）')
+    workflow_logging.add_arguments(parser)
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    if not 0.0 <= args.completion_threshold <= 1.0:
+        logger.error("[ERROR] エラー: completion-threshold は 0.0-1.0 の範囲で指定してください")
+        sys.exit(1)
+
+    if args.target_duration <= 0:
+        logger.error("[ERROR] エラー: target-duration は正の数で指定してください")
+        sys.exit(1)
+
+    if args.debounce < 0 or args.poll_interval <= 0:
+        logger.error("[ERROR] エラー: debounce は0以上、poll-interval は正の数で指定してください")
+        sys.exit(1)
+
+    series_dir = Path(args.series_dir)
+    options = {
+        "target_duration": args.target_duration,
+        "completion_threshold": args.completion_threshold,
+        "video_url": args.video_url,
+        "doc_links": args.doc_links,
+        "node_debuts": args.node_debuts,
+        "css": args.css,
+        "minify": args.minify,
+        "compress": args.compress,
+        "use_cache": not args.force,
+    }
+
+    try:
+        success = build_series(series_dir, jobs=args.jobs, only=args.chapters,
+                               options=options, verbose=args.verbose)
+    except (OSError, ValueError) as e:
+        logger.error(f"[ERROR] {e}")
+        sys.exit(1)
+
+    if args.watch:
+        watch_series(series_dir, jobs=args.jobs, only=args.chapters, options=options, verbose=args.verbose,
+                     debounce=args.debounce, polling=args.polling, poll_interval=args.poll_interval)
+        sys.exit(0)
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
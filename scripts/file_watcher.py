@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""フォルダ監視（Linux では inotify、それ以外はファイルの更新時刻のポーリング）"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+# inotify のイベント種別（<sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# 書き込み途中の IN_MODIFY は拾わず、書き込み完了・移動・削除のみ通知させる
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """監視の共通インターフェース
+
+    root 配下（exclude に含まれる名前のフォルダと隠しフォルダを除く）の変更を
+    wait() で待ち受け、変更のあったパスの集合を返す。
+    """
+
+    name = ""
+
+    def __init__(self, root: Path, exclude: Iterable[str] = ()):
+        self.root = Path(root)
+        self.exclude = set(exclude)
+
+    def _is_excluded(self, directory_name: str) -> bool:
+        """監視対象外のフォルダか"""
+        return directory_name in self.exclude or directory_name.startswith(".")
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """変更を待ち受ける（timeout 秒以内に変更がなければ空集合。None なら変更があるまで待つ）"""
+        raise NotImplementedError
+
+    def collect(self, debounce: float) -> Set[Path]:
+        """変更を待ち、その後 debounce 秒間変更が途切れるまでまとめて集める
+
+        エディタの保存（一時ファイル作成 → リネーム）や連続した書き込みを1回の変更として扱う。
+        """
+        changed = self.wait()
+        while True:
+            more = self.wait(debounce)
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self) -> None:
+        """監視を終了"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InotifyWatcher(FileWatcher):
+    """inotify によるフォルダ監視（libc を ctypes で呼び出す）"""
+
+    name = "inotify"
+
+    def __init__(self, root: Path, exclude: Iterable[str] = ()):
+        super().__init__(root, exclude)
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc が見つかりません")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify に対応していません")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self._watches: Dict[int, Path] = {}
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path) -> None:
+        """フォルダ1つを監視対象に追加"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOENT:
+                # 追加前に削除されたフォルダ
+                return
+            raise OSError(err, f"inotify_add_watch: {os.strerror(err)}", str(directory))
+        self._watches[wd] = directory
+
+    def _add_tree(self, directory: Path) -> None:
+        """フォルダとそのサブフォルダを監視対象に追加（inotify は再帰監視できないため）"""
+        self._add_watch(directory)
+        for current, dirs, _ in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if not self._is_excluded(d))
+            for name in dirs:
+                self._add_watch(Path(current) / name)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed |= self._parse_events(buffer)
+        return changed
+
+    def _parse_events(self, buffer: bytes) -> Set[Path]:
+        """inotify_event の並びを変更パスに変換（新しいフォルダは監視対象に加える）"""
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # イベントが溢れた場合は何が変わったか分からないため全体の変更として扱う
+                changed.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = directory / name if name else directory
+            if mask & IN_ISDIR:
+                if self._is_excluded(name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # 作成直後にファイルが置かれた場合に備え、フォルダごと変更として扱う
+                    self._add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """更新時刻・サイズの定期比較によるフォルダ監視（inotify が使えない環境用）"""
+
+    name = "polling"
+
+    def __init__(self, root: Path, exclude: Iterable[str] = (), interval: float = 0.5):
+        super().__init__(root, exclude)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        """監視対象のファイル（パス → (更新時刻, サイズ)）"""
+        snapshot = {}
+        for current, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not self._is_excluded(d)]
+            for name in files:
+                path = Path(current) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+
+def create_watcher(root: Path, exclude: Iterable[str] = (), polling: bool = False,
+                   interval: float = 0.5) -> FileWatcher:
+    """inotify が使えればそれを、使えなければポーリングの監視を返す"""
+    if not polling:
+        try:
+            return InotifyWatcher(root, exclude)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, exclude, interval)
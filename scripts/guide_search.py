@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""学習ガイド横断検索（全シリーズの字幕・ノード挿入データをSQLite FTS5に登録して検索）"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import workflow_logging
+from build_cache import file_digest, stage_key
+from build_series import RAW_DATA_DIR, ChapterTask, discover_chapters
+from markdown_generator import MarkdownGenerator
+from srt_reader import seconds_to_clock
+
+
+logger = workflow_logging.get_logger("guide_search")
+
+SEARCH_DB_FILE_NAME = "guide_search.sqlite3"
+SEARCH_DB_VERSION = 1
+
+# 検索対象の種類
+KIND_EN = "en"      # 英語字幕（en_fixed.srt、なければ en.srt）
+KIND_JP = "jp"      # 日本語字幕
+KIND_NODE = "node"  # ノード挿入データのノード名
+KINDS = (KIND_EN, KIND_JP, KIND_NODE)
+
+# trigramトークナイザは3文字未満の語をMATCHで検索できないため、その語は部分一致で絞り込む
+TRIGRAM_MIN_LENGTH = 3
+
+
+class GuideSearchIndex:
+    """tutorials 直下の横断検索データベース
+
+    entries（本文・位置）を正とし、FTS5の entry_fts は外部コンテンツとして本文のみを索引化する。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self.tokenizer = "trigram"
+
+    def __enter__(self) -> "GuideSearchIndex":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(commit=exc_type is None)
+
+    def open(self) -> "GuideSearchIndex":
+        """データベースを開く（存在しない場合は作成）"""
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chapters (
+                id INTEGER PRIMARY KEY,
+                series TEXT NOT NULL,
+                chapter TEXT NOT NULL,
+                number TEXT NOT NULL,
+                source_key TEXT NOT NULL,
+                UNIQUE (series, chapter)
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                chapter_id INTEGER NOT NULL REFERENCES chapters (id),
+                kind TEXT NOT NULL,
+                start REAL NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_chapter ON entries (chapter_id);
+        """)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if meta.get("version", str(SEARCH_DB_VERSION)) != str(SEARCH_DB_VERSION):
+            self._conn.close()
+            self._conn = None
+            raise ValueError(f"未対応の検索データベース形式です（version {meta['version']}）。削除して再作成してください: {self.path}")
+        if "tokenizer" in meta:
+            self.tokenizer = meta["tokenizer"]
+        else:
+            self._create_fts()
+        return self
+
+    def _create_fts(self) -> None:
+        """全文検索テーブルを作成（trigramトークナイザ非対応のSQLiteでは unicode61）"""
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE entry_fts USING fts5("
+                               "text, content='entries', content_rowid='id', tokenize='trigram')")
+            self.tokenizer = "trigram"
+        except sqlite3.OperationalError:
+            # SQLite 3.34 未満。日本語は語の区切りがないため部分一致検索を併用する
+            self._conn.execute("CREATE VIRTUAL TABLE entry_fts USING fts5("
+                               "text, content='entries', content_rowid='id', tokenize='unicode61')")
+            self.tokenizer = "unicode61"
+            logger.warning("[WARNING] SQLiteがtrigramトークナイザに対応していないため日本語の検索が遅くなります")
+        self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                               (("version", str(SEARCH_DB_VERSION)), ("tokenizer", self.tokenizer)))
+
+    def close(self, commit: bool = True) -> None:
+        """変更を確定してデータベースを閉じる"""
+        if self._conn is None:
+            return
+        if commit:
+            self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def chapter_keys(self) -> Dict[Tuple[str, str], Tuple[int, str]]:
+        """登録済みチャプター（(シリーズ, チャプター) → (ID, 入力のキー)）"""
+        return {(series, chapter): (chapter_id, key) for chapter_id, series, chapter, key
+                in self._conn.execute("SELECT id, series, chapter, source_key FROM chapters")}
+
+    def remove_chapter(self, chapter_id: int) -> None:
+        """チャプターの登録内容を削除（外部コンテンツのFTS5は削除する本文を指定して索引から除く）"""
+        self._conn.execute("INSERT INTO entry_fts (entry_fts, rowid, text) "
+                           "SELECT 'delete', id, text FROM entries WHERE chapter_id = ?", (chapter_id,))
+        self._conn.execute("DELETE FROM entries WHERE chapter_id = ?", (chapter_id,))
+        self._conn.execute("DELETE FROM chapters WHERE id = ?", (chapter_id,))
+
+    def add_chapter(self, series: str, chapter: str, number: str, source_key: str,
+                    entries: List[Tuple[str, float, str]]) -> int:
+        """チャプターの検索対象 (種類, 開始秒, 本文) を登録"""
+        chapter_id = self._conn.execute(
+            "INSERT INTO chapters (series, chapter, number, source_key) VALUES (?, ?, ?, ?)",
+            (series, chapter, number, source_key)).lastrowid
+        self._conn.executemany("INSERT INTO entries (chapter_id, kind, start, text) VALUES (?, ?, ?, ?)",
+                               ((chapter_id, kind, start, text) for kind, start, text in entries))
+        self._conn.execute("INSERT INTO entry_fts (rowid, text) SELECT id, text FROM entries WHERE chapter_id = ?",
+                           (chapter_id,))
+        return chapter_id
+
+    def entry_count(self) -> int:
+        """登録済みの検索対象数"""
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def search(self, query: str, series: Optional[str] = None, kinds: Optional[List[str]] = None,
+               limit: int = 50, raw: bool = False) -> List[Dict]:
+        """検索して、シリーズ・チャプター・時刻順の一致を返す
+
+        Args:
+            query: 空白区切りの語（すべてを含むものに一致）。raw=True の場合はFTS5のクエリ構文
+            series: シリーズ名の部分一致で絞り込み
+            kinds: 種類（en / jp / node）で絞り込み
+            limit: 最大件数
+        """
+        conditions, params = [], []
+        if raw:
+            conditions.append("e.id IN (SELECT rowid FROM entry_fts WHERE entry_fts MATCH ?)")
+            params.append(query)
+        else:
+            phrases = []
+            for term in query.split():
+                if self.tokenizer == "trigram" and len(term) >= TRIGRAM_MIN_LENGTH:
+                    phrases.append('"' + term.replace('"', '""') + '"')
+                else:
+                    conditions.append("e.text LIKE ? ESCAPE '\\'")
+                    params.append('%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+            if phrases:
+                conditions.insert(0, "e.id IN (SELECT rowid FROM entry_fts WHERE entry_fts MATCH ?)")
+                params.insert(0, " ".join(phrases))
+        if not conditions:
+            return []
+        if series:
+            conditions.append("c.series LIKE ?")
+            params.append(f"%{series}%")
+        if kinds:
+            conditions.append(f"e.kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+
+        rows = self._conn.execute(
+            "SELECT c.series, c.number, c.chapter, e.kind, e.start, e.text "
+            "FROM entries e JOIN chapters c ON c.id = e.chapter_id "
+            f"WHERE {' AND '.join(conditions)} "
+            "ORDER BY c.series, c.number, e.start, e.kind LIMIT ?", (*params, limit))
+        return [{"series": row[0], "number": row[1], "chapter": row[2], "kind": row[3],
+                 "start": row[4], "text": row[5]} for row in rows]
+
+
+def chapter_sources(task: ChapterTask) -> Dict[str, Optional[Path]]:
+    """チャプターの検索対象ファイル（種類 → パス）"""
+    en_srt = task.en_fixed_srt if task.en_fixed_srt and task.en_fixed_srt.exists() else task.en_srt
+    return {KIND_EN: en_srt, KIND_JP: task.jp_srt, KIND_NODE: task.node_data}
+
+
+def read_chapter_entries(sources: Dict[str, Optional[Path]]) -> List[Tuple[str, float, str]]:
+    """字幕・ノード挿入データを MarkdownGenerator のパーサーで読み込み、(種類, 開始秒, 本文) を返す
+
+    Raises:
+        ValueError: 読み込みに失敗した場合（詳細はパーサーがログに出力）
+    """
+    entries = []
+    for kind in (KIND_EN, KIND_JP):
+        if sources[kind]:
+            generator = MarkdownGenerator()
+            if not generator.parse_srt_file(sources[kind]):
+                raise ValueError(f"字幕を読み込めません: {sources[kind]}")
+            entries.extend((kind, cue.start, cue.text) for cue in generator.subtitle_segments)
+    if sources[KIND_NODE]:
+        generator = MarkdownGenerator()
+        if not generator.parse_node_data(sources[KIND_NODE]):
+            raise ValueError(f"ノード挿入データを読み込めません: {sources[KIND_NODE]}")
+        entries.extend((KIND_NODE, node.get('insert_seconds', 0), str(node.get('node_name', '')))
+                       for node in generator.node_insertions)
+    return entries
+
+
+def iter_series_dirs(tutorials_dir: Path) -> Iterator[Path]:
+    """tutorials 直下のシリーズフォルダ（01_raw_data があるもの）"""
+    for series_dir in sorted(Path(tutorials_dir).iterdir()):
+        if (series_dir / RAW_DATA_DIR).is_dir():
+            yield series_dir
+
+
+def update_index(index: GuideSearchIndex, tutorials_dir: Path) -> Tuple[int, int, int]:
+    """入力が変わったチャプターのみ登録し直す
+
+    Returns:
+        (更新したチャプター数, 削除したチャプター数, 変更のないチャプター数)
+    """
+    registered = index.chapter_keys()
+    seen = set()
+    updated = unchanged = 0
+    for series_dir in iter_series_dirs(tutorials_dir):
+        for task in discover_chapters(series_dir):
+            name = (series_dir.name, task.name)
+            seen.add(name)
+            sources = chapter_sources(task)
+            key = stage_key(SEARCH_DB_VERSION, *(str(path) if path else None for path in sources.values()),
+                            *(file_digest(path) for path in sources.values()))
+            current = registered.get(name)
+            if current is not None and current[1] == key:
+                unchanged += 1
+                continue
+            try:
+                entries = read_chapter_entries(sources)
+            except ValueError as e:
+                logger.warning(f"[WARNING] {series_dir.name}/{task.name}: {e}")
+                continue
+            if current is not None:
+                index.remove_chapter(current[0])
+            index.add_chapter(series_dir.name, task.name, task.number, key, entries)
+            updated += 1
+            logger.debug(f"[DEBUG] {series_dir.name}/{task.name}: {len(entries)}件を登録")
+
+    removed = 0
+    for name, (chapter_id, _) in registered.items():
+        if name not in seen:
+            index.remove_chapter(chapter_id)
+            removed += 1
+    return updated, removed, unchanged
+
+
+def format_hit(hit: Dict) -> str:
+    """検索結果1件の表示"""
+    series = hit["series"].replace("_", " ")
+    text = " ".join(hit["text"].split())
+    return f"{series}  Chapter {hit['number']}  {seconds_to_clock(hit['start'])}  [{hit['kind']}] {text}"
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="学習ガイド横断検索ツール（全シリーズの字幕・ノード名からチャプターと時刻を検索）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python guide_search.py update tutorials
+  python guide_search.py search tutorials Ray
+  python guide_search.py search tutorials Ray --kind node --series Skylark
+  python guide_search.py search tutorials アトリビュート 転送 --update
+  python guide_search.py search tutorials 'ray NOT node' --raw
+        """
+    )
+    workflow_logging.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help='変更のあったチャプターを検索データベースに登録')
+    search_parser = subparsers.add_parser('search', help='字幕・ノード名を検索')
+    for subparser in (update_parser, search_parser):
+        subparser.add_argument('tutorials_dir', help='tutorials フォルダ（直下の全シリーズが対象）')
+        subparser.add_argument('--db', help=f'検索データベース（デフォルト: <tutorials_dir>/{SEARCH_DB_FILE_NAME}）')
+    search_parser.add_argument('query', nargs='+', help='検索語（複数指定時はすべてを含むもの）')
+    search_parser.add_argument('--kind', choices=KINDS, action='append',
+                               help='種類で絞り込み（en: 英語字幕, jp: 日本語字幕, node: ノード名）。複数指定可')
+    search_parser.add_argument('--series', help='シリーズ名（部分一致）で絞り込み')
+    search_parser.add_argument('--limit', type=int, default=50, help='最大表示件数（デフォルト: 50）')
+    search_parser.add_argument('--raw', action='store_true', help='検索語をFTS5のクエリ構文として渡す')
+    search_parser.add_argument('--update', action='store_true', help='検索前に変更のあったチャプターを登録')
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    tutorials_dir = Path(args.tutorials_dir)
+    if not tutorials_dir.is_dir():
+        logger.error(f"[ERROR] tutorials フォルダが見つかりません: {tutorials_dir}")
+        sys.exit(1)
+    db_path = Path(args.db) if args.db else tutorials_dir / SEARCH_DB_FILE_NAME
+
+    try:
+        with GuideSearchIndex(db_path) as index:
+            if args.command == 'update' or args.update:
+                start_time = time.perf_counter()
+                updated, removed, unchanged = update_index(index, tutorials_dir)
+                elapsed = time.perf_counter() - start_time
+                logger.info(f"[SUCCESS] 検索データベースを更新: {updated}チャプター登録・{removed}チャプター削除・"
+                            f"{unchanged}チャプター変更なし（{index.entry_count()}件, {elapsed:.2f}秒）")
+                if args.command == 'update':
+                    return
+
+            start_time = time.perf_counter()
+            hits = index.search(" ".join(args.query), args.series, args.kind, args.limit, args.raw)
+            elapsed = time.perf_counter() - start_time
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+    for hit in hits:
+        print(format_hit(hit))
+    more = "以上" if len(hits) == args.limit else ""
+    logger.info(f"[INFO] {len(hits)}件{more}（{elapsed * 1000:.1f}ミリ秒）")
+
+
+if __name__ == "__main__":
+    main()
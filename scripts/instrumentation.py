@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""処理ステージの所要時間・カウンタの計測（3つの変換ツールで共用）"""
+
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+import workflow_logging
+
+
+logger = workflow_logging.get_logger("instrumentation")
+
+
+class Metrics:
+    """ステージ別の所要時間と件数カウンタを集計するクラス
+
+    計測はステージ単位・処理全体の件数単位で行い、キュー1件ごとの記録はしない。
+    """
+
+    def __init__(self):
+        self.timers: Dict[str, float] = {}    # ステージ名 → 累計秒
+        self.calls: Dict[str, int] = {}       # ステージ名 → 実行回数
+        self.counters: Dict[str, int] = {}    # カウンタ名 → 件数
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """with ブロックの所要時間をステージに加算"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        """ステージの所要時間を加算"""
+        self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        """カウンタを加算"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_file_bytes(self, path) -> None:
+        """書き出したファイルのサイズを bytes_written に加算"""
+        try:
+            self.count("bytes_written", Path(path).stat().st_size)
+        except OSError:
+            pass
+
+    def to_dict(self) -> Dict:
+        """JSON出力用の辞書を返す"""
+        return {
+            "timers": {
+                stage: {"seconds": seconds, "calls": self.calls[stage]}
+                for stage, seconds in self.timers.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def format_report(self) -> str:
+        """ステージ別内訳とカウンタの表示用テキストを返す（ステージは入れ子になりうるため合計はしない）"""
+        lines = ["=== プロファイル ==="]
+        width = max((len(stage) for stage in self.timers), default=0)
+        for stage, seconds in self.timers.items():
+            lines.append(f"  {stage:<{width}}  {seconds:9.4f}秒  x{self.calls[stage]}")
+        if self.counters:
+            lines.append("--- カウンタ ---")
+            width = max(len(name) for name in self.counters)
+            for name, value in self.counters.items():
+                lines.append(f"  {name:<{width}}  {value}")
+        return "\n".join(lines)
+
+    def write_json(self, path) -> None:
+        """計測結果をJSONファイルに書き出し"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+
+def add_arguments(parser) -> None:
+    """--profile / --metrics-json オプションを argparse に追加"""
+    parser.add_argument('--profile', action='store_true',
+                        help='処理ステージ別の所要時間とカウンタを表示')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='計測結果をJSONファイルに出力')
+
+
+def emit(metrics: Metrics, args) -> None:
+    """コマンドライン指定に従って計測結果を表示・出力（--profile の内訳は明示的な要求のため常に表示）"""
+    if args.profile:
+        print()
+        print(metrics.format_report())
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        logger.info(f"[INFO] 計測結果を出力: {args.metrics_json}")
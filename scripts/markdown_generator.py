@@ -3,14 +3,46 @@
 """マークダウン学習ガイド生成ツール"""
 
 import argparse
+import bisect
+import io
 import json
-import re
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 
+import instrumentation
+import workflow_logging
+from build_cache import file_digest
+from instrumentation import Metrics
+from md_to_html_converter import MDtoHTMLConverter, stylesheet_href, write_stylesheet
+from node_catalog import load_catalog
+from node_index import CHAPTER_DEBUT, SERIES_DEBUT, NodeIndex, chapter_key, node_id
+from srt_reader import iter_cues, parse_cues, seconds_to_clock
+
+
+logger = workflow_logging.get_logger("markdown_generator")
+
+
+class NodeDataError(ValueError):
+    """ノード挿入データの形式エラー"""
+
+
+# generate_markdown() の meta で指定できる項目
+METADATA_FIELDS = ('series_name', 'chapter_number', 'chapter_title', 'total_chapters', 'video_url')
+
+# ノード挿入データの doc_link_ja の扱い
+#   keep: JSONのまま使う / validate: カタログと照合して警告 / resolve: カタログのURLに置き換え
+DOC_LINK_MODES = ('keep', 'validate', 'resolve')
+
+# ノード初出マーク（md_to_html_converter の .node-debut スタイル）
+DEBUT_LABELS = {SERIES_DEBUT: "シリーズ初登場", CHAPTER_DEBUT: "チャプター初登場"}
+
+
 class MarkdownGenerator:
-    def __init__(self):
+    def __init__(self, metrics=None, doc_links='keep', catalog=None):
+        if doc_links not in DOC_LINK_MODES:
+            raise ValueError(f"doc_links は {' / '.join(DOC_LINK_MODES)} のいずれかを指定してください: {doc_links!r}")
         self.subtitle_segments = []
         self.node_insertions = []
         self.series_name = ""
@@ -18,6 +50,14 @@ class MarkdownGenerator:
         self.chapter_title = ""
         self.total_chapters = None  # 動的に設定される
         self.video_url = ""  # 動画URL（外部から設定可能）
+        self._segment_index = None  # ノード割り当て用の時刻インデックス（遅延構築）
+        self._node_assignment = None  # ノード割り当て結果（マークダウン・HTML生成で共用）
+        self.metrics = metrics or Metrics()  # ステージ別の計測先
+        self.doc_links = doc_links  # doc_link_ja の扱い（DOC_LINK_MODES）
+        self.catalog = catalog  # ノードカタログ（未指定時は必要になった時点で同梱カタログを読み込む）
+        self.node_debuts = None  # ノード識別子 → 初出区分（node_index.NodeIndex.debut_classes()）。Noneなら初出マークなし
+        self.stylesheet_href = None  # HTMLから参照する外部スタイルシートのURL。NoneならCSSを埋め込む
+        self.minify_html = False  # HTMLのインデント・空行を取り除いて出力するか
         
     def extract_series_info(self, subtitle_file_path):
         """ファイルパスからシリーズ情報を抽出"""
@@ -82,79 +122,112 @@ class MarkdownGenerator:
             return "Unknown"
         
         last_segment = self.subtitle_segments[-1]
-        end_time = last_segment['end_time']
-        # HH:MM:SS,mmm → HH:MM:SS 形式に変換
-        return end_time.split(',')[0]
+        # 終了時刻を HH:MM:SS 形式に変換
+        return seconds_to_clock(last_segment.end)
         
     def parse_srt_file(self, srt_file_path):
         """SRTファイルをパースしてセグメントリストを生成"""
         try:
-            with open(srt_file_path, 'r', encoding='utf-8') as file:
-                content = file.read().strip()
-            
-            # SRTセグメントを分割（空行で区切られている）
-            segments = re.split(r'\n\s*\n', content)
-            
-            for segment_text in segments:
-                if not segment_text.strip():
-                    continue
-                
-                lines = segment_text.strip().split('\n')
-                if len(lines) < 3:
-                    continue
-                
-                # セグメント ID
-                segment_id = lines[0].strip()
-                
-                # タイムスタンプ行
-                timestamp_line = lines[1].strip()
-                timestamp_match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})', timestamp_line)
-                
-                if not timestamp_match:
-                    continue
-                
-                start_time = timestamp_match.group(1)
-                end_time = timestamp_match.group(2)
-                
-                # 字幕テキスト（3行目以降）
-                subtitle_text = '\n'.join(lines[2:]).strip()
-                
-                segment = {
-                    'id': segment_id,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'text': subtitle_text,
-                    'start_seconds': self.timestamp_to_seconds(start_time),
-                    'end_seconds': self.timestamp_to_seconds(end_time)
-                }
-                
-                self.subtitle_segments.append(segment)
+            parsed_before = len(self.subtitle_segments)
+            with self.metrics.timer("parse_srt"):
+                with open(srt_file_path, 'r', encoding='utf-8') as file:
+                    # 空行区切りのセグメントを1件ずつ読み込む（3行目以降が字幕テキスト）
+                    self.subtitle_segments.extend(iter_cues(file))
+            self.metrics.count("cues_parsed", len(self.subtitle_segments) - parsed_before)
                 
             return True
             
         except Exception as e:
+            logger.error(f"[ERROR] 字幕ファイルの読み込みに失敗しました: {e}")
             return False
     
     def parse_node_data(self, node_file_path):
         """ノードデータJSONファイルをパース"""
         try:
-            with open(node_file_path, 'r', encoding='utf-8') as file:
-                self.node_insertions = json.load(file)
-            
-            # タイムスタンプを秒に変換して追加
-            for node in self.node_insertions:
-                if 'insert_after_timestamp' in node:
-                    # HH:MM:SS形式をHH:MM:SS,000形式に変換
-                    timestamp = node['insert_after_timestamp']
-                    if ',' not in timestamp:
-                        timestamp = timestamp + ',000'
-                    node['insert_seconds'] = self.timestamp_to_seconds(timestamp)
+            with self.metrics.timer("parse_nodes"):
+                with open(node_file_path, 'r', encoding='utf-8') as file:
+                    self.load_node_insertions(json.load(file))
+            self.metrics.count("nodes_loaded", len(self.node_insertions))
             
             return True
             
         except Exception as e:
+            logger.error(f"[ERROR] ノードデータの読み込みに失敗しました: {e}")
             return False
     
+    def load_node_insertions(self, nodes):
+        """ノード挿入データ（辞書のリスト）を検証して設定
+        
+        各ノードの insert_after_timestamp を秒に変換して insert_seconds に格納する。
+        doc_links が validate / resolve の場合は doc_link_ja をノードカタログと照合する。
+        
+        Raises:
+            NodeDataError: リストでない、要素が辞書でない、タイムスタンプが解析できない場合
+        """
+        if not isinstance(nodes, list):
+            raise NodeDataError(f"ノードデータはリストである必要があります: {type(nodes).__name__}")
+        
+        # タイムスタンプを秒に変換して追加
+        for i, node in enumerate(nodes):
+            if not isinstance(node, dict):
+                raise NodeDataError(f"ノード {i}: 辞書である必要があります: {node!r}")
+            if 'insert_after_timestamp' in node:
+                # HH:MM:SS形式をHH:MM:SS,000形式に変換
+                timestamp = node['insert_after_timestamp']
+                try:
+                    if ',' not in timestamp:
+                        timestamp = timestamp + ',000'
+                    node['insert_seconds'] = self.timestamp_to_seconds(timestamp)
+                except (TypeError, ValueError, IndexError) as e:
+                    raise NodeDataError(f"ノード {i}: タイムスタンプの解析失敗: {node['insert_after_timestamp']!r}") from e
+        
+        if self.doc_links != 'keep':
+            self.check_doc_links(nodes)
+        self.node_insertions = nodes
+    
+    def check_doc_links(self, nodes):
+        """doc_link_ja をノードカタログと照合（resolve の場合はカタログのURLに置き換え）
+        
+        カタログにないノードは既存のURLのまま残す。
+        """
+        if self.catalog is None:
+            self.catalog = load_catalog()
+        resolved = mismatched = 0
+        for i, node in enumerate(nodes):
+            name = node.get('node_name', '')
+            link = node.get('doc_link_ja')
+            entry = self.catalog.resolve(name, link) if isinstance(name, str) else None
+            if entry is None:
+                logger.warning(f"[WARNING] ノード {i}: カタログにないノードです: {name!r}")
+                continue
+            if link == entry.doc_link_ja:
+                continue
+            if self.doc_links == 'resolve':
+                node['doc_link_ja'] = entry.doc_link_ja
+                resolved += 1
+                logger.debug(f"[DEBUG] ノード {i}: {name} のリンクを置き換え: {link} → {entry.doc_link_ja}")
+            else:
+                mismatched += 1
+                logger.warning(f"[WARNING] ノード {i}: {name} のリンクがカタログと異なります: {link}（カタログ: {entry.doc_link_ja}）")
+        self.metrics.count("doc_links_resolved", resolved)
+        self.metrics.count("doc_links_mismatched", mismatched)
+    
+    def apply_metadata(self, meta):
+        """シリーズ情報（METADATA_FIELDS）を設定
+        
+        video_url 未指定時はファイルパスからの抽出時と同様にSideFXのページURLを補完する。
+        
+        Raises:
+            ValueError: 未知の項目が指定された場合
+        """
+        unknown = set(meta) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"未知のメタ情報: {', '.join(sorted(unknown))}")
+        for key, value in meta.items():
+            setattr(self, key, value)
+        if not self.video_url and self.series_name:
+            self.video_url = self.generate_sidefx_tutorial_url(self.series_name) or ""
+    
     def timestamp_to_seconds(self, timestamp):
         """タイムスタンプ (HH:MM:SS,mmm) を秒に変換"""
         # カンマをピリオドに置換
@@ -175,14 +248,104 @@ class MarkdownGenerator:
         return timestamp.split(',')[0]
     
     
+    def _build_segment_index(self):
+        """ノード割り当て用に開始時刻・終了時刻のソート済みインデックスを構築"""
+        segments = self.subtitle_segments
+        starts = [segment.start for segment in segments]
+        if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+            # 開始時刻が昇順でない場合は線形探索にフォールバック
+            return None
+
+        ends = [segment.end for segment in segments]
+        # 先頭からの終了時刻の累積最大値と、その最大値を最初に取るインデックス
+        max_ends = []
+        max_end_indices = []
+        current_max = float('-inf')
+        current_idx = -1
+        for idx, end in enumerate(ends):
+            if end > current_max:
+                current_max = end
+                current_idx = idx
+            max_ends.append(current_max)
+            max_end_indices.append(current_idx)
+
+        return {
+            'starts': starts,
+            'ends': ends,
+            'max_ends': max_ends,
+            'max_end_indices': max_end_indices,
+        }
+
+    def _get_segment_index(self):
+        """インデックスを取得（セグメントリストが変わっていれば再構築）"""
+        # リスト自体を保持して比較する（idのみだと解放後の再利用で誤判定しうる）
+        segments = self.subtitle_segments
+        cached = self._segment_index
+        if cached is None or cached[0] is not segments or cached[1] != len(segments):
+            self._segment_index = cached = (segments, len(segments), self._build_segment_index())
+        return cached[2]
+
     def find_best_segment_for_node(self, node_insert_time):
-        """ノード挿入タイミングに最も近いセグメントのインデックスを検索"""
+        """ノード挿入タイミングに最も近いセグメントのインデックスを検索
+
+        優先順位（線形探索版と同一）:
+        1. 開始時刻との差が0.1秒未満、またはセグメント範囲内のうち最初のセグメント
+        2. 範囲外の場合、境界からの距離が最短のセグメント（同距離なら先のもの）
+        """
+        if not self.subtitle_segments:
+            return None
+
+        index = self._get_segment_index()
+        if index is None:
+            return self._find_best_segment_linear(node_insert_time)
+
+        starts = index['starts']
+        max_ends = index['max_ends']
+        count = len(starts)
+        t = node_insert_time
+
+        def near_start(i):
+            return abs(t - starts[i]) < 0.1  # 0.1秒の許容誤差
+
+        # 1. 完全一致または非常に近いセグメント（開始時刻が昇順なので連続区間になる）
+        near_idx = bisect.bisect_left(starts, t - 0.1)
+        while near_idx > 0 and near_start(near_idx - 1):
+            near_idx -= 1
+        while near_idx < count and starts[near_idx] < t and not near_start(near_idx):
+            near_idx += 1
+        if near_idx >= count or not near_start(near_idx):
+            near_idx = None
+
+        # 2. セグメント範囲内（start <= t を満たす先頭部分で、最初に end > t となるもの）
+        after_idx = bisect.bisect_right(starts, t)
+        inside_idx = bisect.bisect_right(max_ends, t)
+        if inside_idx >= after_idx:
+            inside_idx = None
+
+        matches = [idx for idx in (near_idx, inside_idx) if idx is not None]
+        if matches:
+            return min(matches)
+
+        # 3. 範囲外の場合、最も近いセグメントを距離で判定
+        best_segment_idx = None
+        min_distance = float('inf')
+        if after_idx > 0:
+            # t より前に終わるセグメントのうち終了時刻が最大のもの
+            best_segment_idx = index['max_end_indices'][after_idx - 1]
+            min_distance = t - index['ends'][best_segment_idx]
+        if after_idx < count and starts[after_idx] - t < min_distance:
+            best_segment_idx = after_idx
+
+        return best_segment_idx
+
+    def _find_best_segment_linear(self, node_insert_time):
+        """線形探索によるセグメント検索（開始時刻が昇順でない字幕用）"""
         best_segment_idx = None
         min_distance = float('inf')
         
         for idx, segment in enumerate(self.subtitle_segments):
-            segment_start = segment['start_seconds']
-            segment_end = segment['end_seconds']
+            segment_start = segment.start
+            segment_end = segment.end
             
             # 1. 完全一致または非常に近い場合（優先度最高）
             if abs(node_insert_time - segment_start) < 0.1:  # 0.1秒の許容誤差
@@ -194,8 +357,8 @@ class MarkdownGenerator:
             
         # 3. 範囲外の場合、最も近いセグメントを距離で判定
         for idx, segment in enumerate(self.subtitle_segments):
-            segment_start = segment['start_seconds']
-            segment_end = segment['end_seconds']
+            segment_start = segment.start
+            segment_end = segment.end
             
             # 距離を計算（セグメントの境界からの最短距離）
             if node_insert_time < segment_start:
@@ -210,9 +373,70 @@ class MarkdownGenerator:
                 best_segment_idx = idx
         
         return best_segment_idx
+
+    def assign_nodes_to_segments(self):
+        """全ノードをセグメントに割り当て（セグメントインデックス → ノードリスト）"""
+        # 同じデータでマークダウンとHTMLを両方生成する場合は前回の結果を再利用
+        segments, nodes = self.subtitle_segments, self.node_insertions
+        cached = self._node_assignment
+        if (cached is not None and cached[0] is segments and cached[1] == len(segments)
+                and cached[2] is nodes and cached[3] == len(nodes)):
+            return cached[4]
+        
+        start_time = time.perf_counter()
+        nodes_by_segment = {}
+        placed = 0
+        for node in self.node_insertions:
+            node_insert_time = node.get('insert_seconds', 0)
+            best_segment_idx = self.find_best_segment_for_node(node_insert_time)
+            
+            if best_segment_idx is not None:
+                nodes_by_segment.setdefault(best_segment_idx, []).append(node)
+                placed += 1
+        
+        self.metrics.add_time("place_nodes", time.perf_counter() - start_time)
+        self.metrics.count("nodes_placed", placed)
+        self.metrics.count("nodes_unplaced", len(self.node_insertions) - placed)
+        self._node_assignment = (segments, len(segments), nodes, len(nodes), nodes_by_segment)
+        return nodes_by_segment
     
-    def generate_markdown_content(self):
-        """マークダウンコンテンツ生成"""
+    def node_debut_badges(self):
+        """各ノードのチャプター内で最初の挿入位置に付ける初出マーク（id(ノード) → マークのHTML）"""
+        if not self.node_debuts:
+            return {}
+        first = {}
+        for node in self.node_insertions:
+            nid = node_id(node)
+            if nid not in self.node_debuts:
+                continue
+            if nid not in first or node.get('insert_seconds', 0) < first[nid].get('insert_seconds', 0):
+                first[nid] = node
+        badges = {}
+        for nid, node in first.items():
+            debut = self.node_debuts[nid]
+            badges[id(node)] = f' <span class="node-debut {debut}">{DEBUT_LABELS[debut]}</span>'
+        return badges
+    
+    def load_node_debuts(self, series_dir, node_file_path=None):
+        """progress_tracker.json のノード初出インデックスにこのチャプターを反映し、初出マークを有効にする
+        
+        Returns:
+            成功した場合True（チャプター番号が不明な場合はFalse）
+        """
+        if not self.chapter_number or not self.chapter_number.isdigit():
+            logger.warning("[WARNING] チャプター番号が不明なためノード初出マークを付けません")
+            return False
+        key = chapter_key(self.chapter_number)
+        index = NodeIndex.for_series(series_dir)
+        digest = file_digest(node_file_path) if node_file_path else None
+        if not index.is_current(key, digest):
+            index.update_chapter(key, self.node_insertions, digest)
+            index.save()
+        self.node_debuts = index.debut_classes(key)
+        return True
+    
+    def _preamble_lines(self):
+        """タイトル・シリーズ情報部分のマークダウン行"""
         markdown_lines = []
         
         video_duration = self.get_video_duration()
@@ -237,38 +461,33 @@ class MarkdownGenerator:
         markdown_lines.append("")
         markdown_lines.append("---")
         markdown_lines.append("")
+        return markdown_lines
+    
+    def generate_markdown_content(self):
+        """マークダウンコンテンツ生成"""
+        markdown_lines = self._preamble_lines()
         
         # 各ノードに対して最適なセグメントを事前計算
-        nodes_by_segment = {}
-        for node in self.node_insertions:
-            node_insert_time = node.get('insert_seconds', 0)
-            best_segment_idx = self.find_best_segment_for_node(node_insert_time)
-            
-            if best_segment_idx is not None:
-                if best_segment_idx not in nodes_by_segment:
-                    nodes_by_segment[best_segment_idx] = []
-                nodes_by_segment[best_segment_idx].append(node)
+        nodes_by_segment = self.assign_nodes_to_segments()
+        debut_badges = self.node_debut_badges()
         
         # 各字幕セグメントを処理
         for idx, segment in enumerate(self.subtitle_segments):
             # セグメントタイトル（タイムスタンプ）
-            timestamp_display = self.format_timestamp_for_markdown(segment['start_time'])
+            timestamp_display = seconds_to_clock(segment.start)
             markdown_lines.append(f"## {timestamp_display}")
             markdown_lines.append("")
             
             # 字幕テキスト（引用形式）
-            subtitle_text = segment['text']
+            subtitle_text = segment.text
             markdown_lines.append(f'「{subtitle_text}」')
             markdown_lines.append("")
             
             # このセグメントに割り当てられたノードを挿入
             if idx in nodes_by_segment:
                 for node in nodes_by_segment[idx]:
-                    node_name = node.get('node_name', 'Unknown Node')
-                    doc_link = node.get('doc_link_ja', '#')
-                    
-                    # ノード情報を📝アイコン付きで挿入
-                    markdown_lines.append(f"📝 **[{node_name}]({doc_link})**")
+                    # ノード情報を📝アイコン付きで挿入（初出の場合はマークを付ける）
+                    markdown_lines.append(self.node_markdown_line(node, debut_badges))
                     markdown_lines.append("")
             
             markdown_lines.append("---")
@@ -276,25 +495,140 @@ class MarkdownGenerator:
         
         return '\n'.join(markdown_lines)
     
-    def generate_markdown_file(self, output_file_path):
-        """マークダウンファイルを生成"""
-        try:
+    def can_render_html_directly(self):
+        """マークダウンを経由せずにHTMLを生成できるか判定
+        
+        改行を含むテキストや3桁時間のタイムスタンプはマークダウン上で行・見出しの区切りが
+        変わるため、経由した場合と同一の出力を保証できない。
+        """
+        def is_single_line(value):
+            value = str(value)
+            return '\n' not in value and '\r' not in value
+        
+        if not all(is_single_line(value) for value in self._preamble_lines()):
+            return False
+        for segment in self.subtitle_segments:
+            if not 0 <= segment.start < 100 * 3600 or not is_single_line(segment.text):
+                return False
+        for node in self.node_insertions:
+            if not (is_single_line(node.get('node_name', 'Unknown Node'))
+                    and is_single_line(node.get('doc_link_ja', '#'))):
+                return False
+        return True
+    
+    @staticmethod
+    def node_markdown_line(node, debut_badges):
+        """ノード1件の📝行（マークダウン出力とHTML直接生成で共用）"""
+        node_name = node.get('node_name', 'Unknown Node')
+        doc_link = node.get('doc_link_ja', '#')
+        return f"📝 **[{node_name}]({doc_link})**{debut_badges.get(id(node), '')}"
+    
+    def iter_html_sections(self, converter):
+        """各字幕セグメントのセクションHTMLを直接生成（generate_markdown_content → convert と同一の出力）"""
+        nodes_by_segment = self.assign_nodes_to_segments()
+        debut_badges = self.node_debut_badges()
+        
+        for idx, segment in enumerate(self.subtitle_segments):
+            # マークダウン経由の変換と同じ行・同じ切り出しを通し、出力を一致させる
+            explanation_html = '\n'.join(
+                converter.render_keyword_explanation(
+                    converter.keyword_explanation_content(self.node_markdown_line(node, debut_badges)))
+                for node in nodes_by_segment.get(idx, ())
+            )
+            yield converter.render_timestamp_section(
+                seconds_to_clock(segment.start), f'「{segment.text}」', explanation_html)
+    
+    def write_html(self, out_file):
+        """学習ガイドHTMLを書き出す（可能な場合はマークダウンの再解析を省略）"""
+        converter = MDtoHTMLConverter(stylesheet_href=self.stylesheet_href, minify=self.minify_html)
+        if not self.can_render_html_directly():
             markdown_content = self.generate_markdown_content()
-            
-            # 出力ディレクトリを作成
+            converter.convert_stream(io.StringIO(markdown_content, newline=None), out_file)
+            return
+        
+        converter.read_preamble(self._preamble_lines())
+        converter.write_document(self.iter_html_sections(converter), out_file)
+    
+    def generate_html_file(self, output_file_path):
+        """学習ガイドHTMLファイルを生成"""
+        try:
             output_path = Path(output_file_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # ファイルに書き込み
-            with open(output_file_path, 'w', encoding='utf-8') as file:
-                file.write(markdown_content)
+            with self.metrics.timer("generate_html"):
+                with open(output_file_path, 'w', encoding='utf-8') as file:
+                    self.write_html(file)
+            self.metrics.count_file_bytes(output_file_path)
             
-            print(f"マークダウン生成完了: {output_file_path}")
+            logger.info(f"HTML生成完了: {output_file_path}")
             
             return True
             
         except Exception as e:
+            logger.error(f"[ERROR] HTML生成に失敗しました: {e}")
             return False
+    
+    def generate_markdown_file(self, output_file_path):
+        """マークダウンファイルを生成"""
+        try:
+            with self.metrics.timer("generate_markdown"):
+                markdown_content = self.generate_markdown_content()
+                
+                # 出力ディレクトリを作成
+                output_path = Path(output_file_path)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                # ファイルに書き込み
+                with open(output_file_path, 'w', encoding='utf-8') as file:
+                    file.write(markdown_content)
+            self.metrics.count_file_bytes(output_file_path)
+            
+            logger.info(f"マークダウン生成完了: {output_file_path}")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"[ERROR] マークダウン生成に失敗しました: {e}")
+            return False
+
+def generate_markdown(cues, nodes=None, meta=None, strict=False, doc_links='keep'):
+    """字幕キューとノード挿入データから学習ガイドのマークダウンを生成（ファイル入出力なし）
+    
+    Args:
+        cues: 日本語字幕のCueのイテラブル、またはSRTテキスト
+        nodes: ノード挿入データ（辞書のリスト）。辞書は変更せずコピーして使う
+        meta: シリーズ情報（series_name, chapter_number, chapter_title, total_chapters, video_url）
+        strict: cuesがSRTテキストの場合、解析できないブロックでSRTParseErrorを送出する
+        doc_links: doc_link_ja の扱い（keep / validate / resolve、DOC_LINK_MODES 参照）
+    
+    Raises:
+        SRTParseError: strict=Trueで字幕テキストを解析できない場合
+        NodeDataError: ノード挿入データの形式が不正な場合
+        ValueError: metaに未知の項目が含まれる場合
+    """
+    return _prepare_generator(cues, nodes, meta, strict, doc_links).generate_markdown_content()
+
+
+def generate_html(cues, nodes=None, meta=None, strict=False, doc_links='keep'):
+    """字幕キューとノード挿入データから学習ガイドのHTMLを直接生成（引数・例外は generate_markdown と同じ）"""
+    buffer = io.StringIO()
+    _prepare_generator(cues, nodes, meta, strict, doc_links).write_html(buffer)
+    return buffer.getvalue()
+
+
+def _prepare_generator(cues, nodes, meta, strict, doc_links='keep'):
+    """API呼び出し用にデータを設定したMarkdownGeneratorを返す"""
+    generator = MarkdownGenerator(doc_links=doc_links)
+    generator.apply_metadata(meta or {})
+    if isinstance(cues, str):
+        cues = parse_cues(cues, strict=strict)
+    generator.subtitle_segments = list(cues)
+    if nodes is not None:
+        if not isinstance(nodes, list):
+            raise NodeDataError(f"ノードデータはリストである必要があります: {type(nodes).__name__}")
+        generator.load_node_insertions([dict(node) if isinstance(node, dict) else node for node in nodes])
+    return generator
+
 
 def main():
     """メイン処理"""
@@ -317,23 +651,63 @@ def main():
     
     parser.add_argument(
         '--output',
-        required=True, 
+        required=False,
         help='出力マークダウンファイル (.md)'
     )
     
+    parser.add_argument(
+        '--html-output',
+        required=False,
+        help='出力HTMLファイル (.html) - マークダウンを経由せず直接生成'
+    )
+    
+    parser.add_argument(
+        '--external-css',
+        nargs='?',
+        const='',
+        metavar='DIR',
+        help='HTMLにCSSを埋め込まず guide.<hash>.css として DIR（省略時はHTMLと同じフォルダ）に書き出して参照'
+    )
+    
+    parser.add_argument(
+        '--minify',
+        action='store_true',
+        help='HTMLのインデント・空行を取り除いて出力（表示は変わらない）'
+    )
+    
     parser.add_argument(
         '--video-url',
         required=False,
         help='動画URL（オプション）'
     )
     
+    parser.add_argument(
+        '--node-debuts',
+        action='store_true',
+        help='progress_tracker.json のノード初出インデックスを更新し、シリーズ初登場・チャプター初登場のノードにマークを付ける'
+    )
+    
+    parser.add_argument(
+        '--doc-links',
+        choices=DOC_LINK_MODES,
+        default='keep',
+        help='ノードのドキュメントURLの扱い（keep: JSONのまま, validate: 同梱カタログと照合して警告, resolve: カタログのURLに置き換え）（デフォルト: keep）'
+    )
+    
+    instrumentation.add_arguments(parser)
+    workflow_logging.add_arguments(parser)
+    
     args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+    
+    if not args.output and not args.html_output:
+        parser.error('--output と --html-output の少なくとも一方を指定してください')
     
     # ファイル存在確認
     subtitle_file = Path(args.subtitle_file)
     
     if not subtitle_file.exists():
-        print(f"[ERROR] 字幕ファイルが見つかりません: {subtitle_file}")
+        logger.error(f"[ERROR] 字幕ファイルが見つかりません: {subtitle_file}")
         sys.exit(1)
     
     # node-dataはオプションなので指定された場合のみ確認
@@ -341,20 +715,23 @@ def main():
     if args.node_data:
         node_file = Path(args.node_data)
         if not node_file.exists():
-            print(f"[ERROR] ノードデータファイルが見つかりません: {node_file}")
+            logger.error(f"[ERROR] ノードデータファイルが見つかりません: {node_file}")
             sys.exit(1)
     
-    print("[START] マークダウン生成開始...")
-    print(f"[INPUT] 字幕ファイル: {subtitle_file}")
+    logger.info("[START] マークダウン生成開始...")
+    logger.info(f"[INPUT] 字幕ファイル: {subtitle_file}")
     if node_file:
-        print(f"[INPUT] ノードデータ: {node_file}")
+        logger.info(f"[INPUT] ノードデータ: {node_file}")
     else:
-        print("[INPUT] ノードデータ: なし（シンプルモード）")
-    print(f"[OUTPUT] 出力ファイル: {args.output}")
-    print()
+        logger.info("[INPUT] ノードデータ: なし（シンプルモード）")
+    if args.output:
+        logger.info(f"[OUTPUT] 出力ファイル: {args.output}")
+    if args.html_output:
+        logger.info(f"[OUTPUT] HTMLファイル: {args.html_output}")
+    logger.info("")
     
     # マークダウン生成実行
-    generator = MarkdownGenerator()
+    generator = MarkdownGenerator(doc_links=args.doc_links)
     
     # 動画URLを設定（オプション）
     if args.video_url:
@@ -371,12 +748,36 @@ def main():
     if node_file and not generator.parse_node_data(node_file):
         sys.exit(1)
     
+    # ノード初出マーク（progress_tracker.json はシリーズ直下: <シリーズ>/01_raw_data/<チャプター>/字幕）
+    if args.node_debuts and node_file:
+        try:
+            generator.load_node_debuts(subtitle_file.resolve().parents[2], node_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"[ERROR] ノード初出インデックスの更新に失敗しました: {e}")
+            sys.exit(1)
+    
     # マークダウン生成
-    if not generator.generate_markdown_file(args.output):
+    if args.output and not generator.generate_markdown_file(args.output):
+        sys.exit(1)
+    
+    # HTML生成
+    if args.html_output and args.external_css is not None:
+        html_dir = Path(args.html_output).parent
+        try:
+            css_path = write_stylesheet(Path(args.external_css) if args.external_css else html_dir)
+        except OSError as e:
+            logger.error(f"[ERROR] スタイルシートの書き出しに失敗しました: {e}")
+            sys.exit(1)
+        generator.stylesheet_href = stylesheet_href(css_path, html_dir)
+        logger.info(f"[OUTPUT] スタイルシート: {css_path}")
+    
+    generator.minify_html = args.minify
+    if args.html_output and not generator.generate_html_file(args.html_output):
         sys.exit(1)
     
-    print()
-    print("[COMPLETE] マークダウン生成処理が正常に完了しました！")
+    instrumentation.emit(generator.metrics, args)
+    logger.info("")
+    logger.info("[COMPLETE] マークダウン生成処理が正常に完了しました！")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,18 +1,141 @@
 #!/usr/bin/env python3
 """MD→HTML変換ツール"""
 
+import argparse
+import html
+import io
+import os
 import re
 import sys
+import textwrap
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+import instrumentation
+import workflow_logging
+from build_cache import text_digest
+from instrumentation import Metrics
+
+
+logger = workflow_logging.get_logger("md_to_html_converter")
+
+# インライン装飾のパターン
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^\)]+)\)')
+LINK_REPLACEMENT = r'<a href="\2" target="_blank">\1</a>'
+LOOSE_BOLD_COLON_RE = re.compile(r'(?<!\*)\*([^*]+?)\*\*:')
+LOOSE_BOLD_RE = re.compile(r'(?<!\*)\*([^*]+?)\*\*(?!:)')
+BOLD_COLON_RE = re.compile(r'\*\*([^*]+?)\*\*:')
+BOLD_RE = re.compile(r'\*\*([^*]+?)\*\*')
+# 1パス処理用: リンク | *テキスト**(:) | **テキスト**(:)
+# （[^*]+ は * の直前で必ず止まるため、最短一致と同じ範囲を貪欲マッチで高速に取れる）
+INLINE_TOKEN_RE = re.compile(
+    r'\[([^\]]+)\]\(([^\)]+)\)'
+    r'|(?<!\*)\*([^*]+)\*\*(:?)'
+    r'|\*\*([^*]+)\*\*(:?)'
+)
+
+# テンプレート内のCSS（外部スタイルシートに切り出す範囲）
+STYLE_BLOCK_RE = re.compile(r'\n    <style>\n(.*?)\n    </style>', re.S)
+# 空白をそのまま表示する要素（--minify でも中身の空白を変えない）
+PREFORMATTED_OPEN_RE = re.compile(r'<(pre|textarea)\b', re.I)
+PREFORMATTED_CLOSE_RE = re.compile(r'</(pre|textarea)\s*>', re.I)
+
+
+class _LineCursor:
+    """1行先読み付きの行カーソル（Markdownを先頭から一度だけ走査する）"""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self.lines_read = 0
+        self._next = self._read()
+
+    def _read(self) -> Optional[str]:
+        line = next(self._lines, None)
+        if line is None:
+            return None
+        self.lines_read += 1
+        return line[:-1] if line.endswith('\n') else line
+
+    def peek(self) -> Optional[str]:
+        """次の行を返す（終端ではNone）"""
+        return self._next
+
+    def advance(self) -> Optional[str]:
+        """次の行を返して読み進める"""
+        line = self._next
+        self._next = self._read()
+        return line
+
+    def skip_blank(self) -> None:
+        """空行を読み飛ばす"""
+        while self._next is not None and not self._next.strip():
+            self.advance()
+
+
+class _MinifyingWriter:
+    """書き込まれたHTMLから行頭・行末の空白と空行を取り除いて out_file へ渡す
+
+    行の区切りの改行は1つ残す（改行と空白は表示上同じ）ため、インライン要素の間の
+    空白を詰めて表示が変わることはない。<pre> / <textarea> の中はそのまま出力する。
+    """
+
+    def __init__(self, out_file: TextIO):
+        self._out = out_file
+        self._pending = ""
+        self._preformatted = False
+        self._started = False
+
+    def write(self, text: str) -> None:
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._write_line(line)
+
+    def _write_line(self, line: str) -> None:
+        if self._preformatted:
+            self._preformatted = not PREFORMATTED_CLOSE_RE.search(line)
+            self._emit(line if self._preformatted else line.rstrip())
+            return
+        opened = PREFORMATTED_OPEN_RE.search(line)
+        if opened and not PREFORMATTED_CLOSE_RE.search(line, opened.end()):
+            # 要素の開始タグより後ろは整形済みテキストのため行末の空白も残す
+            self._preformatted = True
+            self._emit(line.lstrip())
+            return
+        line = line.strip()
+        if line:
+            self._emit(line)
+
+    def _emit(self, line: str) -> None:
+        if self._started:
+            self._out.write('\n')
+        self._out.write(line)
+        self._started = True
+
+    def flush(self) -> None:
+        """改行で終わっていない最後の行を書き出す"""
+        if self._pending:
+            self._write_line(self._pending)
+            self._pending = ""
 
 
 class MDtoHTMLConverter:
-    def __init__(self):
+    def __init__(self, metrics: Optional[Metrics] = None, stylesheet_href: Optional[str] = None,
+                 minify: bool = False):
         self.html_template = self._get_html_template()
+        self.minify = minify  # インデント・空行を取り除いて出力するか
+        if stylesheet_href:
+            # CSSを埋め込まず外部スタイルシート（write_stylesheet() で書き出したもの）を参照
+            self.html_template = STYLE_BLOCK_RE.sub(
+                lambda _: '\n    <link rel="stylesheet" href="{}">'.format(
+                    html.escape(stylesheet_href).replace('{', '{{').replace('}', '}}')),
+                self.html_template, count=1)
         self.content_sections = []
         self.title = ""
         self.series_info = {}
+        self.metrics = metrics or Metrics()  # ステージ別の計測先
+        self.regex_passes = 0     # インライン装飾の正規表現処理を行った回数
+        self.chain_fallbacks = 0  # 1パス処理できず置換チェーンに委ねた回数
         
     def _get_html_template(self) -> str:
         """HTMLテンプレートを返す"""
@@ -196,18 +319,16 @@ class MDtoHTMLConverter:
             return match.group(1)
         return ""
     
-    def _extract_series_info(self, lines: List[str], start_idx: int) -> Tuple[Dict[str, str], int]:
+    def _extract_series_info(self, cursor: "_LineCursor") -> Dict[str, str]:
         """シリーズ情報を抽出"""
         info = {}
-        idx = start_idx
         
         # 空行をスキップ
-        while idx < len(lines) and not lines[idx].strip():
-            idx += 1
+        cursor.skip_blank()
         
         # リスト項目を処理
-        while idx < len(lines):
-            line = lines[idx].strip()
+        while cursor.peek() is not None:
+            line = cursor.peek().strip()
             
             # 終了条件
             if line.startswith('---') or line.startswith('#') or not line:
@@ -218,69 +339,146 @@ class MDtoHTMLConverter:
             if match:
                 key, value = match.groups()
                 info[key] = value
-            idx += 1
+            cursor.advance()
             
-        return info, idx
+        return info
     
     def _format_series_info(self, info: Dict[str, str]) -> str:
         """シリーズ情報をHTML形式にフォーマット"""
         html_parts = []
         for key, value in info.items():
             # Markdownリンク [テキスト](URL) をHTMLリンクに変換
-            value = re.sub(r'\[([^\]]+)\]\(([^\)]+)\)', r'<a href="\2" target="_blank">\1</a>', value)
+            value = LINK_RE.sub(LINK_REPLACEMENT, value)
             html_parts.append(f'<strong>{key}</strong>: {value}<br>')
         return '\n                '.join(html_parts)
     
     def _process_bold_text(self, text: str) -> str:
-        """統一されたアスタリスク処理（全箇所で使用）"""
+        """統一されたアスタリスク処理（全箇所で使用）
+
+        リンク・太字を1パスで処理する。入れ子や対応の崩れたアスタリスク等、
+        1パスでは従来の置換チェーンと結果が一致しない入力はチェーン処理に委ねる。
+        """
         if not text:
             return text
         
+        if '*' not in text:
+            # 太字がなければリンク変換のみ
+            if '[' not in text:
+                return text
+            self.regex_passes += 1
+            return LINK_RE.sub(LINK_REPLACEMENT, text)
+        
+        self.regex_passes += 1
+        html = self._render_inline(text)
+        if html is None:
+            self.chain_fallbacks += 1
+            return self._process_bold_text_chain(text)
+        return html
+    
+    def _render_inline(self, text: str) -> Optional[str]:
+        """リンク・太字を左から1パスで変換（チェーン処理と一致しない入力ならNone）"""
+        parts = []
+        pos = 0
+        for match in INLINE_TOKEN_RE.finditer(text):
+            gap = text[pos:match.start()]
+            if '*' in gap:
+                # 対応の取れないアスタリスクが残る
+                return None
+            parts.append(gap)
+            pos = match.end()
+            
+            link_text, link_url, loose_text, loose_colon, bold_text, bold_colon = match.groups()
+            if link_text is not None:
+                if '*' in match.group(0):
+                    return None
+                parts.append(f'<a href="{link_url}" target="_blank">{link_text}</a>')
+                continue
+            
+            if loose_text is not None:
+                content, colon = loose_text, loose_colon
+            else:
+                if bold_text.startswith(':'):
+                    # **:テキスト** は直前の ** と組む **…**: の解釈が優先されうる
+                    return None
+                content, colon = bold_text, bold_colon
+            
+            if '[' in content:
+                content = self._render_links_in(text, content, match.start(3 if loose_text is not None else 5))
+                if content is None:
+                    return None
+            parts.append(f'<strong>{content}{colon}</strong>')
+        
+        tail = text[pos:]
+        if '*' in tail:
+            return None
+        parts.append(tail)
+        return ''.join(parts)
+    
+    @staticmethod
+    def _render_links_in(text: str, content: str, offset: int) -> Optional[str]:
+        """太字内のリンクを変換（太字の外まで続くリンクがあればNone）"""
+        parts = []
+        last = 0
+        idx = content.find('[')
+        while idx != -1:
+            link_match = LINK_RE.match(content, idx)
+            if link_match:
+                parts.append(content[last:idx])
+                parts.append(f'<a href="{link_match.group(2)}" target="_blank">{link_match.group(1)}</a>')
+                last = link_match.end()
+                idx = content.find('[', last)
+            else:
+                if LINK_RE.match(text, offset + idx):
+                    return None
+                idx = content.find('[', idx + 1)
+        parts.append(content[last:])
+        return ''.join(parts)
+    
+    def _process_bold_text_chain(self, text: str) -> str:
+        """従来の置換チェーンによるアスタリスク処理（1パス処理の基準実装）"""
         # Markdownリンク [テキスト](URL) をHTMLリンクに変換
-        text = re.sub(r'\[([^\]]+)\]\(([^\)]+)\)', r'<a href="\2" target="_blank">\1</a>', text)
+        text = LINK_RE.sub(LINK_REPLACEMENT, text)
         
         # 不正な*テキスト**:パターンを修正（*が1個、**が2個のケース）
-        text = re.sub(r'(?<!\*)\*([^*]+?)\*\*:', r'<strong>\1:</strong>', text)
+        text = LOOSE_BOLD_COLON_RE.sub(r'<strong>\1:</strong>', text)
         
         # 不正な*テキスト**パターンを修正（*が1個、**が2個のケース）
-        text = re.sub(r'(?<!\*)\*([^*]+?)\*\*(?!:)', r'<strong>\1</strong>', text)
+        text = LOOSE_BOLD_RE.sub(r'<strong>\1</strong>', text)
         
         # 正常な**テキスト**: パターンを処理（コロンも太字に含める）
-        text = re.sub(r'\*\*([^*]+?)\*\*:', r'<strong>\1:</strong>', text)
+        text = BOLD_COLON_RE.sub(r'<strong>\1:</strong>', text)
         
         # 残りの**テキスト**パターンを処理
-        text = re.sub(r'\*\*([^*]+?)\*\*', r'<strong>\1</strong>', text)
+        text = BOLD_RE.sub(r'<strong>\1</strong>', text)
         
         return text
     
-    def _process_timestamp_section(self, lines: List[str], start_idx: int) -> Tuple[str, int]:
+    def _process_timestamp_section(self, cursor: "_LineCursor") -> str:
         """タイムスタンプセクションを処理"""
         # 両方のフォーマットに対応: MM:SS または HH:MM:SS
-        timestamp_match = re.match(r'^##\s+(\d{2}:\d{2}(?::\d{2})?)$', lines[start_idx])
+        timestamp_match = re.match(r'^##\s+(\d{2}:\d{2}(?::\d{2})?)$', cursor.advance())
         if not timestamp_match:
-            return "", start_idx + 1
+            return ""
             
         timestamp = timestamp_match.group(1)
-        idx = start_idx + 1
         
         # 空行をスキップ
-        while idx < len(lines) and not lines[idx].strip():
-            idx += 1
+        cursor.skip_blank()
         
         # 翻訳文を取得
         quote_text = ""
-        if idx < len(lines) and lines[idx].strip().startswith('「') and lines[idx].strip().endswith('」'):
-            quote_text = lines[idx].strip()
-            idx += 1  # 翻訳文の行をスキップ
+        line = cursor.peek()
+        if line is not None and line.strip().startswith('「') and line.strip().endswith('」'):
+            quote_text = line.strip()
+            cursor.advance()  # 翻訳文の行をスキップ
             
         # 翻訳文の後の空行もスキップ
-        while idx < len(lines) and not lines[idx].strip():
-            idx += 1
+        cursor.skip_blank()
         
         # セクション内の解説部分を取得（翻訳文は既に処理済みなので除外される）
         explanation_lines = []
-        while idx < len(lines):
-            line = lines[idx].strip()
+        while cursor.peek() is not None:
+            line = cursor.peek().strip()
             # 次のセクション（##）で終了
             if line.startswith('## '):
                 break
@@ -288,16 +486,18 @@ class MDtoHTMLConverter:
             if line == '---':
                 break
             # 内容を追加（空行も含める）
-            explanation_lines.append(lines[idx])
-            idx += 1
+            explanation_lines.append(cursor.advance())
         
         # 解説部分をHTML化
         explanation_html = ""
         if explanation_lines:
             explanation_html = self._format_markdown_content_advanced('\n'.join(explanation_lines))
         
-        # セクションHTMLを構築
-        section_html = f'''
+        return self.render_timestamp_section(timestamp, quote_text, explanation_html)
+    
+    def render_timestamp_section(self, timestamp: str, quote_text: str, explanation_html: str) -> str:
+        """タイムスタンプセクションのHTMLを構築"""
+        return f'''
         <div class="content-section">
             <div class="section-header">
                 <span class="timestamp">{timestamp}</span>
@@ -305,22 +505,36 @@ class MDtoHTMLConverter:
             </div>
 {explanation_html}
         </div>'''
-        
-        return section_html, idx
     
-    def _process_general_section(self, lines: List[str], start_idx: int) -> Tuple[str, int]:
+    @staticmethod
+    def keyword_explanation_content(line: str) -> str:
+        """📝アイコン付き解説行から解説部分のMarkdownを取り出す
+
+        従来どおり先頭3文字を落とすため、「📝 **[名前](URL)**」は「*[名前](URL)**」になる
+        （「📝 」は2文字）。*テキスト** も太字として描画されるため、この形のまま処理する。
+        学習ガイドのHTML直接生成（MarkdownGenerator.iter_html_sections）も同じ関数を通すため、
+        ここを変えると両者の出力が揃ったまま変わる。
+        """
+        return line[3:].strip()
+    
+    def render_keyword_explanation(self, content: str) -> str:
+        """📝アイコン付き解説行のHTMLを構築（contentは「📝 」以降のMarkdown）"""
+        # 統一されたアスタリスク処理を使用
+        content = self._process_bold_text(content)
+        return f'<div class="keyword-explanation"><span class="icon">📝</span> {content}</div>'
+    
+    def _process_general_section(self, cursor: "_LineCursor") -> str:
         """通常のMarkdownセクション（## タイトル）を処理"""
-        title_match = re.match(r'^##\s+(.+)$', lines[start_idx])
+        title_match = re.match(r'^##\s+(.+)$', cursor.advance())
         if not title_match:
-            return "", start_idx + 1
+            return ""
             
         title = title_match.group(1)
-        idx = start_idx + 1
         content_lines = []
         
         # セクション内容を取得（サブセクションも含める）
-        while idx < len(lines):
-            line = lines[idx].strip()
+        while cursor.peek() is not None:
+            line = cursor.peek().strip()
             # 次の同レベル（##）セクションで終了
             if line.startswith('## ') and not line.startswith('### '):
                 break
@@ -328,8 +542,7 @@ class MDtoHTMLConverter:
             if line == '---':
                 break
             # 内容を追加（空行も含める）
-            content_lines.append(lines[idx])
-            idx += 1
+            content_lines.append(cursor.advance())
         
         # HTMLセクションを構築
         content_html = self._format_markdown_content_advanced('\n'.join(content_lines))
@@ -339,29 +552,28 @@ class MDtoHTMLConverter:
             {content_html}
         </div>'''
         
-        return section_html, idx
+        return section_html
     
-    def _process_bold_section(self, lines: List[str], start_idx: int) -> Tuple[str, int]:
+    def _process_bold_section(self, cursor: "_LineCursor") -> str:
         """**太字項目**:セクションを処理"""
-        bold_match = re.match(r'^\*\*(.+?)\*\*:?$', lines[start_idx])
+        bold_match = re.match(r'^\*\*(.+?)\*\*:?$', cursor.advance())
         if not bold_match:
-            return "", start_idx + 1
+            return ""
             
         title = bold_match.group(1)
-        idx = start_idx + 1
         content_lines = []
         
         # セクション内容を取得
-        while idx < len(lines):
-            line = lines[idx].strip()
+        while cursor.peek() is not None:
+            line = cursor.peek().strip()
             # 次のセクションの開始で終了
             if line.startswith('##') or line.startswith('**') or line == '---':
                 break
             if line:  # 空行以外を追加
-                content_lines.append(lines[idx])
+                content_lines.append(cursor.peek())
             elif content_lines:  # 内容がある場合は空行も含める
-                content_lines.append(lines[idx])
-            idx += 1
+                content_lines.append(cursor.peek())
+            cursor.advance()
         
         # HTMLセクションを構築
         content_html = self._format_markdown_content('\n'.join(content_lines))
@@ -371,7 +583,7 @@ class MDtoHTMLConverter:
             {content_html}
         </div>'''
         
-        return section_html, idx
+        return section_html
     
     def _format_markdown_content(self, content: str) -> str:
         """Markdownコンテンツを基本的なHTMLに変換"""
@@ -455,10 +667,7 @@ class MDtoHTMLConverter:
                 if in_numbered_list:
                     html_lines.append('</ol>')
                     in_numbered_list = False
-                content_part = line[3:].strip()
-                # 統一されたアスタリスク処理を使用
-                content_part = self._process_bold_text(content_part)
-                html_lines.append(f'<div class="keyword-explanation"><span class="icon">📝</span> {content_part}</div>')
+                html_lines.append(self.render_keyword_explanation(self.keyword_explanation_content(line)))
                 continue
             
             # 番号付きリスト (1. 2. 3. など)
@@ -509,107 +718,201 @@ class MDtoHTMLConverter:
         
         return '\n'.join(html_lines)
     
-    def convert(self, md_content: str) -> str:
-        """MarkdownをHTMLに変換"""
-        lines = md_content.split('\n')
-        idx = 0
-        content_html = []
-        
-        # タイトルを抽出
-        if lines[0].startswith('# '):
-            self.title = self._extract_title(lines[0])
-            idx = 1
-        
-        # 空行をスキップ
-        while idx < len(lines) and not lines[idx].strip():
-            idx += 1
-        
-        # シリーズ情報を抽出
-        if idx < len(lines) and lines[idx].startswith('**シリーズ情報**'):
-            idx += 1
-            self.series_info, idx = self._extract_series_info(lines, idx)
-        
-        # 全てのセクションを処理
-        while idx < len(lines):
-            line = lines[idx].strip()
+    def _iter_sections(self, cursor: "_LineCursor") -> Iterator[str]:
+        """本文のセクションHTMLを生成順に返す"""
+        while cursor.peek() is not None:
+            line = cursor.peek().strip()
             
-            # 空行をスキップ
-            if not line:
-                idx += 1
-                continue
-                
-            # 区切り線をスキップ
-            if line == '---':
-                idx += 1
+            # 空行・区切り線をスキップ
+            if not line or line == '---':
+                cursor.advance()
                 continue
             
             # タイムスタンプセクション（## 00:09 または ## 00:00:01）を処理
-            if re.match(r'^## \d{2}:\d{2}(?::\d{2})?$', line.strip()):
-                section_html, idx = self._process_timestamp_section(lines, idx)
-                if section_html:
-                    content_html.append(section_html)
+            if re.match(r'^## \d{2}:\d{2}(?::\d{2})?$', line):
+                section_html = self._process_timestamp_section(cursor)
             
             # 通常のMarkdownセクション（## タイトル）を処理
             elif line.startswith('## '):
-                section_html, idx = self._process_general_section(lines, idx)
-                if section_html:
-                    content_html.append(section_html)
+                section_html = self._process_general_section(cursor)
             
             # **太字項目**を処理
             elif line.startswith('**') and line.endswith('**:'):
-                section_html, idx = self._process_bold_section(lines, idx)
-                if section_html:
-                    content_html.append(section_html)
+                section_html = self._process_bold_section(cursor)
             
             else:
-                idx += 1
+                cursor.advance()
+                continue
+            
+            if section_html:
+                yield section_html
+    
+    def convert_stream(self, md_lines: Iterable[str], out_file: TextIO) -> None:
+        """Markdownの行イテレータを変換し、ヘッダー・各セクション・フッターを順次書き出す
+        
+        文書全体を文字列として保持しないため、シリーズ全体を結合した大きなガイドにも使える。
+        
+        Args:
+            md_lines: Markdownの行イテレータ（ファイルハンドル等、行末の改行は有無を問わない）
+            out_file: HTMLの書き込み先（write()を持つテキストストリーム）
+        """
+        regex_passes, chain_fallbacks = self.regex_passes, self.chain_fallbacks
+        with self.metrics.timer("convert"):
+            cursor = _LineCursor(md_lines)
+            self.read_preamble(cursor)
+            self.write_document(self._iter_sections(cursor), out_file)
+        
+        self.metrics.count("lines_read", cursor.lines_read)
+        self.metrics.count("inline_regex_passes", self.regex_passes - regex_passes)
+        self.metrics.count("chain_fallbacks", self.chain_fallbacks - chain_fallbacks)
+    
+    def read_preamble(self, md_lines: Iterable[str]) -> None:
+        """冒頭のタイトル・シリーズ情報を読み取る（本文の直前まで読み進める）"""
+        cursor = md_lines if isinstance(md_lines, _LineCursor) else _LineCursor(md_lines)
         
-        # HTMLを組み立て
-        html = self.html_template.format(
-            title=self.title,
-            series_info=self._format_series_info(self.series_info),
-            content='\n'.join(content_html)
-        )
+        # タイトルを抽出
+        first_line = cursor.peek()
+        if first_line is not None and first_line.startswith('# '):
+            self.title = self._extract_title(first_line)
+            cursor.advance()
         
-        return html
+        # 空行をスキップ
+        cursor.skip_blank()
+        
+        # シリーズ情報を抽出
+        line = cursor.peek()
+        if line is not None and line.startswith('**シリーズ情報**'):
+            cursor.advance()
+            self.series_info = self._extract_series_info(cursor)
+    
+    def write_document(self, sections: Iterable[str], out_file: TextIO) -> None:
+        """ヘッダー（タイトル・シリーズ情報）、各セクションHTML、フッターを順に書き出す"""
+        if self.minify:
+            writer = _MinifyingWriter(out_file)
+            self._write_document(sections, writer)
+            writer.flush()
+        else:
+            self._write_document(sections, out_file)
+    
+    def _write_document(self, sections: Iterable[str], out_file: TextIO) -> None:
+        # テンプレートを本文の前後で分割して書き出し
+        header, footer = self.html_template.split('{content}', 1)
+        out_file.write(header.format(
+            title=self.title,
+            series_info=self._format_series_info(self.series_info)
+        ))
+        section_count = 0
+        for section_html in sections:
+            if section_count:
+                out_file.write('\n')
+            out_file.write(section_html)
+            section_count += 1
+        out_file.write(footer.format())
+        self.metrics.count("sections_rendered", section_count)
+    
+    def convert(self, md_content: str) -> str:
+        """MarkdownをHTMLに変換"""
+        buffer = io.StringIO()
+        self.convert_stream(md_content.split('\n'), buffer)
+        return buffer.getvalue()
+
+
+def get_stylesheet() -> str:
+    """HTMLテンプレートに埋め込まれているCSS"""
+    match = STYLE_BLOCK_RE.search(MDtoHTMLConverter()._get_html_template())
+    css = textwrap.dedent(match.group(1)).replace('{{', '{').replace('}}', '}')
+    return css.strip() + '\n'
+
+
+def write_stylesheet(css_dir: Path) -> Path:
+    """CSSを内容ハッシュ付きのファイル名（guide.<hash>.css）で書き出す
+
+    ファイル名が内容で変わるため、ブラウザ・サーバーで長期間キャッシュさせても
+    CSSの変更が確実に反映される。同じ内容のファイルが既にあれば書き込まない。
+    """
+    css = get_stylesheet()
+    css_path = Path(css_dir) / f"guide.{text_digest(css)[:12]}.css"
+    if not css_path.exists():
+        css_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = css_path.with_name(f"{css_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(css)
+        os.replace(tmp_path, css_path)
+    return css_path
+
+
+def stylesheet_href(css_path: Path, html_dir: Path) -> str:
+    """HTMLファイルのフォルダから見たスタイルシートの相対URL"""
+    return Path(os.path.relpath(Path(css_path).resolve(), Path(html_dir).resolve())).as_posix()
+
+
+def md_to_html(md_content: str) -> str:
+    """Markdown文字列をHTML文字列に変換（ファイル入出力なし）
+    
+    Raises:
+        TypeError: md_contentが文字列でない場合
+    """
+    if not isinstance(md_content, str):
+        raise TypeError(f"md_contentは文字列である必要があります: {type(md_content).__name__}")
+    return MDtoHTMLConverter().convert(md_content)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("使用方法: python md_to_html_converter.py <MDファイル> [出力HTMLファイル]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="MD→HTML変換ツール",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python md_to_html_converter.py guide.md
+  python md_to_html_converter.py guide.md guide.html --profile
+  python md_to_html_converter.py guide.md --external-css ../assets
+  python md_to_html_converter.py guide.md --minify
+        """
+    )
+    parser.add_argument('md_file', help='入力MDファイル')
+    parser.add_argument('html_file', nargs='?', help='出力HTMLファイル（省略時はMDファイルと同名の.html）')
+    parser.add_argument('--external-css', nargs='?', const='', metavar='DIR',
+                        help='CSSを埋め込まず guide.<hash>.css として DIR（省略時はHTMLと同じフォルダ）に書き出して参照')
+    parser.add_argument('--minify', action='store_true',
+                        help='インデント・空行を取り除いて出力（表示は変わらない）')
+    instrumentation.add_arguments(parser)
+    workflow_logging.add_arguments(parser)
     
-    md_file_path = Path(sys.argv[1])
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+    
+    md_file_path = Path(args.md_file)
     
     # 出力パスの決定
-    if len(sys.argv) >= 3:
-        html_file_path = Path(sys.argv[2])
+    if args.html_file:
+        html_file_path = Path(args.html_file)
     else:
         html_file_path = md_file_path.with_suffix('.html')
     
     if not md_file_path.exists():
-        print(f"エラー: ファイルが見つかりません: {md_file_path}")
+        logger.error(f"エラー: ファイルが見つかりません: {md_file_path}")
         sys.exit(1)
     
     try:
-        # MDファイルを読み込み
-        with open(md_file_path, 'r', encoding='utf-8') as f:
-            md_content = f.read()
-        
-        # 変換実行
-        converter = MDtoHTMLConverter()
-        html_content = converter.convert(md_content)
+        href = None
+        if args.external_css is not None:
+            css_path = write_stylesheet(Path(args.external_css or html_file_path.parent))
+            href = stylesheet_href(css_path, html_file_path.parent)
         
-        # HTMLファイルを書き込み
-        with open(html_file_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # MDファイルを読みながら変換し、HTMLファイルへ順次書き込み
+        converter = MDtoHTMLConverter(stylesheet_href=href, minify=args.minify)
+        with open(md_file_path, 'r', encoding='utf-8') as md_file, \
+                open(html_file_path, 'w', encoding='utf-8') as html_file:
+            converter.convert_stream(md_file, html_file)
+        converter.metrics.count_file_bytes(html_file_path)
         
-        print(f"変換完了: {md_file_path} → {html_file_path}")
+        logger.info(f"変換完了: {md_file_path} → {html_file_path}")
+        instrumentation.emit(converter.metrics, args)
         
     except Exception as e:
-        print(f"エラー: {e}")
+        logger.error(f"エラー: {e}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Houdiniノードカタログ（表示名・別名・コンテキスト → 日本語ドキュメントURL）"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+CATALOG_FORMAT_VERSION = 1
+DOC_BASE_URL = "https://www.sidefx.com/ja/docs/houdini/nodes"
+
+# 同梱カタログ（scripts/data/houdini_node_catalog.json）
+BUNDLED_CATALOG_PATH = Path(__file__).resolve().parent / "data" / "houdini_node_catalog.json"
+
+# 索引キャッシュ（pickle）の形式。NodeEntry・索引の構造を変えたら上げる
+INDEX_CACHE_VERSION = 1
+
+# 名前照合用キー（大文字小文字・空白・記号の違いを無視: "Poly Extrude" と "PolyExtrude" は同じ）
+KEY_RE = re.compile(r'[a-z0-9_]+')
+DOC_LINK_RE = re.compile(r'/nodes/([a-z]+)/([A-Za-z0-9_]+)\.html')
+
+
+class NodeCatalogError(ValueError):
+    """ノードカタログの形式エラー"""
+
+
+def index_key(name: str) -> str:
+    """ノード名・別名・スラッグの索引キー"""
+    return ''.join(KEY_RE.findall(name.lower()))
+
+
+def split_doc_link(url: str) -> Optional[Tuple[str, str]]:
+    """ドキュメントURLから (コンテキスト, スラッグ) を取り出す（形式が異なる場合はNone）"""
+    match = DOC_LINK_RE.search(url) if isinstance(url, str) else None
+    return (match.group(1), match.group(2)) if match else None
+
+
+class NodeEntry:
+    """カタログのノード1件"""
+
+    __slots__ = ('name', 'context', 'slug', 'aliases', 'requires_qualifier')
+
+    def __init__(self, name: str, context: str, slug: str, aliases: Sequence[str] = (),
+                 requires_qualifier: bool = False):
+        self.name = name                            # 表示名（例: Attribute Promote）
+        self.context = context                      # ネットワークの種類（sop, dop, vop, obj 等）
+        self.slug = slug                            # ドキュメントURLのノード名（例: attribpromote）
+        self.aliases = tuple(aliases)               # 別名（内部名・旧名・略称）
+        self.requires_qualifier = requires_qualifier  # 一般的な英単語と紛らわしい名前か
+
+    @property
+    def doc_link_ja(self) -> str:
+        """日本語ドキュメントのURL"""
+        return f"{DOC_BASE_URL}/{self.context}/{self.slug}.html"
+
+    def __repr__(self):
+        return f"NodeEntry({self.name!r}, {self.context!r}, {self.slug!r})"
+
+
+class NodeCatalog:
+    """ノードカタログ
+
+    JSON形式:
+        {"version": 1, "nodes": [{"name": "Attribute Promote", "context": "sop",
+          "slug": "attribpromote", "aliases": ["attribpromote"], "requires_qualifier": false}, ...]}
+    """
+
+    def __init__(self, entries: List[NodeEntry], index: Optional[Dict[Tuple[str, str], int]] = None):
+        self.entries = entries
+        # (コンテキスト, 索引キー) → entries の位置。コンテキスト "" は全コンテキストでの先頭の一致
+        self._index = index if index is not None else self._build_index(entries)
+
+    @staticmethod
+    def _build_index(entries: List[NodeEntry]) -> Dict[Tuple[str, str], int]:
+        """表示名・別名・スラッグの索引を作成（同じキーはカタログで先に書かれたノードを優先）"""
+        index: Dict[Tuple[str, str], int] = {}
+        for position, entry in enumerate(entries):
+            for variant in (entry.name, entry.slug, *entry.aliases):
+                key = index_key(variant)
+                if key:
+                    index.setdefault((entry.context, key), position)
+                    index.setdefault(("", key), position)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[NodeEntry]:
+        return iter(self.entries)
+
+    def lookup(self, name: str, context: Optional[str] = None) -> Optional[NodeEntry]:
+        """表示名・別名・スラッグからノードを検索（context 指定時はそのコンテキストのみ）"""
+        position = self._index.get((context or "", index_key(name)))
+        return None if position is None else self.entries[position]
+
+    def resolve(self, name: str, doc_link: Optional[str] = None) -> Optional[NodeEntry]:
+        """ノード挿入データの node_name（と既存のURLのコンテキスト）に対応するノードを返す
+
+        URLのコンテキスト（sop / dop 等）に同名のノードがない場合は、全コンテキストから検索する。
+        """
+        link = split_doc_link(doc_link)
+        if link:
+            entry = self.lookup(name, link[0])
+            if entry is not None:
+                return entry
+        return self.lookup(name)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NodeCatalog":
+        """JSONから読み込んだ辞書からカタログを作成
+
+        Raises:
+            NodeCatalogError: 形式が不正な場合
+        """
+        if not isinstance(data, dict) or data.get("version") != CATALOG_FORMAT_VERSION:
+            raise NodeCatalogError(f"未対応のカタログ形式です（version {CATALOG_FORMAT_VERSION} が必要）")
+        entries = []
+        for i, node in enumerate(data.get("nodes", [])):
+            try:
+                entries.append(NodeEntry(node["name"], node["context"], node["slug"],
+                                         node.get("aliases", []), bool(node.get("requires_qualifier", False))))
+            except (KeyError, TypeError) as e:
+                raise NodeCatalogError(f"ノード {i}: name / context / slug が必要です: {node!r}") from e
+        return cls(entries)
+
+    @classmethod
+    def from_json(cls, path: Path) -> "NodeCatalog":
+        """カタログJSONファイルを読み込む"""
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise NodeCatalogError(f"カタログJSONの解析に失敗しました: {path}: {e}") from e
+        return cls.from_dict(data)
+
+
+# プロセス内で読み込み済みのカタログ（パス → カタログ）
+_loaded_catalogs: Dict[Path, NodeCatalog] = {}
+
+
+def _index_cache_path(path: Path) -> Path:
+    """カタログJSONに対応する索引キャッシュのパス"""
+    return path.parent / "__pycache__" / f"{path.stem}.index-v{INDEX_CACHE_VERSION}.pickle"
+
+
+def _load_index_cache(cache_path: Path, digest: str) -> Optional[NodeCatalog]:
+    """索引キャッシュを読み込む（カタログJSONの内容が変わっている・壊れている場合はNone）"""
+    try:
+        with open(cache_path, 'rb') as f:
+            data = pickle.load(f)
+        if data["digest"] != digest:
+            return None
+        return NodeCatalog([NodeEntry(*row) for row in data["entries"]], data["index"])
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _save_index_cache(cache_path: Path, digest: str, catalog: NodeCatalog) -> None:
+    """索引キャッシュをアトミックに書き出し（書き込めない場所では何もしない）"""
+    data = {
+        "digest": digest,
+        "entries": [(e.name, e.context, e.slug, e.aliases, e.requires_qualifier) for e in catalog.entries],
+        "index": catalog._index,
+    }
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def load_catalog(path: Path = BUNDLED_CATALOG_PATH) -> NodeCatalog:
+    """カタログを読み込む（初回のみ。2回目以降はプロセス内で使い回す）
+
+    JSONの解析と索引の作成結果は __pycache__ に pickle で保存し、
+    次回以降の起動ではJSONの内容（SHA-256）が変わっていなければそれを使う。
+
+    Raises:
+        OSError: カタログファイルが読めない場合
+        NodeCatalogError: 形式が不正な場合
+    """
+    path = Path(path).resolve()
+    catalog = _loaded_catalogs.get(path)
+    if catalog is not None:
+        return catalog
+
+    source = path.read_bytes()
+    digest = hashlib.sha256(source).hexdigest()
+    cache_path = _index_cache_path(path)
+    catalog = _load_index_cache(cache_path, digest)
+    if catalog is None:
+        try:
+            data = json.loads(source.decode('utf-8'))
+        except ValueError as e:
+            raise NodeCatalogError(f"カタログJSONの解析に失敗しました: {path}: {e}") from e
+        catalog = NodeCatalog.from_dict(data)
+        _save_index_cache(cache_path, digest, catalog)
+    _loaded_catalogs[path] = catalog
+    return catalog
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""英語字幕からのノード名検出（カタログの名前・別名から作るAho-Corasickオートマトンで1パス走査）"""
+
+import argparse
+import bisect
+import json
+import re
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import workflow_logging
+from build_series import discover_chapters
+from node_catalog import BUNDLED_CATALOG_PATH, NodeCatalog, NodeEntry, load_catalog
+from srt_reader import Cue, read_srt_file, seconds_to_clock
+
+
+logger = workflow_logging.get_logger("node_detector")
+
+# 単語単位で照合する（"Copy-to-Points" と "copy to points" は同じトークン列）
+TOKEN_RE = re.compile(r'[A-Za-z0-9]+')
+
+# requires_qualifier のノード名を、英単語ではなくノード名として扱う後続語
+QUALIFIER_WORDS = frozenset(("node", "nodes", "sop", "sops"))
+
+SENTENCE_ENDINGS = ".!?"
+
+
+def tokenize(text: str) -> List[str]:
+    """テキストを小文字の単語のリストに分割"""
+    return list(map(str.lower, TOKEN_RE.findall(text)))
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    """ノード名・別名の照合用トークン列"""
+    return tuple(tokenize(name))
+
+
+class NodeMatcher:
+    """カタログの全ノード名・別名を単語列パターンとするAho-Corasickオートマトン"""
+
+    def __init__(self, catalog: NodeCatalog):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 状態ごとに、その状態で終わるパターン (単語数, ノード)
+        self._outputs: List[List[Tuple[int, NodeEntry]]] = [[]]
+        # 単語列 → ノード（既存のノード挿入データの名前照合用）
+        self.by_tokens: Dict[Tuple[str, ...], NodeEntry] = {}
+
+        for entry in catalog:
+            for variant in (entry.name, *entry.aliases):
+                tokens = name_tokens(variant)
+                if tokens and tokens not in self.by_tokens:
+                    self.by_tokens[tokens] = entry
+                    self._add_pattern(tokens, entry)
+        self._build_failure_links()
+
+    def _add_pattern(self, tokens: Tuple[str, ...], entry: NodeEntry) -> None:
+        """パターンをトライに追加"""
+        state = 0
+        for token in tokens:
+            following = self._goto[state].get(token)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][token] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = following
+        self._outputs[state].append((len(tokens), entry))
+
+    def _build_failure_links(self) -> None:
+        """幅優先で失敗遷移を設定し、失敗先の出力を引き継ぐ"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(token, 0)
+                self._outputs[following] = self._outputs[following] + self._outputs[self._fail[following]]
+
+    def iter_matches(self, words: List[str]) -> Iterator[Tuple[int, int, NodeEntry]]:
+        """単語列中の出現 (開始単語位置, 終了単語位置(含まない), ノード) を重ならないように返す
+
+        同じ位置から始まる候補は最長のものを採用する（"Attribute Promote" を "Promote" より優先）。
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = []
+        state = 0
+        root = goto[0]
+        for i, word in enumerate(words):
+            if state:
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+            else:
+                # 大半の単語はどのパターンにも含まれないため、初期状態からの遷移を先に判定
+                state = root.get(word, 0)
+                if not state:
+                    continue
+            for length, entry in outputs[state]:
+                found.append((i + 1 - length, i + 1, entry))
+
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        covered_until = 0
+        for start, end, entry in found:
+            if start >= covered_until:
+                covered_until = end
+                yield start, end, entry
+
+
+class NodeMention:
+    """字幕中のノード名の出現1件"""
+
+    __slots__ = ('entry', 'cue', 'text')
+
+    def __init__(self, entry: NodeEntry, cue: Cue, text: str):
+        self.entry = entry  # カタログのノード
+        self.cue = cue      # 出現したキュー
+        self.text = text    # 字幕中の表記
+
+
+class _CueTokens:
+    """キュー列を単語列に変換し、単語位置からキュー・文字位置を引く"""
+
+    def __init__(self, cues: List[Cue]):
+        self.cues = cues
+        self.words: List[str] = []
+        self.cue_starts: List[int] = []  # キューごとの先頭単語位置
+        for cue in cues:
+            self.cue_starts.append(len(self.words))
+            self.words.extend(tokenize(cue.text))
+        self._spans: Dict[int, List[Tuple[int, int]]] = {}
+
+    def cue_index(self, word_index: int) -> int:
+        """単語を含むキューの位置"""
+        return bisect.bisect_right(self.cue_starts, word_index) - 1
+
+    def span(self, word_index: int) -> Tuple[int, int, int]:
+        """単語の (キュー位置, キュー内の開始位置, 終了位置)（出現したキューだけ文字位置を求める）"""
+        index = self.cue_index(word_index)
+        spans = self._spans.get(index)
+        if spans is None:
+            spans = self._spans[index] = [m.span() for m in TOKEN_RE.finditer(self.cues[index].text)]
+        return (index, *spans[word_index - self.cue_starts[index]])
+
+    def preceding_char(self, cue_index: int, position: int) -> str:
+        """指定位置より前の空白以外の最後の文字（前のキューまでさかのぼる、なければ空文字）"""
+        preceding = self.cues[cue_index].text[:position].rstrip()
+        while not preceding and cue_index > 0:
+            cue_index -= 1
+            preceding = self.cues[cue_index].text.rstrip()
+        return preceding[-1:]
+
+
+def _is_qualified(cue_tokens: _CueTokens, start: int, end: int) -> bool:
+    """一般的な英単語と紛らわしいノード名が、ノード名として使われているか判定
+
+    直後が node / SOP の場合、または文頭以外で大文字始まりの場合にノード名とみなす。
+    """
+    if end < len(cue_tokens.words) and cue_tokens.words[end] in QUALIFIER_WORDS:
+        return True
+    index, first_char, _ = cue_tokens.span(start)
+    if not cue_tokens.cues[index].text[first_char].isupper():
+        return False
+    preceding = cue_tokens.preceding_char(index, first_char)
+    return bool(preceding) and preceding not in SENTENCE_ENDINGS
+
+
+def detect_mentions(cues: List[Cue], matcher: NodeMatcher) -> List[NodeMention]:
+    """キュー列中のノード名の出現を順に返す（全キューの単語列を1回だけ走査、キューをまたぐ名前も検出）"""
+    cue_tokens = _CueTokens(cues)
+    mentions = []
+    for start, end, entry in matcher.iter_matches(cue_tokens.words):
+        if entry.requires_qualifier and not _is_qualified(cue_tokens, start, end):
+            continue
+        first_index, first_char, _ = cue_tokens.span(start)
+        last_index, _, last_char = cue_tokens.span(end - 1)
+        if first_index == last_index:
+            text = cues[first_index].text[first_char:last_char]
+        else:
+            text = " ".join([cues[first_index].text[first_char:],
+                             *(cue.text for cue in cues[first_index + 1:last_index]),
+                             cues[last_index].text[:last_char]])
+        mentions.append(NodeMention(entry, cues[first_index], text))
+    return mentions
+
+
+def build_node_insertions(mentions: List[NodeMention]) -> List[Dict]:
+    """各ノードの最初の出現からノード挿入データ（chapter_XX_node_insertions.json の形式）を作成"""
+    insertions = []
+    seen = set()
+    for mention in mentions:
+        entry = mention.entry
+        if id(entry) in seen:
+            continue
+        seen.add(id(entry))
+        insertions.append({
+            "node_name": entry.name,
+            "doc_link_ja": entry.doc_link_ja,
+            "insert_after_timestamp": seconds_to_clock(mention.cue.start),
+        })
+    return insertions
+
+
+def detect_node_insertions(cues: List[Cue], catalog: NodeCatalog,
+                           matcher: Optional[NodeMatcher] = None) -> List[Dict]:
+    """キュー列からノード挿入データを作成（matcher は複数チャプターで使い回せる）"""
+    return build_node_insertions(detect_mentions(cues, matcher or NodeMatcher(catalog)))
+
+
+def compare_insertions(detected: List[Dict], existing: List[Dict], matcher: NodeMatcher) -> Dict[str, List]:
+    """既存のノード挿入データ（エージェント出力）と検出結果を比較
+
+    Returns:
+        missing: 検出されたが既存データにないノード名
+        unexpected: 既存データにあるが字幕から検出されなかったノード名
+        unknown: 既存データのうちカタログにないノード名
+        link_mismatch: (ノード名, 既存のURL, カタログのURL)
+    """
+    detected_names = {node["node_name"] for node in detected}
+    result = {"missing": [], "unexpected": [], "unknown": [], "link_mismatch": []}
+    existing_names = set()
+    for node in existing:
+        name = node.get("node_name", "")
+        entry = matcher.by_tokens.get(name_tokens(name))
+        if entry is None:
+            result["unknown"].append(name)
+            continue
+        existing_names.add(entry.name)
+        if entry.name not in detected_names:
+            result["unexpected"].append(name)
+        if node.get("doc_link_ja") != entry.doc_link_ja:
+            result["link_mismatch"].append((name, node.get("doc_link_ja"), entry.doc_link_ja))
+    result["missing"] = [node["node_name"] for node in detected if node["node_name"] not in existing_names]
+    return result
+
+
+def _report_comparison(label: str, comparison: Dict[str, List]) -> bool:
+    """比較結果を表示し、差異がなければTrueを返す"""
+    ok = True
+    for name in comparison["missing"]:
+        logger.warning(f"[WARNING] {label}: 字幕に出現するが未登録: {name}")
+        ok = False
+    for name in comparison["unexpected"]:
+        logger.warning(f"[WARNING] {label}: 字幕から検出されない: {name}")
+        ok = False
+    for name in comparison["unknown"]:
+        logger.warning(f"[WARNING] {label}: カタログにないノード: {name}")
+        ok = False
+    for name, link, expected in comparison["link_mismatch"]:
+        logger.warning(f"[WARNING] {label}: {name} のリンクが異なる: {link} （カタログ: {expected}）")
+        ok = False
+    return ok
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="ノード名検出ツール（英語字幕からノード挿入データを作成・検証）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python node_detector.py detect transcript_en_fixed.srt
+  python node_detector.py detect transcript_en_fixed.srt --output chapter_01_node_insertions.json
+  python node_detector.py validate transcript_en_fixed.srt chapter_01_node_insertions.json
+  python node_detector.py scan tutorials/Project_Skylark_Bridges --catalog my_catalog.json
+        """
+    )
+    workflow_logging.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    detect_parser = subparsers.add_parser('detect', help='字幕からノード挿入データを作成')
+    detect_parser.add_argument('srt_file', help='英語SRTファイル（en_fixed.srt 推奨）')
+    detect_parser.add_argument('--output', '-o', help='出力JSONファイル（省略時は標準出力）')
+
+    validate_parser = subparsers.add_parser('validate', help='既存のノード挿入データを字幕・カタログと照合')
+    validate_parser.add_argument('srt_file', help='英語SRTファイル')
+    validate_parser.add_argument('node_data', help='ノード挿入データJSON')
+
+    scan_parser = subparsers.add_parser('scan', help='シリーズ全チャプターのノード挿入データを照合')
+    scan_parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+
+    for subparser in (detect_parser, validate_parser, scan_parser):
+        subparser.add_argument('--catalog', default=str(BUNDLED_CATALOG_PATH),
+                               help='ノードカタログJSON（デフォルト: 同梱の scripts/data/houdini_node_catalog.json）')
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    try:
+        catalog = load_catalog(Path(args.catalog))
+        matcher = NodeMatcher(catalog)
+
+        if args.command == 'detect':
+            insertions = detect_node_insertions(read_srt_file(Path(args.srt_file)), catalog, matcher)
+            output = json.dumps(insertions, ensure_ascii=False, indent=2)
+            if args.output:
+                Path(args.output).write_text(output + "\n", encoding='utf-8')
+                logger.info(f"[SUCCESS] {len(insertions)}ノードを出力しました: {args.output}")
+            else:
+                print(output)
+            return
+
+        if args.command == 'validate':
+            pairs = [(Path(args.node_data).name, Path(args.srt_file), Path(args.node_data))]
+        else:
+            pairs = []
+            for task in discover_chapters(Path(args.series_dir)):
+                srt_file = task.en_fixed_srt if task.en_fixed_srt and task.en_fixed_srt.exists() else task.en_srt
+                if srt_file and task.node_data:
+                    pairs.append((task.name, srt_file, task.node_data))
+
+        ok = True
+        start_time = time.perf_counter()
+        for label, srt_file, node_data in pairs:
+            detected = detect_node_insertions(read_srt_file(srt_file), catalog, matcher)
+            with open(node_data, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            chapter_ok = _report_comparison(label, compare_insertions(detected, existing, matcher))
+            if chapter_ok:
+                logger.info(f"[OK] {label}: {len(existing)}ノード（差異なし）")
+            ok = ok and chapter_ok
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"[INFO] {len(pairs)}チャプターを照合（{elapsed * 1000:.1f}ミリ秒）")
+        sys.exit(0 if ok else 1)
+
+    except (OSError, ValueError) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
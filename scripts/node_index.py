@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""シリーズ内のノード初出インデックス（progress_tracker.json をチャプター単位で差分更新）"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import workflow_logging
+from build_cache import file_digest
+from node_catalog import index_key, split_doc_link
+from srt_reader import seconds_to_clock
+
+
+logger = workflow_logging.get_logger("node_index")
+
+PROGRESS_FILE_NAME = "progress_tracker.json"
+ANALYSIS_DATA_DIR = "02_analysis_data"
+NODE_INDEX_VERSION = 1
+
+# md_to_html_converter のCSS（.node-debut.series-debut / .node-debut.chapter-debut）と対応
+SERIES_DEBUT = "series-debut"
+CHAPTER_DEBUT = "chapter-debut"
+
+NODE_FILE_RE = re.compile(r'^chapter_(\w+?)_node_insertions\.json$')
+
+
+def chapter_key(number) -> str:
+    """チャプター番号を progress_tracker.json の表記（2桁ゼロ埋め）にそろえる"""
+    number = str(number).strip()
+    return f"{int(number):02d}" if number.isdigit() else number
+
+
+def _chapter_order(key: str) -> Tuple[int, int, str]:
+    """チャプターの並び順（数値のチャプターを番号順に先、それ以外は名前順）"""
+    return (0, int(key), "") if key.isdigit() else (1, 0, key)
+
+
+def _debut_order(info: Dict) -> Tuple:
+    """ノードの初出順（初出チャプター → チャプター内の時刻）"""
+    return _chapter_order(info["first_chapter"]), parse_insert_timestamp(info["first_timestamp"])
+
+
+def node_id(node: Dict) -> str:
+    """ノード挿入データの識別子（ドキュメントURLの context/slug。URLがなければ名前）
+
+    "Box" と "Box SOP" のように表記が揺れても、リンク先が同じなら同じノードとして扱う。
+    """
+    link = split_doc_link(node.get('doc_link_ja'))
+    if link:
+        return f"{link[0]}/{link[1]}"
+    return index_key(str(node.get('node_name', '')))
+
+
+def parse_insert_timestamp(timestamp: str) -> float:
+    """insert_after_timestamp（HH:MM:SS または HH:MM:SS,mmm）を秒に変換"""
+    clock, _, milliseconds = str(timestamp).replace('.', ',').partition(',')
+    hours, minutes, seconds = clock.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + (int(milliseconds) / 1000 if milliseconds else 0)
+
+
+def chapter_first_appearances(nodes: Iterable[Dict]) -> Dict[str, Tuple[str, float]]:
+    """チャプター内の各ノードの最初の出現（識別子 → (ノード名, 秒)、出現時刻順）"""
+    first: Dict[str, Tuple[str, float]] = {}
+    for i, node in enumerate(nodes):
+        if not isinstance(node, dict):
+            continue
+        try:
+            seconds = parse_insert_timestamp(node['insert_after_timestamp'])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"[WARNING] ノード {i}: タイムスタンプを解析できないため初出判定から除外: {node!r}")
+            continue
+        nid = node_id(node)
+        if nid and (nid not in first or seconds < first[nid][1]):
+            first[nid] = (str(node.get('node_name', nid)), seconds)
+    return dict(sorted(first.items(), key=lambda item: item[1][1]))
+
+
+class NodeIndex:
+    """progress_tracker.json のノード初出インデックス
+
+    progress_tracker.json に以下を保持する:
+        chapters[].nodes_encountered: チャプターに出現するノード名（出現順）
+        chapters[].node_data_digest: 反映済みのノード挿入データのハッシュ（差分更新の判定用）
+        series_nodes_list: シリーズのノード名（初出順）
+        node_index: {"version": 1, "nodes": {識別子: {"name", "first_chapter", "first_timestamp",
+                     "chapters": {チャプター番号: そのチャプターでの最初の出現時刻}}}}
+    """
+
+    def __init__(self, path: Path, data: Optional[Dict] = None):
+        self.path = Path(path)
+        self.data = data if data is not None else {"series_info": {"name": self.path.parent.name},
+                                                    "chapters": [], "series_nodes_list": []}
+        index = self.data.get("node_index")
+        if not isinstance(index, dict) or index.get("version") != NODE_INDEX_VERSION:
+            # 旧形式・未作成の場合は全チャプターを再反映させる
+            index = {"version": NODE_INDEX_VERSION, "nodes": {}}
+            self.data["node_index"] = index
+            for chapter in self.data.setdefault("chapters", []):
+                chapter.pop("node_data_digest", None)
+        self.nodes: Dict[str, Dict] = index["nodes"]
+        self._dirty = False
+
+    @classmethod
+    def for_series(cls, series_dir: Path) -> "NodeIndex":
+        """シリーズフォルダの progress_tracker.json を読み込む（存在しない場合は新規）
+
+        Raises:
+            ValueError: progress_tracker.json が解析できない場合
+        """
+        path = Path(series_dir) / PROGRESS_FILE_NAME
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        if not isinstance(data, dict):
+            raise ValueError(f"進捗ファイルの形式が不正です: {path}")
+        return cls(path, data)
+
+    def save(self) -> None:
+        """変更がある場合のみアトミックに書き出し"""
+        if not self._dirty:
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def chapter_entry(self, key: str, create: bool = False) -> Optional[Dict]:
+        """progress_tracker.json のチャプター情報（create=True の場合はなければ追加）"""
+        chapters = self.data.setdefault("chapters", [])
+        for chapter in chapters:
+            if chapter_key(chapter.get("chapter_number", "")) == key:
+                return chapter
+        if not create:
+            return None
+        chapter = {"chapter_number": key, "nodes_encountered": []}
+        chapters.append(chapter)
+        chapters.sort(key=lambda c: _chapter_order(chapter_key(c.get("chapter_number", ""))))
+        return chapter
+
+    def is_current(self, key: str, digest: Optional[str]) -> bool:
+        """チャプターのノード挿入データが反映済みか"""
+        chapter = self.chapter_entry(key)
+        if chapter is None:
+            return digest is None
+        return chapter.get("node_data_digest") == digest
+
+    def update_chapter(self, key: str, nodes: Iterable[Dict], digest: Optional[str] = None) -> bool:
+        """1チャプター分のノード挿入データを反映（他のチャプターのデータは読み直さない）
+
+        Returns:
+            いずれかのノードの初出チャプター・時刻が変わったか
+        """
+        appearances = chapter_first_appearances(nodes)
+        touched = set()
+
+        # 以前このチャプターに出現していて、今回なくなったノード
+        for nid, info in self.nodes.items():
+            if key in info["chapters"] and nid not in appearances:
+                del info["chapters"][key]
+                touched.add(nid)
+
+        for nid, (name, seconds) in appearances.items():
+            info = self.nodes.setdefault(nid, {"name": name, "chapters": {}})
+            timestamp = seconds_to_clock(seconds)
+            if info["chapters"].get(key) != timestamp:
+                info["chapters"][key] = timestamp
+                touched.add(nid)
+
+        debut_changed = False
+        for nid in touched:
+            info = self.nodes[nid]
+            if not info["chapters"]:
+                del self.nodes[nid]
+                debut_changed = True
+                continue
+            first = min(info["chapters"], key=_chapter_order)
+            if first == key:
+                info["name"] = appearances[nid][0]
+            if (first, info["chapters"][first]) != (info.get("first_chapter"), info.get("first_timestamp")):
+                info["first_chapter"] = first
+                info["first_timestamp"] = info["chapters"][first]
+                debut_changed = True
+            # チャプターの順に並べて保存
+            info["chapters"] = dict(sorted(info["chapters"].items(), key=lambda item: _chapter_order(item[0])))
+
+        chapter = self.chapter_entry(key, create=True)
+        chapter["nodes_encountered"] = [name for name, _ in appearances.values()]
+        chapter["node_data_digest"] = digest
+        if debut_changed or "series_nodes_list" not in self.data:
+            self.data["series_nodes_list"] = [
+                info["name"] for info in sorted(self.nodes.values(), key=_debut_order)]
+        self._dirty = True
+        return debut_changed
+
+    def debut_classes(self, key: str) -> Dict[str, str]:
+        """チャプターに出現するノードの初出区分（識別子 → SERIES_DEBUT / CHAPTER_DEBUT）"""
+        return {nid: SERIES_DEBUT if info["first_chapter"] == key else CHAPTER_DEBUT
+                for nid, info in self.nodes.items() if key in info["chapters"]}
+
+
+def node_data_files(series_dir: Path) -> Dict[str, Path]:
+    """02_analysis_data のノード挿入データ（チャプター番号 → パス）"""
+    files = {}
+    for path in sorted((Path(series_dir) / ANALYSIS_DATA_DIR).glob("chapter_*_node_insertions.json")):
+        match = NODE_FILE_RE.match(path.name)
+        if match:
+            files[chapter_key(match.group(1))] = path
+    return files
+
+
+def update_series(index: NodeIndex, series_dir: Path) -> List[str]:
+    """変更のあったチャプターのノード挿入データだけを読み込んでインデックスを更新
+
+    Returns:
+        反映したチャプター番号
+    """
+    files = node_data_files(series_dir)
+    # ノード挿入データが削除されたチャプターも空として反映する
+    recorded = [chapter_key(chapter.get("chapter_number", "")) for chapter in index.data.get("chapters", [])
+                if chapter.get("node_data_digest")]
+    updated = []
+    for key in sorted(set(files) | set(recorded), key=_chapter_order):
+        path = files.get(key)
+        digest = file_digest(path)
+        if index.is_current(key, digest):
+            continue
+        nodes = []
+        if path is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    nodes = json.load(f)
+            except ValueError as e:
+                logger.warning(f"[WARNING] チャプター {key}: ノード挿入データを解析できないためスキップ: {e}")
+                continue
+            if not isinstance(nodes, list):
+                logger.warning(f"[WARNING] チャプター {key}: ノード挿入データがリストではないためスキップ: {path}")
+                continue
+        index.update_chapter(key, nodes, digest)
+        updated.append(key)
+    return updated
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="ノード初出インデックス更新ツール（progress_tracker.json の series_nodes_list / nodes_encountered を更新）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python node_index.py tutorials/Project_Skylark_Bridges
+  python node_index.py tutorials/Project_Skylark_Bridges --list
+        """
+    )
+    parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+    parser.add_argument('--list', action='store_true', help='更新後にノードごとの初出チャプター・時刻を表示')
+    workflow_logging.add_arguments(parser)
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    series_dir = Path(args.series_dir)
+    if not series_dir.is_dir():
+        logger.error(f"[ERROR] シリーズフォルダが見つかりません: {series_dir}")
+        sys.exit(1)
+
+    try:
+        index = NodeIndex.for_series(series_dir)
+        updated = update_series(index, series_dir)
+        index.save()
+    except (OSError, ValueError) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+    if updated:
+        logger.info(f"[SUCCESS] {len(updated)}チャプターを反映しました: {', '.join(updated)}（ノード数: {len(index.nodes)}）")
+    else:
+        logger.info(f"[INFO] 変更なし（ノード数: {len(index.nodes)}）")
+
+    if args.list:
+        for info in sorted(index.nodes.values(), key=_debut_order):
+            chapters = ", ".join(info["chapters"])
+            print(f"  {info['first_chapter']} {info['first_timestamp']}  {info['name']}（出現: {chapters}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""静的配信用の事前圧縮（guide.html → guide.html.gz 等を並べて書き出す）"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import workflow_logging
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（未インストール時は標準ライブラリの形式のみ）
+    brotli = None
+
+
+logger = workflow_logging.get_logger("precompress")
+
+# 形式名 → (拡張子, 圧縮関数)。配信時にCPUを使わないため、いずれも最大圧縮レベル
+# gzip は mtime=0 とし、同じ内容からは同じバイト列を生成する
+COMPRESSORS: Dict[str, Tuple[str, Callable[[bytes], bytes]]] = {
+    "gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    "zlib": (".zz", lambda data: zlib.compress(data, 9)),
+    "bz2": (".bz2", lambda data: bz2.compress(data, 9)),
+    "xz": (".xz", lambda data: lzma.compress(data, preset=9)),
+}
+if brotli is not None:
+    COMPRESSORS["br"] = (".br", lambda data: brotli.compress(data, quality=11))
+
+# 事前圧縮する拡張子（ディレクトリ指定時）
+DEFAULT_EXTENSIONS = (".html", ".css", ".js")
+
+
+def compressed_path(path: Path, codec: str) -> Path:
+    """圧縮ファイルのパス（元のファイル名 + 拡張子）"""
+    return path.with_name(path.name + COMPRESSORS[codec][0])
+
+
+def compressed_paths(path: Path, codecs: Iterable[str]) -> List[Path]:
+    """指定した形式の圧縮ファイルのパス"""
+    return [compressed_path(path, codec) for codec in codecs]
+
+
+def remove_compressed(path: Path, keep: Iterable[str] = ()) -> None:
+    """keep 以外の形式の圧縮ファイルを削除（元のファイルと内容が食い違ったまま配信されないように）"""
+    keep = set(keep)
+    for codec in COMPRESSORS:
+        if codec not in keep:
+            try:
+                compressed_path(path, codec).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def write_compressed(path: Path, codecs: Iterable[str]) -> Dict[str, int]:
+    """ファイルを指定した形式で圧縮して隣に書き出す（指定外の形式の古い圧縮ファイルは削除）
+
+    Returns:
+        形式名 → 圧縮後のバイト数
+
+    Raises:
+        ValueError: 未対応の形式が指定された場合
+    """
+    path = Path(path)
+    codecs = list(codecs)
+    unknown = [codec for codec in codecs if codec not in COMPRESSORS]
+    if unknown:
+        raise ValueError(f"未対応の圧縮形式です: {', '.join(unknown)}（対応: {', '.join(COMPRESSORS)}）")
+
+    data = path.read_bytes()
+    stat = path.stat()
+    sizes = {}
+    for codec in codecs:
+        target = compressed_path(path, codec)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        compressed = COMPRESSORS[codec][1](data)
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        # 元のファイルと同じ更新時刻にそろえる（Webサーバーの Last-Modified / ETag が一致する）
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, target)
+        sizes[codec] = len(compressed)
+    remove_compressed(path, keep=codecs)
+    return sizes
+
+
+def _iter_targets(paths: Iterable[Path], extensions: Iterable[str]) -> List[Path]:
+    """指定されたファイルと、ディレクトリ配下の対象拡張子のファイル"""
+    extensions = tuple(extensions)
+    targets = []
+    for path in paths:
+        if path.is_dir():
+            targets.extend(sorted(p for p in path.rglob("*") if p.is_file() and p.suffix in extensions))
+        else:
+            targets.append(path)
+    return targets
+
+
+def _compress_one(path: Path, codecs: List[str]) -> Tuple[Path, int, Dict[str, int]]:
+    """1ファイルを圧縮（ワーカープロセスで呼ばれる）"""
+    return path, path.stat().st_size, write_compressed(path, codecs)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="事前圧縮ツール（静的配信用に .gz 等の圧縮ファイルを元のファイルの隣に書き出す）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python precompress.py tutorials/Project_Skylark_Bridges/03_learning_guide
+  python precompress.py guide.html --codecs gzip xz
+  python precompress.py tutorials/Project_Skylark_Bridges/03_learning_guide --jobs 4
+        """
+    )
+    parser.add_argument('paths', nargs='+', help='圧縮するファイルまたはフォルダ（フォルダは配下の .html / .css / .js）')
+    parser.add_argument('--codecs', nargs='+', choices=list(COMPRESSORS), default=['gzip'],
+                        help='圧縮形式（デフォルト: gzip）')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='並列プロセス数（デフォルト: CPU数）')
+    workflow_logging.add_arguments(parser)
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    targets = _iter_targets([Path(p) for p in args.paths], DEFAULT_EXTENSIONS)
+    if not targets:
+        logger.warning("[WARNING] 圧縮対象のファイルがありません")
+        return
+
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(targets)))
+    total_before = 0
+    total_after = {codec: 0 for codec in args.codecs}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for path, size, sizes in executor.map(_compress_one, targets, [args.codecs] * len(targets)):
+                total_before += size
+                for codec, compressed in sizes.items():
+                    total_after[codec] += compressed
+                logger.debug(f"[OK] {path}: " + ", ".join(f"{c}={s:,}" for c, s in sizes.items()))
+    except OSError as e:
+        logger.error(f"[ERROR] {e}")
+        sys.exit(1)
+
+    summary = ", ".join(f"{codec} {size:,}バイト（{size / total_before * 100 if total_before else 0:.1f}%）"
+                        for codec, size in total_after.items())
+    logger.info(f"[SUCCESS] {len(targets)}ファイルを圧縮: {total_before:,}バイト → {summary}")
+
+
+if __name__ == "__main__":
+    main()
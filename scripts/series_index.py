@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""シリーズ目次ページと検索インデックスの生成（03_learning_guide/index.html + search_index.js）"""
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import workflow_logging
+from build_cache import file_digest, stage_key
+from build_series import GUIDE_CHAPTERS_DIR, ChapterTask, discover_chapters
+from node_index import PROGRESS_FILE_NAME, _chapter_order, chapter_key, parse_insert_timestamp
+from srt_reader import read_srt_file, seconds_to_clock
+
+
+logger = workflow_logging.get_logger("series_index")
+
+GUIDE_DIR = GUIDE_CHAPTERS_DIR.parent
+INDEX_FILE_NAME = "index.html"
+SEARCH_INDEX_FILE_NAME = "search_index.js"
+SEARCH_CACHE_FILE_NAME = ".search_index_cache.json"
+SEARCH_INDEX_VERSION = 1
+
+# 検索対象の種類（search_index.js の docs[i][1]）
+KIND_SUBTITLE = 0
+KIND_NODE = 1
+
+# ブラウザ側（SEARCH_SCRIPT）と同じ規則で分割する
+WORD_RE = re.compile(r'[a-z0-9]+')
+CJK_RUN_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+
+def tokenize(text: str) -> Set[str]:
+    """検索用トークン（英数字は単語、日本語は連続する文字の2-gram。1文字だけの場合はその文字）"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = set(WORD_RE.findall(text))
+    for run in CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def build_chapter_postings(task: ChapterTask) -> Dict:
+    """1チャプター分の検索対象と転置インデックス（トークン → チャプター内の検索対象番号）"""
+    docs = []
+    if task.jp_srt:
+        for cue in read_srt_file(task.jp_srt):
+            docs.append([KIND_SUBTITLE, seconds_to_clock(cue.start), cue.text])
+    if task.node_data:
+        with open(task.node_data, 'r', encoding='utf-8') as f:
+            nodes = json.load(f)
+        for node in nodes if isinstance(nodes, list) else []:
+            try:
+                timestamp = seconds_to_clock(parse_insert_timestamp(node['insert_after_timestamp']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            docs.append([KIND_NODE, timestamp, str(node.get('node_name', ''))])
+    # 検索結果がチャプター内の時刻順に並ぶように（同時刻は字幕 → ノード）
+    docs.sort(key=lambda doc: (doc[1], doc[0]))
+
+    tokens: Dict[str, List[int]] = {}
+    for doc_id, (_, _, text) in enumerate(docs):
+        for token in tokenize(text):
+            tokens.setdefault(token, []).append(doc_id)
+    return {"docs": docs, "tokens": tokens}
+
+
+def _load_cache(path: Path) -> Dict[str, Dict]:
+    """チャプター単位の検索インデックスキャッシュを読み込み（破損・旧形式の場合は空）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == SEARCH_INDEX_VERSION:
+            return data.get("chapters", {})
+    except (FileNotFoundError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """一時ファイル経由で書き出し"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _read_progress(series_dir: Path) -> Dict:
+    """progress_tracker.json（ない・壊れている場合は空）"""
+    try:
+        with open(series_dir / PROGRESS_FILE_NAME, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def list_chapters(series_dir: Path, tasks: List[ChapterTask]) -> List[Dict]:
+    """目次に載せるチャプター（progress_tracker.json の予定チャプターと字幕フォルダの和集合、番号順）"""
+    chapters: Dict[str, Dict] = {}
+    for chapter in _read_progress(series_dir).get("chapters", []):
+        key = chapter_key(chapter.get("chapter_number", ""))
+        if key:
+            chapters[key] = {"number": key, "title": str(chapter.get("title") or chapter.get("chapter_name") or ""),
+                             "task": None}
+    for task in tasks:
+        entry = chapters.setdefault(chapter_key(task.number), {"number": chapter_key(task.number), "title": ""})
+        entry["task"] = task
+        entry["title"] = entry["title"] or task.name
+    return [chapters[key] for key in sorted(chapters, key=_chapter_order)]
+
+
+def build_search_index(series_dir: Path, chapters: List[Dict]) -> Dict:
+    """全チャプターの検索インデックスを作成（入力が変わったチャプターのみ再計算）
+
+    Returns:
+        {"version", "chapters": [{"number", "title", "href"}], "docs": [[チャプター位置, 種類, 時刻, テキスト]],
+         "tokens": {トークン: 検索対象番号の差分列}}
+    """
+    cache_path = series_dir / SEARCH_CACHE_FILE_NAME
+    cache = _load_cache(cache_path)
+    new_cache: Dict[str, Dict] = {}
+    rebuilt = 0
+
+    index = {"version": SEARCH_INDEX_VERSION, "chapters": [], "docs": [], "tokens": {}}
+    postings: Dict[str, List[int]] = {}
+    for chapter in chapters:
+        task = chapter["task"]
+        href = None
+        if task is not None and task.html.exists():
+            href = f"{GUIDE_CHAPTERS_DIR.name}/{task.html.name}"
+        index["chapters"].append({"number": chapter["number"], "title": chapter["title"], "href": href})
+        if task is None:
+            continue
+
+        key = stage_key(SEARCH_INDEX_VERSION, file_digest(task.jp_srt), file_digest(task.node_data))
+        partial = cache.get(task.name)
+        if partial is None or partial.get("key") != key:
+            partial = {"key": key, **build_chapter_postings(task)}
+            rebuilt += 1
+        new_cache[task.name] = partial
+
+        # チャプター内の番号を全体の番号にずらして統合（チャプター順に追加するので昇順が保たれる）
+        offset = len(index["docs"])
+        position = len(index["chapters"]) - 1
+        index["docs"].extend([position, *doc] for doc in partial["docs"])
+        for token, doc_ids in partial["tokens"].items():
+            postings.setdefault(token, []).extend(offset + doc_id for doc_id in doc_ids)
+
+    # 昇順の番号列を差分で保存してファイルを小さくする
+    for token in sorted(postings):
+        doc_ids = postings[token]
+        index["tokens"][token] = [doc_ids[0]] + [b - a for a, b in zip(doc_ids, doc_ids[1:])]
+
+    if rebuilt or set(new_cache) != set(cache):
+        _write_atomic(cache_path, json.dumps({"version": SEARCH_INDEX_VERSION, "chapters": new_cache},
+                                             ensure_ascii=False, separators=(',', ':')))
+    logger.info(f"[INFO] 検索インデックス: {len(index['docs'])}件・{len(index['tokens'])}トークン"
+                f"（再計算: {rebuilt}/{len(new_cache)}チャプター）")
+    return index
+
+
+SEARCH_SCRIPT = r"""
+(() => {
+    const index = window.GUIDE_SEARCH_INDEX;
+    const input = document.getElementById('search-input');
+    const status = document.getElementById('search-status');
+    const results = document.getElementById('search-results');
+    const WORD_RE = /[a-z0-9]+/g;
+    const CJK_RE = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+/g;
+    const MAX_RESULTS = 200;
+    const has = (object, key) => Object.prototype.hasOwnProperty.call(object, key);
+    const normalize = (text) => text.normalize('NFKC').toLowerCase();
+    const cache = new Map();
+    const normalizedDocs = new Map();
+
+    // 差分で保存された番号列を復元
+    function postings(token) {
+        if (!cache.has(token)) {
+            const deltas = has(index.tokens, token) ? index.tokens[token] : [];
+            const ids = new Array(deltas.length);
+            let id = 0;
+            deltas.forEach((delta, i) => { id += delta; ids[i] = id; });
+            cache.set(token, ids);
+        }
+        return cache.get(token);
+    }
+
+    // 条件に合うトークンの番号列の和集合（単語の前方一致・1文字の日本語）
+    function matching(cacheKey, predicate) {
+        if (!cache.has(cacheKey)) {
+            const ids = new Set();
+            for (const token of Object.keys(index.tokens)) {
+                if (predicate(token)) postings(token).forEach((id) => ids.add(id));
+            }
+            cache.set(cacheKey, Array.from(ids).sort((a, b) => a - b));
+        }
+        return cache.get(cacheKey);
+    }
+
+    function intersect(a, b) {
+        const result = [];
+        let i = 0, j = 0;
+        while (i < a.length && j < b.length) {
+            if (a[i] === b[j]) { result.push(a[i]); i++; j++; }
+            else if (a[i] < b[j]) i++;
+            else j++;
+        }
+        return result;
+    }
+
+    function search(query) {
+        const text = normalize(query);
+        const lists = [];
+        for (const word of text.match(WORD_RE) || []) {
+            lists.push(matching('w:' + word, (token) => token.startsWith(word)));
+        }
+        for (const run of text.match(CJK_RE) || []) {
+            if (run.length === 1) {
+                lists.push(matching('c:' + run, (token) => token.includes(run)));
+            } else {
+                for (let i = 0; i + 1 < run.length; i++) lists.push(postings(run.slice(i, i + 2)));
+            }
+        }
+        if (!lists.length) return null;
+        lists.sort((a, b) => a.length - b.length);
+        let ids = lists[0];
+        for (const list of lists.slice(1)) ids = intersect(ids, list);
+
+        // 2-gramの一致だけでは語順が保証されないため、本文に各語が含まれるかを確認
+        const terms = text.split(/\s+/).filter(Boolean);
+        return ids.filter((id) => {
+            if (!normalizedDocs.has(id)) normalizedDocs.set(id, normalize(index.docs[id][3]));
+            const doc = normalizedDocs.get(id);
+            return terms.every((term) => doc.includes(term));
+        });
+    }
+
+    function render(ids) {
+        results.replaceChildren();
+        if (ids === null) { status.textContent = ''; return; }
+        status.textContent = ids.length > MAX_RESULTS
+            ? `${ids.length}件（先頭${MAX_RESULTS}件を表示）` : `${ids.length}件`;
+        for (const id of ids.slice(0, MAX_RESULTS)) {
+            const [position, kind, timestamp, text] = index.docs[id];
+            const chapter = index.chapters[position];
+            const item = document.createElement('li');
+            const link = document.createElement(chapter.href ? 'a' : 'span');
+            if (chapter.href) link.href = chapter.href;
+            link.className = 'hit-chapter';
+            link.textContent = `Chapter ${chapter.number} ${chapter.title}`;
+            const time = document.createElement('span');
+            time.className = 'timestamp';
+            time.textContent = timestamp;
+            const body = document.createElement('span');
+            body.className = kind === 1 ? 'hit-node' : 'hit-text';
+            body.textContent = kind === 1 ? `📝 ${text}` : `「${text}」`;
+            item.append(link, time, body);
+            results.append(item);
+        }
+    }
+
+    input.addEventListener('input', () => render(search(input.value)));
+    if (input.value) render(search(input.value));
+})();
+"""
+
+
+def render_index_html(series_name: str, index: Dict) -> str:
+    """目次ページのHTML（検索は search_index.js を読み込んでブラウザ内で実行）"""
+    items = []
+    for chapter in index["chapters"]:
+        label = html.escape(f"Chapter {chapter['number']}: {chapter['title']}")
+        if chapter["href"]:
+            items.append(f'<li><a href="{html.escape(chapter["href"])}">{label}</a></li>')
+        else:
+            items.append(f'<li><span class="pending">{label}（未生成）</span></li>')
+    title = html.escape(f"{series_name} 学習ガイド")
+    return f'''<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        :root {{
+            --bg-primary: #ffffff;
+            --bg-secondary: #f8fafc;
+            --text-primary: #1a202c;
+            --text-secondary: #4a5568;
+            --border-light: #e2e8f0;
+            --highlight-bg: #ebf8ff;
+            --highlight-border: #3182ce;
+            --info-bg: #f0fff4;
+        }}
+
+        body {{
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            line-height: 1.6;
+            color: var(--text-primary);
+            background-color: var(--bg-primary);
+            margin: 0;
+            padding: 0;
+        }}
+
+        .container {{
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 2rem;
+        }}
+
+        .header {{
+            background: linear-gradient(135deg, var(--highlight-bg), var(--info-bg));
+            border-radius: 16px;
+            padding: 2rem;
+            margin-bottom: 2rem;
+            border: 2px solid var(--highlight-border);
+        }}
+
+        .header h1 {{
+            color: var(--highlight-border);
+            margin: 0;
+            font-size: 2rem;
+        }}
+
+        .section {{
+            background: var(--bg-secondary);
+            border: 1px solid var(--border-light);
+            border-radius: 12px;
+            padding: 1.5rem;
+            margin: 1.5rem 0;
+        }}
+
+        #search-input {{
+            width: 100%;
+            box-sizing: border-box;
+            font-size: 1.1rem;
+            padding: 0.6rem 0.8rem;
+            border: 2px solid var(--highlight-border);
+            border-radius: 8px;
+        }}
+
+        #search-status, .pending {{
+            color: var(--text-secondary);
+        }}
+
+        #search-results li {{
+            margin: 0.6rem 0;
+        }}
+
+        .timestamp {{
+            font-family: 'Monaco', 'Consolas', monospace;
+            color: var(--highlight-border);
+            font-weight: 700;
+            margin: 0 0.8rem;
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>{title}</h1>
+        </div>
+
+        <div class="section">
+            <h2>検索</h2>
+            <input id="search-input" type="search" placeholder="字幕・ノード名で検索（例: Ray、アトリビュート）" autocomplete="off">
+            <p id="search-status"></p>
+            <ul id="search-results"></ul>
+        </div>
+
+        <div class="section">
+            <h2>チャプター</h2>
+            <ol>
+                {(chr(10) + "                ").join(items)}
+            </ol>
+        </div>
+    </div>
+    <script src="{SEARCH_INDEX_FILE_NAME}"></script>
+    <script>{SEARCH_SCRIPT}</script>
+</body>
+</html>
+'''
+
+
+def build_series_index(series_dir: Path, tasks: Optional[List[ChapterTask]] = None) -> Path:
+    """index.html と search_index.js を書き出し、index.html のパスを返す"""
+    tasks = discover_chapters(series_dir) if tasks is None else tasks
+    progress = _read_progress(series_dir)
+    series_name = str(progress.get("series_info", {}).get("name") or series_dir.name).replace("_", " ")
+
+    index = build_search_index(series_dir, list_chapters(series_dir, tasks))
+    guide_dir = series_dir / GUIDE_DIR
+    guide_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(guide_dir / SEARCH_INDEX_FILE_NAME,
+                  "window.GUIDE_SEARCH_INDEX = " + json.dumps(index, ensure_ascii=False, separators=(',', ':')) + ";\n")
+    index_path = guide_dir / INDEX_FILE_NAME
+    _write_atomic(index_path, render_index_html(series_name, index))
+    return index_path
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="シリーズ目次ページ生成ツール（チャプター一覧と字幕・ノード名の検索インデックス）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python series_index.py tutorials/Project_Skylark_Bridges
+        """
+    )
+    parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+    workflow_logging.add_arguments(parser)
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    try:
+        index_path = build_series_index(Path(args.series_dir))
+    except (OSError, ValueError) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+    logger.info(f"[SUCCESS] 目次ページを生成しました: {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,135 @@
 # -*- coding: utf-8 -*-
 """SRT品質修正ツール"""
 
-import re
 import sys
 import os
 import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import instrumentation
+import workflow_logging
+from instrumentation import Metrics
+from srt_reader import Cue, iter_cues, parse_cues
+from workflow_logging import ProgressReporter
+
+try:
+    import numpy as np
+except ImportError:  # NumPyは任意（未インストール時は python エンジンのみ）
+    np = None
+
+
+logger = workflow_logging.get_logger("srt_quality_fixer")
+
+# 解析失敗の警告を個別に表示する上限（以降はDEBUGレベルのみ）
+MAX_FAILURE_WARNINGS = 10
+
+# セグメント結合エンジン（auto: NumPyがあれば numpy）
+ENGINES = ("auto", "python", "numpy")
+SENTENCE_ENDINGS = ('.', '!', '?')
+
+
+def _first_satisfying(approx, lo, hi, predicate):
+    """単調な述語が [lo, hi) で最初に真となる位置を、近似位置から補正して厳密に求める（なければ hi）
+
+    全要素をまとめて処理する（approx, lo は配列、hi は整数、predicate(rows, positions) は
+    rows で選んだ要素について positions での真偽配列を返す）。
+    浮動小数点の「a - b >= c」と二分探索用の「a >= b + c」は丸めで一致しないことがあるため、
+    二分探索の結果を元の比較式で前後に補正する。
+    """
+    j = np.minimum(np.maximum(approx, lo), hi)
+    while True:
+        rows = np.flatnonzero(j > lo)
+        rows = rows[predicate(rows, j[rows] - 1)]
+        if not rows.size:
+            break
+        j[rows] -= 1
+    while True:
+        rows = np.flatnonzero(j < hi)
+        rows = rows[~predicate(rows, j[rows])]
+        if not rows.size:
+            break
+        j[rows] += 1
+    return j
+
+
+class CueArrays:
+    """NumPyエンジン用にキュー列から前計算した配列（パラメータを変えて再利用できる）"""
+
+    def __init__(self, segments: List[Cue]):
+        if np is None:
+            raise RuntimeError("numpy エンジンには NumPy が必要です（pip install numpy）")
+        count = len(segments)
+        self.start_array = np.fromiter((seg.start for seg in segments), dtype=np.float64, count=count)
+        self.end_array = np.fromiter((seg.end for seg in segments), dtype=np.float64, count=count)
+        sentence_end = np.fromiter(
+            (seg.text.rstrip().endswith(SENTENCE_ENDINGS) for seg in segments),
+            dtype=bool, count=count)
+        # 直前のキューが文末で終わる位置（完結閾値での早期終了の候補）
+        self.early_candidates = np.flatnonzero(sentence_end[:-1]) + 1
+        self.early_candidate_ends = self.end_array[self.early_candidates]
+        self.ends_sorted = bool(np.all(self.end_array[1:] >= self.end_array[:-1]))
+
+    def next_group_starts(self, target_duration: float, early_duration: float):
+        """各キュー i をグループ先頭としたときの次グループの先頭インデックスを一括計算
+
+        終了時刻が昇順であることが前提。次の先頭は以下のうち早い方:
+        - end[j] - start[i] >= target_duration となる最初の j (> i)
+        - 直前のキューが文末で終わり、end[j] - start[i] >= early_duration となる最初の j (> i)
+        """
+        starts, ends = self.start_array, self.end_array
+        count = len(ends)
+        following = np.arange(1, count + 1)
+
+        # 目標時間に達する位置
+        target_next = _first_satisfying(
+            np.searchsorted(ends, starts + target_duration), following, count,
+            lambda rows, j: ends[j] - starts[rows] >= target_duration)
+
+        # 文末での早期終了位置（候補配列上の位置で探索）
+        candidates = self.early_candidates
+        candidate_ends = self.early_candidate_ends
+        early_pos = _first_satisfying(
+            np.searchsorted(candidate_ends, starts + early_duration),
+            np.searchsorted(candidates, following), len(candidates),
+            lambda rows, k: candidate_ends[k] - starts[rows] >= early_duration)
+        early_next = np.append(candidates, count)[early_pos]
+
+        return np.minimum(target_next, early_next)
+
+    def group_starts(self, target_duration: float, early_duration: float) -> List[int]:
+        """各グループの先頭インデックスを返す"""
+        next_start = self.next_group_starts(target_duration, early_duration).tolist()
+        count = len(next_start)
+        group_starts = []
+        i = 0
+        while i < count:
+            group_starts.append(i)
+            i = next_start[i]
+        return group_starts
 
 
 class SRTQualityFixer:
     """SRT品質修正を行うクラス"""
     
-    def __init__(self, target_duration: int = 40, completion_threshold: float = 0.8):
+    def __init__(self, target_duration: int = 40, completion_threshold: float = 0.8,
+                 metrics: Optional[Metrics] = None, engine: str = "auto"):
         """
         初期化
         
         Args:
             target_duration: 目標セグメント時間（秒）
             completion_threshold: 文完結時の早期終了閾値（0.0-1.0）
+            metrics: ステージ別の計測先（省略時は新規作成）
+            engine: セグメント結合エンジン（"auto" / "python" / "numpy"）
         """
         self.target_duration = target_duration
         self.completion_threshold = completion_threshold
+        self.metrics = metrics or Metrics()
+        self.engine = resolve_engine(engine)
         self.stats = {
             'original_segments': 0,
             'fixed_segments': 0,
@@ -55,114 +162,85 @@ class SRTQualityFixer:
         
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
     
-    def parse_srt_file(self, file_path: Path) -> List[Dict]:
+    def parse_srt_file(self, file_path: Path) -> List[Cue]:
         """SRTファイルを解析してセグメントリストを返す"""
-        print(f"[INFO] ファイルを読み込み中: {file_path}")
+        logger.info(f"[INFO] ファイルを読み込み中: {file_path}")
+        start_time = time.perf_counter()
+        
+        parsed_segments = []
+        failed_segments = 0
+        
+        def report_failure(segment_number: int, reason: str) -> None:
+            nonlocal failed_segments
+            failed_segments += 1
+            message = f"[WARNING] セグメント {segment_number}: {reason}"
+            if failed_segments <= MAX_FAILURE_WARNINGS:
+                logger.warning(message)
+                if failed_segments == MAX_FAILURE_WARNINGS:
+                    logger.warning("[WARNING] 以降の解析失敗の表示は省略します（--log-level DEBUG で全件表示）")
+            else:
+                logger.debug(message)
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                # JavaScriptエスケープ文字の処理・ノイズ除去は共通リーダーで行う
+                parsed_segments.extend(iter_cues(f, lenient=True, on_error=report_failure))
         except FileNotFoundError:
             raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
         except Exception as e:
             raise Exception(f"ファイルの読み込みに失敗しました: {e}")
         
-        # JavaScriptエスケープ文字を処理
-        content = content.replace('\\\\n', '\\n')
-        content = content.replace('\\n', '\n')
-        content = content.strip('\"').strip("'")
-        
-        # セグメントを分割
-        segments = []
-        current_segment = ""
+        self.metrics.add_time("parse", time.perf_counter() - start_time)
+        self.metrics.count("cues_parsed", len(parsed_segments))
+        self.metrics.count("cues_failed", failed_segments)
         
-        for line in content.split('\n'):
-            line = line.strip()
-            if not line:
-                if current_segment:
-                    segments.append(current_segment)
-                    current_segment = ""
-            else:
-                current_segment += line + "\n"
-        
-        if current_segment:
-            segments.append(current_segment)
+        logger.info(f"[SUCCESS] 解析完了: {len(parsed_segments)}セグメント（失敗: {failed_segments}）")
+        return parsed_segments
+    
+    def fix_segments(self, segments: List[Cue]) -> List[Cue]:
+        """セグメントを品質修正"""
+        logger.info(f"[INFO] 品質修正を開始（目標: {self.target_duration}秒、完結閾値: {self.completion_threshold:.0%}）")
+        start_time = time.perf_counter()
         
-        # セグメントを解析
-        parsed_segments = []
-        failed_segments = 0
+        fixed_segments = self.merge_groups(segments, self.group_starts(segments))
         
-        for i, segment in enumerate(segments):
-            try:
-                lines = segment.strip().split('\n')
-                if len(lines) >= 3:
-                    # セグメント番号のクリーンアップ（JavaScriptエラー対応）
-                    segment_num_str = lines[0].strip()
-                    # 不正な文字（バックスラッシュ等）を削除
-                    segment_num_str = re.sub(r'[^\d]', '', segment_num_str)
-                    if not segment_num_str:
-                        raise ValueError(f"セグメント番号が無効: '{lines[0]}'")
-                    segment_num = int(segment_num_str)
-                    
-                    timestamp_line = lines[1].strip()
-                    # タイムスタンプラインのクリーンアップ
-                    timestamp_line = re.sub(r'[^\d:,\->\s]', '', timestamp_line)
-                    
-                    text_lines = lines[2:]
-                    
-                    # タイムスタンプを解析
-                    timestamp_match = re.match(
-                        r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', 
-                        timestamp_line
-                    )
-                    if timestamp_match:
-                        start_time = self.parse_timestamp(timestamp_match.group(1))
-                        end_time = self.parse_timestamp(timestamp_match.group(2))
-                        
-                        text = ' '.join(text_lines).strip()
-                        
-                        parsed_segments.append({
-                            'number': segment_num,
-                            'start': start_time,
-                            'end': end_time,
-                            'text': text,
-                            'duration': end_time - start_time
-                        })
-                    else:
-                        failed_segments += 1
-                        print(f"[WARNING] セグメント {i+1}: タイムスタンプの解析失敗")
-                else:
-                    failed_segments += 1
-                    print(f"[WARNING] セグメント {i+1}: 不正な形式")
-            except (ValueError, IndexError) as e:
-                failed_segments += 1
-                print(f"[WARNING] セグメント {i+1}: 解析エラー - {e}")
+        self.metrics.add_time("fix", time.perf_counter() - start_time)
+        self.metrics.count("segments_fixed", len(fixed_segments))
         
-        print(f"[SUCCESS] 解析完了: {len(parsed_segments)}セグメント（失敗: {failed_segments}）")
-        return parsed_segments
+        logger.info(f"[SUCCESS] 品質修正完了: {len(segments)} → {len(fixed_segments)}セグメント")
+        return fixed_segments
     
-    def fix_segments(self, segments: List[Dict]) -> List[Dict]:
-        """セグメントを品質修正"""
-        print(f"[INFO] 品質修正を開始（目標: {self.target_duration}秒、完結閾値: {self.completion_threshold:.0%}）")
+    def group_starts(self, segments: List[Cue], arrays: Optional["CueArrays"] = None) -> List[int]:
+        """結合後の各グループの先頭インデックスを返す（arrays は前計算済みの配列、省略時は必要に応じて作成）"""
+        if self.engine != "python" and segments:
+            if arrays is None:
+                arrays = CueArrays(segments)
+            if arrays.ends_sorted:
+                return arrays.group_starts(self.target_duration,
+                                           self.target_duration * self.completion_threshold)
+            # 終了時刻が単調でない入力は二分探索できないため逐次版で処理
+            logger.debug("[DEBUG] 終了時刻が昇順でないため python エンジンで処理します")
+        return self._group_starts_python(segments)
+    
+    def _group_starts_python(self, segments: List[Cue]) -> List[int]:
+        """貪欲法でセグメントを1件ずつ見てグループの区切りを決める（逐次版）"""
+        progress = ProgressReporter(logger, len(segments))
         
-        fixed_segments = []
-        current_group = []
+        group_starts = []
         current_group_start = None
-        current_group_end = None
+        previous_text = None
         
         for i, segment in enumerate(segments):
-            if not current_group:
+            if current_group_start is None:
                 # 新しいグループ開始
-                current_group = [segment]
-                current_group_start = segment['start']
-                current_group_end = segment['end']
+                group_starts.append(i)
+                current_group_start = segment.start
             else:
                 # 現在のグループに追加するかどうか判断
-                potential_duration = segment['end'] - current_group_start
+                potential_duration = segment.end - current_group_start
                 
-                # 文完結性を確認
-                last_text = current_group[-1]['text'].rstrip()
-                is_sentence_complete = last_text.endswith(('.', '!', '?'))
+                # 文完結性を確認（グループ内の直前のセグメント）
+                is_sentence_complete = previous_text.rstrip().endswith(SENTENCE_ENDINGS)
                 
                 # グループ終了条件
                 should_end_group = (
@@ -172,53 +250,35 @@ class SRTQualityFixer:
                 )
                 
                 if should_end_group:
-                    # 現在のグループを完成させる
-                    combined_text = ' '.join([seg['text'] for seg in current_group])
-                    combined_text = self._normalize_text(combined_text)
-                    
-                    fixed_segments.append({
-                        'start': current_group_start,
-                        'end': current_group_end,
-                        'text': combined_text,
-                        'duration': current_group_end - current_group_start,
-                        'original_count': len(current_group)
-                    })
-                    
                     # 新しいグループ開始
-                    current_group = [segment]
-                    current_group_start = segment['start']
-                    current_group_end = segment['end']
-                else:
-                    # 現在のグループに追加
-                    current_group.append(segment)
-                    current_group_end = segment['end']
+                    group_starts.append(i)
+                    current_group_start = segment.start
+            
+            previous_text = segment.text
             
-            # 進捗表示
-            if (i + 1) % 10 == 0:
-                print(f"   進捗: {i+1}/{len(segments)} ({(i+1)/len(segments)*100:.1f}%)")
+            # 進捗表示（一定時間ごと）
+            progress.update(i + 1)
         
-        # 最後のグループを処理
-        if current_group:
-            combined_text = ' '.join([seg['text'] for seg in current_group])
+        return group_starts
+    
+    def merge_groups(self, segments: List[Cue], group_starts: List[int]) -> List[Cue]:
+        """グループ単位でセグメントのテキストを結合し、修正後のキューを返す"""
+        boundaries = group_starts + [len(segments)]
+        
+        fixed_segments = []
+        for first, stop in zip(boundaries, boundaries[1:]):
+            combined_text = ' '.join([seg.text for seg in segments[first:stop]])
             combined_text = self._normalize_text(combined_text)
             
-            fixed_segments.append({
-                'start': current_group_start,
-                'end': current_group_end,
-                'text': combined_text,
-                'duration': current_group_end - current_group_start,
-                'original_count': len(current_group)
-            })
-        
-        print(f"[SUCCESS] 品質修正完了: {len(segments)} → {len(fixed_segments)}セグメント")
+            fixed_segments.append(Cue(len(fixed_segments) + 1, segments[first].start,
+                                      segments[stop - 1].end, combined_text))
         return fixed_segments
     
     def _normalize_text(self, text: str) -> str:
         """テキストを正規化"""
-        text = text.strip()
-        
-        # 複数スペースを単一スペースに
-        text = re.sub(r'\s+', ' ', text)
+        # 前後の空白を除去し、連続する空白を単一スペースに
+        # （str.split() は正規表現の \s と同じ空白判定で、re.sub より高速）
+        text = ' '.join(text.split())
         
         # 文末にピリオドを追加（必要に応じて）
         if text and not text.endswith(('.', '!', '?')):
@@ -226,35 +286,45 @@ class SRTQualityFixer:
         
         return text
     
-    def write_srt_file(self, segments: List[Dict], output_path: Path) -> None:
+    def iter_srt_blocks(self, segments: Iterable[Cue]) -> Iterator[str]:
+        """セグメントをSRTブロック文字列（末尾の空行を含む）として順に返す"""
+        for i, segment in enumerate(segments, 1):
+            yield (f"{i}\n"
+                   f"{self.seconds_to_timestamp(segment.start)} --> {self.seconds_to_timestamp(segment.end)}\n"
+                   f"{segment.text}\n\n")
+    
+    def format_srt(self, segments: Iterable[Cue]) -> str:
+        """セグメントをSRTテキストに変換"""
+        return ''.join(self.iter_srt_blocks(segments))
+    
+    def write_srt_file(self, segments: List[Cue], output_path: Path) -> None:
         """修正されたセグメントをSRTファイルに書き出し"""
-        print(f"[INFO] ファイルを書き込み中: {output_path}")
+        logger.info(f"[INFO] ファイルを書き込み中: {output_path}")
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(segments, 1):
-                    f.write(f"{i}\n")
-                    f.write(f"{self.seconds_to_timestamp(segment['start'])} --> {self.seconds_to_timestamp(segment['end'])}\n")
-                    f.write(f"{segment['text']}\n\n")
+            with self.metrics.timer("write"):
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.writelines(self.iter_srt_blocks(segments))
+            self.metrics.count_file_bytes(output_path)
             
-            print(f"[SUCCESS] 書き込み完了: {output_path}")
+            logger.info(f"[SUCCESS] 書き込み完了: {output_path}")
         except Exception as e:
             raise Exception(f"ファイルの書き込みに失敗しました: {e}")
     
-    def calculate_stats(self, original_segments: List[Dict], fixed_segments: List[Dict]) -> None:
+    def calculate_stats(self, original_segments: List[Cue], fixed_segments: List[Cue]) -> None:
         """統計情報を計算"""
         self.stats['original_segments'] = len(original_segments)
         self.stats['fixed_segments'] = len(fixed_segments)
         
         if original_segments:
-            self.stats['avg_original_duration'] = sum(seg['duration'] for seg in original_segments) / len(original_segments)
+            self.stats['avg_original_duration'] = sum(seg.duration for seg in original_segments) / len(original_segments)
         
         if fixed_segments:
-            self.stats['avg_fixed_duration'] = sum(seg['duration'] for seg in fixed_segments) / len(fixed_segments)
+            self.stats['avg_fixed_duration'] = sum(seg.duration for seg in fixed_segments) / len(fixed_segments)
     
     def print_stats(self) -> None:
         """統計情報を表示"""
-        print(f"処理完了: {self.stats['original_segments']} → {self.stats['fixed_segments']}セグメント")
+        logger.info(f"処理完了: {self.stats['original_segments']} → {self.stats['fixed_segments']}セグメント")
     
     def fix_srt_quality(self, input_path: Path, output_path: Path) -> bool:
         """SRTファイルの品質修正を実行"""
@@ -276,6 +346,7 @@ class SRTQualityFixer:
             # 統計計算
             self.calculate_stats(original_segments, fixed_segments)
             self.stats['processing_time'] = (datetime.now() - start_time).total_seconds()
+            self.metrics.add_time("total", self.stats['processing_time'])
             
             # 結果表示
             self.print_stats()
@@ -283,10 +354,201 @@ class SRTQualityFixer:
             return True
             
         except Exception as e:
-            print(f"[ERROR] エラー: {e}")
+            logger.error(f"[ERROR] エラー: {e}")
             return False
 
 
+def resolve_engine(engine: str) -> str:
+    """エンジン名を検証し、auto を実際のエンジンに解決"""
+    if engine not in ENGINES:
+        raise ValueError(f"engine は {', '.join(ENGINES)} のいずれかを指定してください: {engine}")
+    if engine == "auto":
+        return "numpy" if np is not None else "python"
+    if engine == "numpy" and np is None:
+        raise ValueError("numpy エンジンには NumPy が必要です（pip install numpy）")
+    return engine
+
+
+def validate_parameters(target_duration: float, completion_threshold: float) -> None:
+    """修正パラメータを検証（範囲外はValueError）"""
+    if not 0.0 <= completion_threshold <= 1.0:
+        raise ValueError("completion-threshold は 0.0-1.0 の範囲で指定してください")
+    if target_duration <= 0:
+        raise ValueError("target-duration は正の数で指定してください")
+
+
+def fix_srt(source: Union[str, Iterable[Cue]], target_duration: int = 40,
+            completion_threshold: float = 0.8, strict: bool = False,
+            engine: str = "auto") -> List[Cue]:
+    """SRTテキストまたはキュー列を品質修正し、修正後のキューを返す（ファイル入出力・表示なし）
+    
+    Args:
+        source: SRTテキスト（JavaScript経由の崩れた字幕も可）またはCueのイテラブル
+        target_duration: 目標セグメント時間（秒）
+        completion_threshold: 文完結時の早期終了閾値（0.0-1.0）
+        strict: Trueの場合は解析できないブロックを読み飛ばさずSRTParseErrorを送出する
+        engine: セグメント結合エンジン（"auto" / "python" / "numpy"、結果は同一）
+    
+    Raises:
+        SRTParseError: strict=Trueで解析できないブロックがあった場合
+        ValueError: パラメータが範囲外の場合、または指定エンジンが使えない場合
+    """
+    validate_parameters(target_duration, completion_threshold)
+    fixer = SRTQualityFixer(target_duration, completion_threshold, engine=engine)
+    if isinstance(source, str):
+        source = parse_cues(source, lenient=True, strict=strict)
+    return fixer.fix_segments(list(source))
+
+
+def summarize_groups(segments: List[Cue], group_starts: List[int]) -> Dict:
+    """グループ分けの評価指標（セグメント数、平均・最大時間、文末で終わるグループの割合）を返す"""
+    boundaries = group_starts + [len(segments)]
+    durations = []
+    sentence_ends = 0
+    for first, stop in zip(boundaries, boundaries[1:]):
+        last = segments[stop - 1]
+        durations.append(last.end - segments[first].start)
+        if last.text.rstrip().endswith(SENTENCE_ENDINGS):
+            sentence_ends += 1
+    
+    count = len(durations)
+    return {
+        'segments': count,
+        'mean_duration': sum(durations) / count if count else 0.0,
+        'max_duration': max(durations, default=0.0),
+        'sentence_end_ratio': sentence_ends / count if count else 0.0,
+    }
+
+
+# スイープ用ワーカープロセスの状態（初期化時に1回だけキューを受け取る）
+_sweep_state = {}
+
+
+def _init_sweep_worker(segments: List[Cue], engine: str) -> None:
+    """ワーカープロセスの初期化（配列の前計算もワーカーごとに1回だけ行う）"""
+    _sweep_state['segments'] = segments
+    _sweep_state['engine'] = engine
+    _sweep_state['arrays'] = CueArrays(segments) if resolve_engine(engine) == "numpy" and segments else None
+
+
+def _evaluate_sweep_point(params: Tuple[float, float]) -> Dict:
+    """1組のパラメータでグループ分けを行い評価"""
+    target_duration, completion_threshold = params
+    fixer = SRTQualityFixer(target_duration, completion_threshold, engine=_sweep_state['engine'])
+    segments = _sweep_state['segments']
+    starts = fixer.group_starts(segments, _sweep_state['arrays'])
+    return {
+        'target_duration': target_duration,
+        'completion_threshold': completion_threshold,
+        **summarize_groups(segments, starts),
+    }
+
+
+def sweep_parameters(segments: List[Cue], target_durations: Sequence[float],
+                     completion_thresholds: Sequence[float], engine: str = "auto",
+                     jobs: int = 1) -> List[Dict]:
+    """解析済みのキュー列に対してパラメータの全組み合わせを評価（テキストの結合は行わない）
+    
+    Args:
+        segments: 解析済みのキュー列
+        target_durations: 評価する目標セグメント時間（秒）の一覧
+        completion_thresholds: 評価する完結閾値の一覧
+        engine: セグメント結合エンジン（"auto" / "python" / "numpy"）
+        jobs: 並列プロセス数（1の場合は現在のプロセスで実行）
+    
+    Returns:
+        組み合わせごとの評価結果（target_duration, completion_threshold, segments,
+        mean_duration, max_duration, sentence_end_ratio）のリスト（目標時間・閾値の順）
+    
+    Raises:
+        ValueError: パラメータが範囲外の場合、または指定エンジンが使えない場合
+    """
+    resolve_engine(engine)
+    grid = [(duration, threshold) for duration in target_durations for threshold in completion_thresholds]
+    for duration, threshold in grid:
+        validate_parameters(duration, threshold)
+    
+    jobs = max(1, min(jobs, len(grid)))
+    if jobs == 1:
+        _init_sweep_worker(segments, engine)
+        try:
+            return [_evaluate_sweep_point(params) for params in grid]
+        finally:
+            _sweep_state.clear()
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_sweep_worker,
+                             initargs=(segments, engine)) as executor:
+        return list(executor.map(_evaluate_sweep_point, grid))
+
+
+def format_sweep_table(results: List[Dict]) -> str:
+    """スイープ結果の表示用テーブルを返す"""
+    lines = ["目標(秒)  閾値  セグメント数  平均(秒)  最大(秒)  文末率"]
+    for r in results:
+        lines.append(f"{r['target_duration']:>8g}  {r['completion_threshold']:4.2f}  "
+                     f"{r['segments']:>12d}  {r['mean_duration']:8.1f}  {r['max_duration']:8.1f}  "
+                     f"{r['sentence_end_ratio']:6.1%}")
+    return "\n".join(lines)
+
+
+def parse_sweep_choice(value: str) -> Tuple[int, float]:
+    """'目標時間:閾値' 形式の引数を解析"""
+    try:
+        duration, threshold = value.split(":")
+        return int(duration), float(threshold)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'目標時間:閾値' の形式で指定してください: {value}")
+
+
+def run_sweep(args) -> bool:
+    """スイープモード: 入力を1回だけ解析してパラメータの組み合わせを評価し、選んだ組み合わせを書き出す"""
+    input_path = Path(args.input_file)
+    durations = args.sweep_durations or [args.target_duration]
+    thresholds = args.sweep_thresholds or [args.completion_threshold]
+    
+    logger.info("=== Vimeo翻訳ワークフロー - SRT品質修正ツール（パラメータスイープ） ===")
+    logger.info(f"入力: {input_path}")
+    logger.info(f"評価: 目標時間 {len(durations)}通り × 完結閾値 {len(thresholds)}通り（並列数: {args.jobs}）")
+    logger.info("")
+    
+    metrics = Metrics()
+    fixer = SRTQualityFixer(metrics=metrics, engine=args.engine)
+    start_time = time.perf_counter()
+    try:
+        # 解析前にパラメータを検証
+        for duration in durations:
+            for threshold in thresholds:
+                validate_parameters(duration, threshold)
+        if args.sweep_choose:
+            validate_parameters(*args.sweep_choose)
+        
+        if not input_path.exists():
+            raise FileNotFoundError(f"入力ファイルが見つかりません: {input_path}")
+        segments = fixer.parse_srt_file(input_path)
+        
+        with metrics.timer("sweep"):
+            results = sweep_parameters(segments, durations, thresholds, engine=args.engine, jobs=args.jobs)
+        metrics.count("sweep_points", len(results))
+        print(format_sweep_table(results))
+        
+        if args.sweep_choose:
+            fixer.target_duration, fixer.completion_threshold = args.sweep_choose
+            logger.info("")
+            logger.info(f"[INFO] 選択した組み合わせを書き出し: 目標時間={fixer.target_duration}秒, "
+                        f"完結閾値={fixer.completion_threshold:.0%}")
+            output_path = Path(args.output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            fixer.write_srt_file(fixer.fix_segments(segments), output_path)
+    except Exception as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        return False
+    finally:
+        metrics.add_time("total", time.perf_counter() - start_time)
+        instrumentation.emit(metrics, args)
+    
+    return True
+
+
 def main():
     """メイン処理"""
     parser = argparse.ArgumentParser(
@@ -297,52 +559,86 @@ def main():
   python srt_quality_fixer.py input.srt output.srt
   python srt_quality_fixer.py input.srt output.srt --target-duration 30
   python srt_quality_fixer.py input.srt output.srt --completion-threshold 0.9
+  python srt_quality_fixer.py input.srt --sweep-durations 30 40 50 --sweep-thresholds 0.7 0.8 0.9
+  python srt_quality_fixer.py input.srt output.srt --sweep-durations 30 40 50 --sweep-choose 40:0.8
         """
     )
     
     parser.add_argument('input_file', help='入力SRTファイルパス')
-    parser.add_argument('output_file', help='出力SRTファイルパス')
+    parser.add_argument('output_file', nargs='?',
+                        help='出力SRTファイルパス（スイープ時は --sweep-choose の結果の出力先）')
     parser.add_argument('--target-duration', type=int, default=40,
                         help='目標セグメント時間（秒）（デフォルト: 40）')
     parser.add_argument('--completion-threshold', type=float, default=0.8,
                         help='文完結時の早期終了閾値（0.0-1.0）（デフォルト: 0.8）')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='セグメント結合エンジン（numpy はNumPyが必要、結果は同一）（デフォルト: auto）')
+    parser.add_argument('--sweep-durations', nargs='+', type=int, metavar='SEC',
+                        help='スイープ: 評価する目標セグメント時間の一覧（入力は1回だけ解析）')
+    parser.add_argument('--sweep-thresholds', nargs='+', type=float, metavar='RATIO',
+                        help='スイープ: 評価する完結閾値の一覧')
+    parser.add_argument('--sweep-choose', type=parse_sweep_choice, metavar='SEC:RATIO',
+                        help='スイープ: 出力ファイルに書き出す組み合わせ（例: 40:0.8）')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='スイープの並列プロセス数（デフォルト: 1）')
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='詳細な出力を表示')
+    instrumentation.add_arguments(parser)
+    workflow_logging.add_arguments(parser)
     
     args = parser.parse_args()
+    workflow_logging.configure_from_args(args, verbose=args.verbose)
+    
+    sweep = bool(args.sweep_durations or args.sweep_thresholds)
+    if sweep:
+        if args.output_file and not args.sweep_choose:
+            parser.error("スイープで出力ファイルを指定する場合は --sweep-choose で組み合わせを選んでください")
+        if args.sweep_choose and not args.output_file:
+            parser.error("--sweep-choose には出力SRTファイルパスが必要です")
+    elif args.output_file is None:
+        parser.error("出力SRTファイルパスを指定してください")
+    elif args.sweep_choose:
+        parser.error("--sweep-choose は --sweep-durations / --sweep-thresholds と併用してください")
+    if args.jobs < 1:
+        parser.error("--jobs は1以上で指定してください")
     
     # 引数検証
-    if not 0.0 <= args.completion_threshold <= 1.0:
-        print("[ERROR] エラー: completion-threshold は 0.0-1.0 の範囲で指定してください")
+    try:
+        validate_parameters(args.target_duration, args.completion_threshold)
+        resolve_engine(args.engine)
+    except ValueError as e:
+        logger.error(f"[ERROR] エラー: {e}")
         sys.exit(1)
     
-    if args.target_duration <= 0:
-        print("[ERROR] エラー: target-duration は正の数で指定してください")
-        sys.exit(1)
+    if sweep:
+        success = run_sweep(args)
+        sys.exit(0 if success else 1)
     
     # パス処理
     input_path = Path(args.input_file)
     output_path = Path(args.output_file)
     
-    print("=== Vimeo翻訳ワークフロー - SRT品質修正ツール ===")
-    print(f"入力: {input_path}")
-    print(f"出力: {output_path}")
-    print(f"設定: 目標時間={args.target_duration}秒, 完結閾値={args.completion_threshold:.0%}")
-    print()
+    logger.info("=== Vimeo翻訳ワークフロー - SRT品質修正ツール ===")
+    logger.info(f"入力: {input_path}")
+    logger.info(f"出力: {output_path}")
+    logger.info(f"設定: 目標時間={args.target_duration}秒, 完結閾値={args.completion_threshold:.0%}")
+    logger.info("")
     
     # 修正実行
     fixer = SRTQualityFixer(
         target_duration=args.target_duration,
-        completion_threshold=args.completion_threshold
+        completion_threshold=args.completion_threshold,
+        engine=args.engine
     )
     
     success = fixer.fix_srt_quality(input_path, output_path)
+    instrumentation.emit(fixer.metrics, args)
     
     if success:
-        print("\n[SUCCESS] 処理が正常に完了しました！")
+        logger.info("\n[SUCCESS] 処理が正常に完了しました！")
         sys.exit(0)
     else:
-        print("\n[FAILED] 処理に失敗しました")
+        logger.error("\n[FAILED] 処理に失敗しました")
         sys.exit(1)
 
 
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""SRT字幕の共通ストリーミングリーダー（品質修正ツール・マークダウン生成ツールで共用）と書き出し"""
+
+import io
+import re
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+# 厳密形式: "HH:MM:SS,mmm --> HH:MM:SS,mmm"
+TIMESTAMP_LINE_RE = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})')
+# 寛容形式: 矢印前後の空白の有無を問わない
+LENIENT_TIMESTAMP_LINE_RE = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})')
+# JavaScriptから貼り付けた字幕に混入するノイズの除去用
+NON_DIGIT_RE = re.compile(r'[^\d]')
+TIMESTAMP_NOISE_RE = re.compile(r'[^\d:,\->\s]')
+
+
+class SRTParseError(ValueError):
+    """SRTブロックの解析エラー"""
+
+    def __init__(self, reason: str, block_number: Optional[int] = None):
+        self.reason = reason              # 失敗理由
+        self.block_number = block_number  # 空行区切りで何番目のブロックか（1始まり）
+        message = reason if block_number is None else f"ブロック {block_number}: {reason}"
+        super().__init__(message)
+
+
+class Cue:
+    """字幕キュー1件（長時間の字幕を多数保持するため__slots__で軽量化）"""
+
+    __slots__ = ('number', 'start', 'end', 'text')
+
+    def __init__(self, number, start: float, end: float, text: str):
+        self.number = number  # セグメント番号（厳密モードでは元の文字列のまま）
+        self.start = start    # 開始時刻（秒）
+        self.end = end        # 終了時刻（秒）
+        self.text = text
+
+    @property
+    def duration(self) -> float:
+        """表示時間（秒）"""
+        return self.end - self.start
+
+    def __eq__(self, other):
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.number, self.start, self.end, self.text) == \
+            (other.number, other.start, other.end, other.text)
+
+    def __repr__(self):
+        return f"Cue({self.number!r}, {self.start!r}, {self.end!r}, {self.text!r})"
+
+
+def seconds_to_clock(seconds: float) -> str:
+    """秒を表示用の HH:MM:SS 形式に変換（ミリ秒は切り捨て）"""
+    total = int(seconds)
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+def timestamp_to_seconds(timestamp: str) -> float:
+    """正規表現で検証済みのタイムスタンプ (HH:MM:SS,mmm) を秒に変換"""
+    hours = int(timestamp[0:2])
+    minutes = int(timestamp[3:5])
+    seconds = int(timestamp[6:8])
+    milliseconds = int(timestamp[9:12])
+    return hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
+
+
+def seconds_to_srt_timestamp(seconds: float) -> str:
+    """秒をSRTタイムスタンプ (HH:MM:SS,mmm) に変換（ミリ秒に丸めるため timestamp_to_seconds の結果を元の表記に戻せる）"""
+    total_ms = int(round(seconds * 1000))
+    hours, rest = divmod(total_ms, 3600 * 1000)
+    minutes, rest = divmod(rest, 60 * 1000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def iter_srt_blocks(cues: Iterable[Cue], start: int = 1) -> Iterator[str]:
+    """キューをSRTブロック文字列（末尾の空行を含む、番号は start から振り直し）として順に返す"""
+    for i, cue in enumerate(cues, start):
+        yield (f"{i}\n"
+               f"{seconds_to_srt_timestamp(cue.start)} --> {seconds_to_srt_timestamp(cue.end)}\n"
+               f"{cue.text}\n\n")
+
+
+def _iter_unescaped_lines(lines: Iterable[str]) -> Iterator[str]:
+    """JavaScriptエスケープ文字（\\n）を改行に展開し、全体を囲む引用符を除去しながら行を返す"""
+    def pieces():
+        ends_with_newline = True
+        for raw_line in lines:
+            ends_with_newline = raw_line.endswith('\n')
+            text = raw_line[:-1] if ends_with_newline else raw_line
+            yield from text.replace('\\\\n', '\\n').replace('\\n', '\n').split('\n')
+        if ends_with_newline:
+            yield ''
+
+    # 全体の先頭・末尾の引用符を除去するため1行先読みする
+    iterator = pieces()
+    current = next(iterator)
+    is_first = True
+    for following in iterator:
+        yield current.lstrip('"').lstrip("'") if is_first else current
+        is_first = False
+        current = following
+    yield current.strip('"').strip("'") if is_first else current.rstrip('"').rstrip("'")
+
+
+def iter_blocks(lines: Iterable[str], unescape: bool = False) -> Iterator[List[str]]:
+    """空行区切りのブロック（改行を除いた行のリスト）を順に返す"""
+    source = _iter_unescaped_lines(lines) if unescape else lines
+    block = []
+    for line in source:
+        if line.endswith('\n'):
+            line = line[:-1]
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _parse_strict_block(block: List[str]) -> Cue:
+    """厳密形式のブロックをキューに変換"""
+    if len(block) < 3:
+        raise SRTParseError("不正な形式")
+    timestamp_match = TIMESTAMP_LINE_RE.match(block[1].strip())
+    if not timestamp_match:
+        raise SRTParseError("タイムスタンプの解析失敗")
+    return Cue(block[0].strip(),
+               timestamp_to_seconds(timestamp_match.group(1)),
+               timestamp_to_seconds(timestamp_match.group(2)),
+               '\n'.join(block[2:]).strip())
+
+
+def _parse_lenient_block(block: List[str]) -> Cue:
+    """JavaScript経由で崩れたブロックを補正してキューに変換"""
+    block = [line.strip() for line in block]
+    if len(block) < 3:
+        raise SRTParseError("不正な形式")
+
+    try:
+        # セグメント番号のクリーンアップ（不正な文字（バックスラッシュ等）を削除）
+        segment_num_str = NON_DIGIT_RE.sub('', block[0])
+        if not segment_num_str:
+            raise ValueError(f"セグメント番号が無効: '{block[0]}'")
+        segment_num = int(segment_num_str)
+
+        # タイムスタンプラインのクリーンアップ
+        timestamp_line = TIMESTAMP_NOISE_RE.sub('', block[1])
+        timestamp_match = LENIENT_TIMESTAMP_LINE_RE.match(timestamp_line)
+    except (ValueError, IndexError) as e:
+        raise SRTParseError(f"解析エラー - {e}") from e
+
+    if not timestamp_match:
+        raise SRTParseError("タイムスタンプの解析失敗")
+
+    return Cue(segment_num,
+               timestamp_to_seconds(timestamp_match.group(1)),
+               timestamp_to_seconds(timestamp_match.group(2)),
+               ' '.join(block[2:]).strip())
+
+
+def iter_cues(lines: Iterable[str], lenient: bool = False,
+              on_error: Optional[Callable[[int, str], None]] = None) -> Iterator[Cue]:
+    """SRTの行イテレータ（ファイルハンドル等）からキューを遅延的に返す
+
+    Args:
+        lines: SRTテキストの行イテレータ
+        lenient: Trueの場合はJavaScript経由の崩れた字幕を補正して読む
+                 （セグメント番号・タイムスタンプ行のノイズ除去、テキスト行は空白区切りで連結）。
+                 Falseの場合は厳密形式のみ受け付け、テキスト行は改行区切りで保持する。
+        on_error: 解析できなかったブロックの通知先 (ブロック番号, 理由)。
+                  省略時は読み飛ばす。SRTParseErrorを送出すれば読み込みを中断できる。
+    """
+    parse_block = _parse_lenient_block if lenient else _parse_strict_block
+    for i, block in enumerate(iter_blocks(lines, unescape=lenient), 1):
+        try:
+            cue = parse_block(block)
+        except SRTParseError as e:
+            if on_error:
+                on_error(i, e.reason)
+            continue
+        yield cue
+
+
+def parse_cues(text: str, lenient: bool = False, strict: bool = False) -> List[Cue]:
+    """SRTテキスト（文字列）をキューのリストに変換
+
+    Args:
+        text: SRTテキスト全体
+        lenient: iter_cues() と同じ（崩れた字幕を補正して読む）
+        strict: Trueの場合は解析できないブロックがあればSRTParseErrorを送出する
+
+    Raises:
+        SRTParseError: strict=Trueで解析できないブロックがあった場合
+    """
+    def raise_error(block_number: int, reason: str) -> None:
+        raise SRTParseError(reason, block_number)
+
+    return list(iter_cues(io.StringIO(text, newline=None), lenient=lenient,
+                          on_error=raise_error if strict else None))
+
+
+def read_srt_file(path, lenient: bool = True) -> List[Cue]:
+    """SRTファイルを読み込んでキューのリストを返す（既定ではJavaScript経由の崩れた字幕も補正して読む）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_cues(f, lenient=lenient))
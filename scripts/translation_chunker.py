@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""翻訳リクエスト用のチャンク分割と再結合（長いチャプターをトークン予算内に分けて翻訳）"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import workflow_logging
+from srt_reader import Cue, iter_srt_blocks, parse_cues, read_srt_file
+
+
+logger = workflow_logging.get_logger("translation_chunker")
+
+CHUNK_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "chunks.json"
+
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_OVERLAP = 2
+
+# セグメント番号・タイムスタンプ行・空行の分の見積もりトークン数
+CUE_OVERHEAD_TOKENS = 12
+
+# 翻訳関数: (チャンクのSRTテキスト, 直前の文脈テキスト) → 翻訳後のSRTテキスト
+Translator = Callable[[str, str], str]
+
+
+class ChunkTranslationError(ValueError):
+    """翻訳結果をチャンクの字幕に対応付けられない"""
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（ASCIIは約4文字で1トークン、それ以外（日本語等）は1文字1トークン）"""
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return -(-ascii_chars // 4) + (len(text) - ascii_chars)
+
+
+def cue_tokens(cue: Cue) -> int:
+    """キュー1件をSRT形式で送る場合の概算トークン数"""
+    return CUE_OVERHEAD_TOKENS + estimate_tokens(cue.text)
+
+
+class Chunk:
+    """翻訳リクエスト1回分のキュー（文脈として前のキューを含むが、翻訳対象は cues のみ）"""
+
+    def __init__(self, index: int, first: int, cues: List[Cue], context: List[Cue], tokens: int):
+        self.index = index      # チャンク番号（1始まり）
+        self.first = first      # 先頭キューの位置（全体のキュー列での0始まりの位置）
+        self.cues = cues        # 翻訳対象のキュー
+        self.context = context  # 直前の文脈（翻訳対象外）
+        self.tokens = tokens    # 文脈を含む概算トークン数
+
+    @property
+    def numbers(self) -> range:
+        """翻訳対象キューのセグメント番号（全体での通し番号）"""
+        return range(self.first + 1, self.first + 1 + len(self.cues))
+
+    def source_text(self) -> str:
+        """翻訳対象をSRTテキストで返す（セグメント番号は全体での通し番号）"""
+        return ''.join(iter_srt_blocks(self.cues, start=self.first + 1))
+
+    def context_text(self) -> str:
+        """直前の文脈をテキストで返す"""
+        return '\n'.join(cue.text for cue in self.context)
+
+
+def pack_chunks(cues: List[Cue], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                overlap: int = DEFAULT_OVERLAP) -> List[Chunk]:
+    """キュー列をセグメント境界でチャンクに分割（文脈を含めて token_budget 以内に収める）
+
+    文脈は予算に収まる分だけ直前のキューから含める（古い側から削る）。
+    1件だけで予算を超えるキューは警告を出し、文脈なしの単独のチャンクにする（予算を超える）。
+
+    Args:
+        cues: 品質修正済みのキュー列
+        token_budget: 1チャンクあたりの概算トークン数の上限
+        overlap: 文脈として前のチャンクから含めるキュー数
+    """
+    if token_budget <= 0:
+        raise ValueError("token_budget は正の数で指定してください")
+    if overlap < 0:
+        raise ValueError("overlap は0以上で指定してください")
+
+    costs = [cue_tokens(cue) for cue in cues]
+    chunks = []
+    first = 0
+    while first < len(cues):
+        tokens = costs[first]
+        if tokens > token_budget:
+            logger.warning(f"[WARNING] セグメント {first + 1}: 1件で予算を超えるため単独のチャンクにします"
+                           f"（概算 {tokens} トークン > {token_budget}）")
+        # 文脈は翻訳対象の先頭キューと合わせて予算に収まる分だけ含める
+        context_first = first
+        while (context_first > max(0, first - overlap)
+               and tokens + costs[context_first - 1] <= token_budget):
+            context_first -= 1
+            tokens += costs[context_first]
+        stop = first + 1
+        while stop < len(cues) and tokens + costs[stop] <= token_budget:
+            tokens += costs[stop]
+            stop += 1
+        chunks.append(Chunk(len(chunks) + 1, first, cues[first:stop], cues[context_first:first], tokens))
+        first = stop
+    return chunks
+
+
+def parse_translation(chunk: Chunk, translated_text: str) -> List[str]:
+    """チャンクの翻訳結果（SRTテキスト）から、翻訳対象キューの順に訳文を取り出す
+
+    セグメント番号で対応付け、番号が崩れている場合は件数が一致すれば出現順で対応付ける。
+
+    Raises:
+        ChunkTranslationError: 翻訳結果のセグメントが対応付けられない場合
+    """
+    translated = parse_cues(translated_text, lenient=True)
+    by_number = {cue.number: cue.text for cue in translated}
+    expected = list(chunk.numbers)
+    if all(number in by_number for number in expected) and len(translated) == len(expected):
+        return [by_number[number] for number in expected]
+    if len(translated) == len(expected):
+        logger.warning(f"[WARNING] チャンク {chunk.index}: セグメント番号が一致しないため出現順で対応付けます")
+        return [cue.text for cue in translated]
+
+    missing = [number for number in expected if number not in by_number]
+    detail = f"（欠落: {', '.join(map(str, missing[:10]))}）" if missing else ""
+    raise ChunkTranslationError(
+        f"チャンク {chunk.index}: 翻訳結果のセグメント数が一致しません"
+        f"（期待: {len(expected)}件, 結果: {len(translated)}件）{detail}")
+
+
+def reassemble(chunks: List[Chunk], translations: List[List[str]]) -> List[Cue]:
+    """チャンクごとの訳文を元のタイミングのキュー列に戻す（番号は1から振り直す）"""
+    result = []
+    for chunk, texts in zip(chunks, translations):
+        for cue, text in zip(chunk.cues, texts):
+            result.append(Cue(len(result) + 1, cue.start, cue.end, text))
+    return result
+
+
+def translate_chunks(chunks: List[Chunk], translator: Translator, jobs: int = 1) -> List[Cue]:
+    """各チャンクを翻訳関数に渡して翻訳し、元のタイミングで再結合（jobs > 1 の場合はスレッドで並列実行）
+
+    Raises:
+        ChunkTranslationError: 翻訳結果のセグメントが対応付けられない場合
+    """
+    def translate(chunk: Chunk) -> List[str]:
+        return parse_translation(chunk, translator(chunk.source_text(), chunk.context_text()))
+
+    if jobs <= 1 or len(chunks) <= 1:
+        translations = [translate(chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            translations = list(executor.map(translate, chunks))
+    return reassemble(chunks, translations)
+
+
+def echo_translator(source_text: str, context_text: str) -> str:
+    """動作確認用の翻訳関数（入力をそのまま返す）"""
+    return source_text
+
+
+def chunk_file_names(chunk: Chunk) -> Dict[str, str]:
+    """チャンクの入出力ファイル名（翻訳対象・文脈・翻訳結果）"""
+    stem = f"chunk_{chunk.index:03d}"
+    return {
+        "source": f"{stem}.srt",
+        "context": f"{stem}_context.txt",
+        "translated": f"{stem}_jp.srt",
+    }
+
+
+def split_to_directory(cues: List[Cue], chunk_dir: Path, token_budget: int, overlap: int) -> List[Chunk]:
+    """チャンクごとのSRT・文脈ファイルとマニフェストを書き出し"""
+    chunks = pack_chunks(cues, token_budget, overlap)
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "version": CHUNK_FORMAT_VERSION,
+        "token_budget": token_budget,
+        "overlap": overlap,
+        "cue_count": len(cues),
+        "chunks": [],
+    }
+    for chunk in chunks:
+        names = chunk_file_names(chunk)
+        (chunk_dir / names["source"]).write_text(chunk.source_text(), encoding='utf-8')
+        if chunk.context:
+            (chunk_dir / names["context"]).write_text(chunk.context_text() + "\n", encoding='utf-8')
+        else:
+            names["context"] = None
+        manifest["chunks"].append({
+            "index": chunk.index,
+            "first": chunk.numbers.start,
+            "last": chunk.numbers.stop - 1,
+            "tokens": chunk.tokens,
+            **names,
+        })
+    with open(chunk_dir / MANIFEST_FILE_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return chunks
+
+
+def join_from_directory(cues: List[Cue], chunk_dir: Path) -> List[Cue]:
+    """split_to_directory で分割したチャンクの翻訳結果（chunk_NNN_jp.srt）を再結合
+
+    Raises:
+        FileNotFoundError: マニフェスト・翻訳結果のファイルがない場合
+        ChunkTranslationError: 元のSRTが分割時と異なる、または翻訳結果が対応付けられない場合
+    """
+    with open(chunk_dir / MANIFEST_FILE_NAME, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("version") != CHUNK_FORMAT_VERSION or manifest.get("cue_count") != len(cues):
+        raise ChunkTranslationError("元のSRTが分割時と一致しません（再度 split を実行してください）")
+
+    chunks = pack_chunks(cues, manifest["token_budget"], manifest["overlap"])
+    translations = []
+    for chunk in chunks:
+        translated_path = chunk_dir / chunk_file_names(chunk)["translated"]
+        translations.append(parse_translation(chunk, translated_path.read_text(encoding='utf-8')))
+    return reassemble(chunks, translations)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="翻訳チャンク分割ツール（en_fixed.srt をトークン予算内のチャンクに分け、翻訳結果を jp.srt に再結合）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python translation_chunker.py split transcript_en_fixed.srt chunks/
+  python translation_chunker.py split transcript_en_fixed.srt chunks/ --budget 1500 --overlap 3
+  python translation_chunker.py join transcript_en_fixed.srt chunks/ transcript_jp.srt
+        """
+    )
+    workflow_logging.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    split_parser = subparsers.add_parser('split', help='チャンクに分割（chunk_NNN.srt と文脈 chunk_NNN_context.txt を出力）')
+    split_parser.add_argument('en_fixed_srt', help='品質修正済みの英語SRTファイル')
+    split_parser.add_argument('chunk_dir', help='チャンクの出力フォルダ')
+    split_parser.add_argument('--budget', type=int, default=DEFAULT_TOKEN_BUDGET,
+                              help=f'1チャンクの概算トークン数の上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）')
+    split_parser.add_argument('--overlap', type=int, default=DEFAULT_OVERLAP,
+                              help=f'文脈として含める直前のセグメント数（デフォルト: {DEFAULT_OVERLAP}）')
+
+    join_parser = subparsers.add_parser('join', help='翻訳結果 chunk_NNN_jp.srt を元のタイミングで再結合')
+    join_parser.add_argument('en_fixed_srt', help='分割に使った英語SRTファイル（タイミングの基準）')
+    join_parser.add_argument('chunk_dir', help='チャンクのフォルダ')
+    join_parser.add_argument('output_srt', help='再結合した jp.srt の出力先')
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    try:
+        cues = read_srt_file(Path(args.en_fixed_srt))
+        chunk_dir = Path(args.chunk_dir)
+        if args.command == 'split':
+            chunks = split_to_directory(cues, chunk_dir, args.budget, args.overlap)
+            largest = max((chunk.tokens for chunk in chunks), default=0)
+            logger.info(f"[SUCCESS] {len(cues)}セグメントを{len(chunks)}チャンクに分割（最大 約{largest}トークン）: {chunk_dir}")
+        else:
+            output_path = Path(args.output_srt)
+            merged = join_from_directory(cues, chunk_dir)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.writelines(iter_srt_blocks(merged))
+            logger.info(f"[SUCCESS] {len(merged)}セグメントを再結合しました: {output_path}")
+    except (OSError, ValueError) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
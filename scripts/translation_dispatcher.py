@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""翻訳チャンクの非同期並列ディスパッチ（バックエンド差し替え可能、オフライン用のモック付き）"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import workflow_logging
+from srt_reader import Cue, iter_srt_blocks, parse_cues, read_srt_file
+from translation_chunker import (DEFAULT_OVERLAP, DEFAULT_TOKEN_BUDGET, Chunk, ChunkTranslationError,
+                                 Translator, pack_chunks, parse_translation, reassemble)
+from translation_memory import normalize_source
+
+
+logger = workflow_logging.get_logger("translation_dispatcher")
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+
+
+class TransientTranslationError(Exception):
+    """再試行で回復しうる翻訳エラー（レート制限・タイムアウト等）"""
+
+
+class TranslationBackend:
+    """翻訳バックエンドの基底クラス（translate を実装する）"""
+
+    name = "base"
+
+    async def translate(self, source_text: str, context_text: str) -> str:
+        """チャンクのSRTテキストを翻訳し、同じセグメント番号の翻訳後SRTテキストを返す
+
+        再試行すべき失敗は TransientTranslationError で通知する。
+        """
+        raise NotImplementedError
+
+
+class CallableBackend(TranslationBackend):
+    """同期の翻訳関数（translation_chunker.Translator）をスレッドで実行するバックエンド"""
+
+    name = "callable"
+
+    def __init__(self, translator: Translator):
+        self.translator = translator
+
+    async def translate(self, source_text: str, context_text: str) -> str:
+        return await asyncio.to_thread(self.translator, source_text, context_text)
+
+
+class EchoBackend(TranslationBackend):
+    """入力をそのまま返すモック（delay 秒の応答待ちを模擬）"""
+
+    name = "echo"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def translate(self, source_text: str, context_text: str) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return source_text
+
+
+class DictionaryBackend(TranslationBackend):
+    """英語セグメント → 日本語訳 の辞書で置き換えるモック（辞書にないセグメントは英語のまま）"""
+
+    name = "dictionary"
+
+    def __init__(self, dictionary: Dict[str, str], delay: float = 0.0):
+        self.dictionary = {normalize_source(source): target for source, target in dictionary.items()}
+        self.delay = delay
+
+    @classmethod
+    def from_json(cls, path: Path, delay: float = 0.0) -> "DictionaryBackend":
+        """{"英語": "日本語", ...} 形式のJSONファイルから作成"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), delay)
+
+    async def translate(self, source_text: str, context_text: str) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        cues = parse_cues(source_text, lenient=True)
+        translated = [Cue(cue.number, cue.start, cue.end, self.dictionary.get(normalize_source(cue.text), cue.text))
+                      for cue in cues]
+        start = cues[0].number if cues else 1
+        return ''.join(iter_srt_blocks(translated, start=start))
+
+
+async def _translate_chunk(chunk: Chunk, backend: TranslationBackend, semaphore: asyncio.Semaphore,
+                           retries: int, backoff: float,
+                           sleep: Callable[[float], Awaitable[None]]) -> List[str]:
+    """1チャンクを翻訳（失敗時は指数バックオフで再試行）"""
+    for attempt in range(retries + 1):
+        async with semaphore:
+            try:
+                translated = await backend.translate(chunk.source_text(), chunk.context_text())
+                texts = parse_translation(chunk, translated)
+                logger.debug(f"[DEBUG] チャンク {chunk.index}: 翻訳完了（{len(texts)}セグメント）")
+                return texts
+            except (TransientTranslationError, ChunkTranslationError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    raise
+                # ChunkTranslationError はメッセージにチャンク番号を含む
+                reason = str(e) if isinstance(e, ChunkTranslationError) else \
+                    f"チャンク {chunk.index}: {str(e) or type(e).__name__}"
+        # 待機中は同時実行数の枠を空けておく
+        delay = backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+        logger.warning(f"[WARNING] {reason}（{delay:.1f}秒後に再試行 {attempt + 1}/{retries}）")
+        await sleep(delay)
+
+
+async def dispatch_chunks(chunks: List[Chunk], backend: TranslationBackend,
+                          concurrency: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                          backoff: float = DEFAULT_BACKOFF,
+                          sleep: Callable[[float], Awaitable[None]] = asyncio.sleep) -> List[Cue]:
+    """チャンクを同時実行数 concurrency で翻訳し、元の順序・タイミングで再結合
+
+    Args:
+        chunks: pack_chunks() で分割したチャンク
+        backend: 翻訳バックエンド
+        concurrency: 同時に送るリクエスト数の上限
+        retries: 1チャンクあたりの再試行回数
+        backoff: 再試行の待ち時間の基準（秒）。attempt 回目は最大 backoff * 2**attempt 秒
+        sleep: 待機関数（テスト時に差し替え可能）
+
+    Raises:
+        TransientTranslationError / ChunkTranslationError: 再試行しても翻訳できないチャンクがあった場合
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency は1以上で指定してください")
+    if retries < 0:
+        raise ValueError("retries は0以上で指定してください")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(_translate_chunk(chunk, backend, semaphore, retries, backoff, sleep))
+             for chunk in chunks]
+    try:
+        translations = await asyncio.gather(*tasks)
+    except BaseException:
+        # 1チャンクでも失敗したら残りのリクエストは取り消す
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return reassemble(chunks, translations)
+
+
+# 実際には翻訳しない動作確認用のバックエンド（既定の jp.srt への出力を許可しない）
+MOCK_BACKENDS = ("echo", "dictionary")
+
+
+def default_output_path(en_fixed_path: Path) -> Path:
+    """transcript_*_en_fixed.srt に対応する transcript_*_jp.srt のパス"""
+    name = en_fixed_path.name
+    if name.endswith("_en_fixed.srt"):
+        return en_fixed_path.with_name(name[:-len("_en_fixed.srt")] + "_jp.srt")
+    return en_fixed_path.with_name(en_fixed_path.stem + "_jp.srt")
+
+
+def translate_file(en_fixed_path: Path, output_path: Path, backend: TranslationBackend,
+                   token_budget: int = DEFAULT_TOKEN_BUDGET, overlap: int = DEFAULT_OVERLAP,
+                   concurrency: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                   backoff: float = DEFAULT_BACKOFF) -> int:
+    """en_fixed.srt を翻訳して jp.srt を書き出し（失敗時は既存の出力を残す）、セグメント数を返す"""
+    cues = read_srt_file(en_fixed_path)
+    chunks = pack_chunks(cues, token_budget, overlap)
+    logger.info(f"[INFO] {len(cues)}セグメントを{len(chunks)}チャンクで翻訳（バックエンド: {backend.name}、同時実行数: {concurrency}）")
+
+    translated = asyncio.run(dispatch_chunks(chunks, backend, concurrency, retries, backoff))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(iter_srt_blocks(translated))
+    os.replace(tmp_path, output_path)
+    return len(translated)
+
+
+def create_backend(name: str, dictionary: Optional[str] = None, delay: float = 0.0) -> TranslationBackend:
+    """コマンドライン指定からバックエンドを作成"""
+    if name == "echo":
+        return EchoBackend(delay)
+    if name == "dictionary":
+        if not dictionary:
+            raise ValueError("dictionary バックエンドには --dictionary が必要です")
+        return DictionaryBackend.from_json(Path(dictionary), delay)
+    raise ValueError(f"未知のバックエンドです: {name}")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="翻訳ディスパッチャ（en_fixed.srt をチャンクに分けて並列に翻訳し jp.srt を作成）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python translation_dispatcher.py transcript_en_fixed.srt /tmp/preview_jp.srt --backend echo
+  python translation_dispatcher.py transcript_en_fixed.srt /tmp/preview_jp.srt --backend dictionary --dictionary glossary.json
+  python translation_dispatcher.py transcript_en_fixed.srt /tmp/preview_jp.srt --backend echo --delay 0.5 --concurrency 8
+        """
+    )
+    parser.add_argument('en_fixed_srt', help='品質修正済みの英語SRTファイル')
+    parser.add_argument('output_srt', nargs='?',
+                        help='出力する jp.srt（デフォルト: transcript_*_en_fixed.srt と同じフォルダの transcript_*_jp.srt。'
+                             'モックバックエンドでは指定必須）')
+    parser.add_argument('--backend', choices=MOCK_BACKENDS, default='echo',
+                        help='翻訳バックエンド（echo: 入力をそのまま返すモック、dictionary: 辞書で置き換えるモック）')
+    parser.add_argument('--dictionary', metavar='JSON',
+                        help='dictionary バックエンドの辞書（{"英語": "日本語"} 形式）')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='モックバックエンドの応答待ち時間（秒）（デフォルト: 0）')
+    parser.add_argument('--budget', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help=f'1チャンクの概算トークン数の上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）')
+    parser.add_argument('--overlap', type=int, default=DEFAULT_OVERLAP,
+                        help=f'文脈として含める直前のセグメント数（デフォルト: {DEFAULT_OVERLAP}）')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'同時に送るリクエスト数（デフォルト: {DEFAULT_CONCURRENCY}）')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'チャンクごとの再試行回数（デフォルト: {DEFAULT_RETRIES}）')
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF,
+                        help=f'再試行の待ち時間の基準（秒、回数ごとに倍増）（デフォルト: {DEFAULT_BACKOFF}）')
+    parser.add_argument('--force', action='store_true',
+                        help='既存の jp.srt を上書きする')
+    workflow_logging.add_arguments(parser)
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    # モックの出力（英語のまま等）でチャプターの翻訳済み字幕を置き換えないようにする
+    if args.backend in MOCK_BACKENDS and not args.output_srt:
+        parser.error(f'{args.backend} バックエンドはモックのため、出力先 output_srt を明示してください')
+
+    en_fixed_path = Path(args.en_fixed_srt)
+    output_path = Path(args.output_srt) if args.output_srt else default_output_path(en_fixed_path)
+    if output_path.name.endswith("_jp.srt") and output_path.exists() and not args.force:
+        logger.error(f"[ERROR] エラー: 既存の jp.srt は上書きしません（上書きする場合は --force）: {output_path}")
+        sys.exit(1)
+    try:
+        backend = create_backend(args.backend, args.dictionary, args.delay)
+        count = translate_file(en_fixed_path, output_path, backend, args.budget, args.overlap,
+                               args.concurrency, args.retries, args.backoff)
+    except (OSError, ValueError, TransientTranslationError) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+    logger.info(f"[SUCCESS] {count}セグメントを翻訳しました: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""翻訳メモリ（英語セグメント → 確定済み日本語訳）による再翻訳の削減"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import workflow_logging
+from build_series import discover_chapters
+from srt_reader import Cue, iter_srt_blocks, read_srt_file
+
+
+logger = workflow_logging.get_logger("translation_memory")
+
+TM_FILE_NAME = "translation_memory.sqlite3"
+TM_FORMAT_VERSION = 1
+
+# 英語版・日本語版のキューを同一とみなすタイムスタンプの許容差（秒）
+TIMING_TOLERANCE = 0.002
+
+# SQLiteのバインド変数上限（古いバージョンは999）を超えないように分割して検索
+LOOKUP_BATCH_SIZE = 500
+
+WHITESPACE_RE = re.compile(r'\s+')
+QUOTE_TRANSLATION = str.maketrans({'‘': "'", '’': "'", '“': '"', '”': '"'})
+
+
+def normalize_source(text: str) -> str:
+    """英語セグメントを検索キーに正規化（Unicode正規化・引用符の統一・空白の圧縮）"""
+    text = unicodedata.normalize('NFKC', text).translate(QUOTE_TRANSLATION)
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _same_timing(a: Cue, b: Cue) -> bool:
+    """2つのキューのタイムスタンプが許容差内で一致するか"""
+    return abs(a.start - b.start) <= TIMING_TOLERANCE and abs(a.end - b.end) <= TIMING_TOLERANCE
+
+
+def align_cues(en_cues: List[Cue], jp_cues: List[Cue]) -> List[Tuple[Cue, Cue]]:
+    """英語版と日本語版のキューをタイムスタンプで対応付け（対応しないキューは除外）"""
+    pairs = []
+    j = 0
+    for en in en_cues:
+        # 開始時刻が英語版より前の日本語版キューは対応なしとして読み飛ばす
+        while j < len(jp_cues) and jp_cues[j].start < en.start - TIMING_TOLERANCE:
+            j += 1
+        if j < len(jp_cues) and _same_timing(en, jp_cues[j]):
+            pairs.append((en, jp_cues[j]))
+            j += 1
+    return pairs
+
+
+class TranslationMemory:
+    """シリーズ直下のSQLite翻訳メモリを管理するクラス"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def for_series(cls, series_dir: Path) -> "TranslationMemory":
+        """シリーズフォルダの翻訳メモリを返す"""
+        return cls(Path(series_dir) / TM_FILE_NAME)
+
+    def __enter__(self) -> "TranslationMemory":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(commit=exc_type is None)
+
+    def open(self) -> "TranslationMemory":
+        """データベースを開く（存在しない場合は作成）"""
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                source_key TEXT PRIMARY KEY,
+                source_text TEXT NOT NULL,
+                target_text TEXT NOT NULL,
+                chapter TEXT,
+                updated_at TEXT NOT NULL
+            );
+        """)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(TM_FORMAT_VERSION),))
+        elif row[0] != str(TM_FORMAT_VERSION):
+            self._conn.close()
+            self._conn = None
+            raise ValueError(f"未対応の翻訳メモリ形式です（version {row[0]}）: {self.path}")
+        return self
+
+    def close(self, commit: bool = True) -> None:
+        """変更を確定してデータベースを閉じる"""
+        if self._conn is None:
+            return
+        if commit:
+            self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+
+    def lookup_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """英語テキストの一覧を検索し、正規化キー → 日本語訳 の辞書を返す（未登録のキーは含まない）"""
+        keys = sorted({normalize_source(text) for text in texts})
+        found = {}
+        for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[i:i + LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            found.update(self._conn.execute(
+                f"SELECT source_key, target_text FROM units WHERE source_key IN ({placeholders})", batch))
+        return found
+
+    def store(self, pairs: Iterable[Tuple[str, str]], chapter: Optional[str] = None) -> int:
+        """(英語, 日本語) の組を登録（同じ英語が登録済みの場合は新しい訳で上書き）し、件数を返す"""
+        updated_at = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for source, target in pairs:
+            key, target = normalize_source(source), target.strip()
+            if key and target:
+                rows.append((key, source, target, chapter, updated_at))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO units (source_key, source_text, target_text, chapter, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+
+def apply_memory(memory: TranslationMemory, en_cues: List[Cue]) -> Tuple[List[Cue], List[Cue]]:
+    """翻訳メモリで日本語訳を埋める
+
+    Returns:
+        (部分翻訳済みキュー, 未登録キュー)。部分翻訳済みキューは英語版と同じタイミングで、
+        未登録のセグメントは英語のまま残す。
+    """
+    translations = memory.lookup_many(cue.text for cue in en_cues)
+    filled, misses = [], []
+    for cue in en_cues:
+        target = translations.get(normalize_source(cue.text))
+        if target is None:
+            misses.append(cue)
+            filled.append(cue)
+        else:
+            filled.append(Cue(cue.number, cue.start, cue.end, target))
+    return filled, misses
+
+
+def merge_translations(partial_cues: List[Cue], translated_cues: List[Cue]) -> Tuple[List[Cue], int]:
+    """部分翻訳済みキューのうち、翻訳済みキューとタイムスタンプが一致するものを置き換える
+
+    Returns:
+        (統合後のキュー, 置き換えた件数)
+    """
+    replacements = {id(partial): translated for partial, translated in align_cues(partial_cues, translated_cues)}
+    merged = [Cue(cue.number, cue.start, cue.end, replacements[id(cue)].text) if id(cue) in replacements else cue
+              for cue in partial_cues]
+    return merged, len(replacements)
+
+
+def write_srt(cues: List[Cue], path: Path) -> None:
+    """キューをSRTファイルに書き出し（タイムスタンプは読み込み時の表記を保つ）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(iter_srt_blocks(cues))
+
+
+def learn_series(series_dir: Path, only: Optional[List[str]] = None) -> Tuple[int, int]:
+    """シリーズ内の en_fixed.srt / jp.srt の組から翻訳メモリを更新
+
+    Returns:
+        (登録件数, 対応付けできなかった英語セグメント数)
+    """
+    stored = unmatched = 0
+    with TranslationMemory.for_series(series_dir) as memory:
+        for task in discover_chapters(series_dir, only):
+            if not (task.en_fixed_srt and task.en_fixed_srt.exists() and task.jp_srt):
+                logger.debug(f"[DEBUG] {task.name}: en_fixed.srt / jp.srt が揃っていないためスキップ")
+                continue
+            en_cues = read_srt_file(task.en_fixed_srt)
+            pairs = align_cues(en_cues, read_srt_file(task.jp_srt))
+            count = memory.store(((en.text, jp.text) for en, jp in pairs), chapter=task.name)
+            stored += count
+            unmatched += len(en_cues) - len(pairs)
+            logger.info(f"[INFO] {task.name}: {count}件を登録（対応なし: {len(en_cues) - len(pairs)}件）")
+        logger.info(f"[INFO] 翻訳メモリの登録数: {len(memory)}件（{memory.path}）")
+    return stored, unmatched
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="翻訳メモリツール（変更のない英語セグメントは確定済みの日本語訳を再利用）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  python translation_memory.py learn tutorials/Project_Skylark_Bridges
+  python translation_memory.py apply tutorials/Project_Skylark_Bridges en_fixed.srt partial_jp.srt
+  python translation_memory.py merge partial_jp.srt partial_jp_misses_translated.srt transcript_jp.srt
+        """
+    )
+    workflow_logging.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    learn_parser = subparsers.add_parser('learn', help='en_fixed.srt と jp.srt の組から翻訳メモリを更新')
+    learn_parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+    learn_parser.add_argument('--chapters', nargs='+', metavar='NN',
+                              help='対象のチャプター番号（例: 01 02）')
+
+    apply_parser = subparsers.add_parser('apply', help='翻訳メモリで部分翻訳済みの jp.srt と未翻訳リストを作成')
+    apply_parser.add_argument('series_dir', help='シリーズフォルダ（tutorials/<シリーズ名>）')
+    apply_parser.add_argument('en_fixed_srt', help='品質修正済みの英語SRTファイル')
+    apply_parser.add_argument('output_srt', help='部分翻訳済みSRTの出力先（未登録のセグメントは英語のまま）')
+    apply_parser.add_argument('--misses', metavar='PATH',
+                              help='未登録セグメントのSRT出力先（デフォルト: <出力名>_misses.srt）')
+
+    merge_parser = subparsers.add_parser('merge', help='未登録セグメントの翻訳結果を部分翻訳済みSRTに統合')
+    merge_parser.add_argument('partial_srt', help='apply で作成した部分翻訳済みSRT')
+    merge_parser.add_argument('translated_srt', help='未登録セグメントを翻訳したSRT')
+    merge_parser.add_argument('output_srt', help='統合したSRTの出力先')
+
+    args = parser.parse_args()
+    workflow_logging.configure_from_args(args)
+
+    try:
+        if args.command == 'learn':
+            series_dir = Path(args.series_dir)
+            if not series_dir.is_dir():
+                raise FileNotFoundError(f"シリーズフォルダが見つかりません: {series_dir}")
+            stored, unmatched = learn_series(series_dir, args.chapters)
+            logger.info(f"[SUCCESS] {stored}件を登録しました（対応なし: {unmatched}件）")
+
+        elif args.command == 'apply':
+            en_cues = read_srt_file(Path(args.en_fixed_srt))
+            with TranslationMemory.for_series(Path(args.series_dir)) as memory:
+                filled, misses = apply_memory(memory, en_cues)
+            output_path = Path(args.output_srt)
+            misses_path = Path(args.misses) if args.misses else output_path.with_name(output_path.stem + "_misses.srt")
+            write_srt(filled, output_path)
+            write_srt(misses, misses_path)
+            hits = len(en_cues) - len(misses)
+            rate = hits / len(en_cues) if en_cues else 0.0
+            logger.info(f"[SUCCESS] 翻訳メモリ適用: {hits}/{len(en_cues)}セグメント（{rate:.0%}）")
+            logger.info(f"[INFO] 部分翻訳済み: {output_path}")
+            logger.info(f"[INFO] 未翻訳（{len(misses)}件）: {misses_path}")
+
+        else:
+            merged, replaced = merge_translations(read_srt_file(Path(args.partial_srt)), read_srt_file(Path(args.translated_srt)))
+            write_srt(merged, Path(args.output_srt))
+            logger.info(f"[SUCCESS] {replaced}件の翻訳を統合しました: {args.output_srt}")
+
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.error(f"[ERROR] エラー: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ツール共通のログ出力設定（ライブラリとして使う場合は既定で何も出力しない）"""
+
+import logging
+import sys
+import time
+from typing import Callable
+
+
+ROOT_LOGGER_NAME = "vimeo_workflow"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# ハンドラ未設定時に logging の lastResort が警告を表示しないようにする
+logging.getLogger(ROOT_LOGGER_NAME).addHandler(logging.NullHandler())
+
+
+def get_logger(name: str) -> logging.Logger:
+    """ツール用のロガーを返す"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """出力時点の sys.stdout に書き出すハンドラ（redirect_stdout による回収と併用できる）"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure(level: str = "INFO") -> None:
+    """コマンドライン実行用にログを標準出力へ出す（メッセージ自体に [INFO] 等の表記を含む）"""
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root.handlers):
+        if isinstance(handler, _StdoutHandler):
+            root.removeHandler(handler)
+    handler = _StdoutHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+
+def add_arguments(parser) -> None:
+    """--quiet / --log-level オプションを argparse に追加"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--quiet', '-q', action='store_true',
+                       help='エラー以外の出力を抑制')
+    group.add_argument('--log-level', choices=LOG_LEVELS, default=None,
+                       help='出力するログの最低レベル（デフォルト: INFO）')
+
+
+def configure_from_args(args, verbose: bool = False) -> None:
+    """コマンドライン指定に従ってログを設定（verbose指定時はDEBUG）"""
+    if args.quiet:
+        level = "ERROR"
+    elif args.log_level:
+        level = args.log_level
+    else:
+        level = "DEBUG" if verbose else "INFO"
+    configure(level)
+
+
+class ProgressReporter:
+    """進捗を一定時間ごとに出力（件数ごとではなく時間で間引き、大量入力でも出力量が増えない）"""
+
+    def __init__(self, logger: logging.Logger, total: int, interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logger
+        self.total = total
+        self.interval = interval
+        self._clock = clock
+        # 出力しないレベルの場合は時刻取得も省く
+        self._enabled = logger.isEnabledFor(logging.INFO) and total > 0
+        self._last_report = clock() if self._enabled else 0.0
+
+    def update(self, done: int) -> None:
+        """処理済み件数を通知（前回の出力から interval 秒以上経過していれば出力）"""
+        if not self._enabled:
+            return
+        now = self._clock()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.logger.info(f"   進捗: {done}/{self.total} ({done/self.total*100:.1f}%)")
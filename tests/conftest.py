@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""テスト共通設定（scripts/ のツールはフラットな構成のため、同じ方法でインポートできるようにする）"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""インライン装飾（リンク・太字）の1パス処理のゴールデンテスト
+
+期待値は従来の置換チェーン（_process_bold_text_chain）の出力。
+1パス処理で変換できない入力はチェーン処理に委ねられることも確認する。
+"""
+
+import pytest
+
+from md_to_html_converter import MDtoHTMLConverter
+
+
+BOX = '<a href="https://x/box.html" target="_blank">Box</a>'
+SPHERE = '<a href="https://x/s.html" target="_blank">Sphere</a>'
+
+# (入力, 期待されるHTML)
+SINGLE_PASS_CASES = [
+    # 太字
+    ("**bold**", "<strong>bold</strong>"),
+    ("**Label**: value", "<strong>Label:</strong> value"),
+    # 対応の崩れた *テキスト**（学習ガイドのノード行で使われる形）
+    ("*loose**", "<strong>loose</strong>"),
+    ("*loose**: value", "<strong>loose:</strong> value"),
+    ("**a** *b** **c**:", "<strong>a</strong> <strong>b</strong> <strong>c:</strong>"),
+    # 太字内のリンク
+    ("*[Box](https://x/box.html)**", f"<strong>{BOX}</strong>"),
+    ("**[Box](https://x/box.html)** and [Sphere](https://x/s.html)", f"<strong>{BOX}</strong> and {SPHERE}"),
+    ("* [x](u) **", '<strong> <a href="u" target="_blank">x</a> </strong>'),
+]
+
+CHAIN_CASES = [
+    # アスタリスクなし
+    ("plain text", "plain text"),
+    ("[Box](https://x/box.html)", BOX),
+    # 入れ子
+    ("**outer *inner** tail**", "<strong>outer <strong>inner</strong> tail</strong>"),
+    ("***triple***", "*<strong>triple</strong>*"),
+    # 曖昧・対応の取れないアスタリスク
+    ("a * b", "a * b"),
+    ("**unclosed", "**unclosed"),
+    ("**:colon**", "<strong>:colon</strong>"),
+    ("2 * 3 = 6 **ok**", "2 <strong> 3 = 6 </strong>ok**"),
+    # 太字の外まで続くリンク
+    ("**a [b](c** d)", '<strong>a <a href="c</strong> d" target="_blank">b</a>'),
+]
+
+
+@pytest.fixture
+def converter():
+    return MDtoHTMLConverter()
+
+
+@pytest.mark.parametrize("text, expected", SINGLE_PASS_CASES + CHAIN_CASES)
+def test_golden_output(converter, text, expected):
+    assert converter._process_bold_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", SINGLE_PASS_CASES + CHAIN_CASES)
+def test_matches_replacement_chain(converter, text, expected):
+    assert converter._process_bold_text(text) == converter._process_bold_text_chain(text)
+
+
+@pytest.mark.parametrize("text, expected", SINGLE_PASS_CASES)
+def test_single_pass_without_fallback(converter, text, expected):
+    assert converter._render_inline(text) == expected
+    converter._process_bold_text(text)
+    assert converter.chain_fallbacks == 0
+
+
+@pytest.mark.parametrize("text, expected", [case for case in CHAIN_CASES if "*" in case[0]])
+def test_ambiguous_input_falls_back_to_chain(converter, text, expected):
+    assert converter._render_inline(text) is None
+    assert converter._process_bold_text(text) == expected
+    assert converter.chain_fallbacks == 1